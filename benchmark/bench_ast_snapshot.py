@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Measures the extraction of `if` blocks from a translation unit with a conflict in every 20th function:
+walking `Cursor`s through the bindings (`PrunedTraversal.extract`) versus one `AstSnapshot` visitor pass,
+both pruned the same way.
+
+usage: bench_ast_snapshot.py [functions]      (default: 2000)
+"""
+import sys
+import time
+from io import StringIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from clang.cindex import CursorKind
+
+from merge.ast_snapshot import AstSnapshot
+from merge.ast_traversal import PrunedTraversal
+from merge.block import Block
+from merge.choice import Choice
+from merge.conflict_index import ConflictIndex
+from merge.external_parser_setup import ExternalParserSetup
+from merge.file_merge import FileMerge
+import merge.cursor_utils
+
+
+FUNCTION = ("int f%d(int a) {\n"
+            "    if (a > 0) {\n"
+            "        a -= 1;\n"
+            "    } else if (a < -5)\n"
+            "        a += 1;\n"
+            "    return a;\n"
+            "}\n")
+
+CONFLICTED_FUNCTION = ("int f%d(int a) {\n"
+                       "    if (a > 0) {\n"
+                       "<<<<<<< ours\n"
+                       "        a -= 1;\n"
+                       "=======\n"
+                       "        a -= 2;\n"
+                       ">>>>>>> theirs\n"
+                       "    }\n"
+                       "    return a;\n"
+                       "}\n")
+
+
+if __name__ == "__main__":
+    ExternalParserSetup.setup()
+
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    text = "".join((CONFLICTED_FUNCTION if i % 20 == 0 else FUNCTION) % i for i in range(functions))
+    file_merge = FileMerge.parse(Path("generated.c"), StringIO(text))
+    ast = file_merge.abstract_syntax_tree()
+    index = ConflictIndex(file_merge.conflicts, Choice.left)
+
+    start = time.perf_counter()
+    statements = PrunedTraversal(ast.spelling, index).extract(ast.cursor, [CursorKind.IF_STMT])
+    cursor_blocks = [block for stmt in statements for block in Block.structure_of_IF(stmt)]
+    cursors = time.perf_counter() - start
+
+    start = time.perf_counter()
+    snapshot = AstSnapshot.build(ast, PrunedTraversal(ast.spelling, index))
+    snapshot_blocks = [block for i in snapshot.find(CursorKind.IF_STMT) for block in Block.structure_of_if_node(snapshot, i)]
+    snapshots = time.perf_counter() - start
+
+    assert len(cursor_blocks) == len(snapshot_blocks)
+    print("%d functions, %d conflicts, %d nodes: cursors %.3f s, snapshot %.3f s" %
+          (functions, len(file_merge.conflicts), len(snapshot), cursors, snapshots))
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Compares `Diff3` (used by `FileMerge.parse_versions`) with `git merge-file --diff3`.
+
+usage: bench_diff3.py [lines ...]      (default: 10000 100000 500000)
+"""
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from merge.diff3 import Diff3
+
+
+def generate(lines: int, seed: int = 0) -> (str, str, str):
+    random.seed(seed)
+    base = ["    value_%d = compute(%d, %d);\n" % (i, i % 97, i % 13) for i in range(lines)]
+    left = list(base)
+    right = list(base)
+
+    for i in range(0, lines, 50):
+        side = random.choice([left, right, None])
+        if side is None:
+            left[i] = "    value_%d = left(%d);\n" % (i, i)
+            right[i] = "    value_%d = right(%d);\n" % (i, i)
+        else:
+            side[i] = "    value_%d = changed(%d);\n" % (i, i)
+
+    return "".join(base), "".join(left), "".join(right)
+
+
+def bench(lines: int):
+    base, left, right = generate(lines)
+
+    start = time.perf_counter()
+    _, conflicts = Diff3(base, left, right).merge()
+    native = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [Path(tmp) / name for name in ["left", "base", "right"]]
+        for path, text in zip(paths, [left, base, right]):
+            path.write_text(text)
+
+        start = time.perf_counter()
+        subprocess.run(["git", "merge-file", "-p", "--diff3"] + [str(path) for path in paths],
+                       stdout=subprocess.DEVNULL)
+        git = time.perf_counter() - start
+
+    print("%8d lines  %6d conflicts  Diff3 %8.3f s  git merge-file %8.3f s" % (lines, len(conflicts), native, git))
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 500000]
+    for size in sizes:
+        bench(size)
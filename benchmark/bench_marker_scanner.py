@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Measures how `FileMerge.parse` scales with the size of a conflicted file.
+
+usage: bench_marker_scanner.py [size_mb ...]      (default: 1 10 100)
+
+The time per megabyte should stay flat as the file grows.
+"""
+import sys
+import time
+from io import StringIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from merge.file_merge import FileMerge
+
+
+CHUNK = ("    for (int i = 0; i < n; ++i) {\n"
+         "        total += values[i] * weights[i];\n"
+         "    }\n") * 20
+
+CONFLICT = ("<<<<<<< HEAD\n"
+            "    int n = 0;\n"
+            "    n += 1;\n"
+            "|||||||\n"
+            "    int n;\n"
+            "=======\n"
+            "    int x = 0;\n"
+            "    x -= 3;\n"
+            ">>>>>>> master\n")
+
+
+def generate(size: int) -> str:
+    block = CHUNK + CONFLICT
+    return block * (size // len(block) + 1)
+
+
+def bench(size_mb: int):
+    text = generate(size_mb * 1024 * 1024)
+
+    start = time.perf_counter()
+    file_merge = FileMerge.parse(Path("generated.cpp"), StringIO(text))
+    elapsed = time.perf_counter() - start
+
+    print("%6d MB  %8d conflicts  %8.3f s  %8.4f s/MB" %
+          (size_mb, len(file_merge.conflicts), elapsed, elapsed / size_mb))
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1, 10, 100]
+    for size in sizes:
+        bench(size)
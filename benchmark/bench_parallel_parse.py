@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Measures parsing of the left, right and base versions of a large file:
+one after another with `abstract_syntax_tree` versus concurrently with `FileMerge.syntax_trees_async`.
+Ideally the concurrent time is close to a single parse, given enough cores.
+
+usage: bench_parallel_parse.py [functions]      (default: 4000)
+"""
+import os
+import sys
+import time
+from io import StringIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from merge.ast_cache import AstCache
+from merge.choice import Choice
+from merge.external_parser_setup import ExternalParserSetup
+from merge.file_merge import FileMerge
+
+
+FUNCTION = ("int f%d(int a) {\n"
+            "    if (a > 0) {\n"
+            "<<<<<<< ours\n"
+            "        a -= 1;\n"
+            "||||||| base\n"
+            "        a -= 0;\n"
+            "=======\n"
+            "        a -= 2;\n"
+            ">>>>>>> theirs\n"
+            "    }\n"
+            "    return a;\n"
+            "}\n")
+
+
+def generate(functions: int) -> FileMerge:
+    return FileMerge.parse(Path("generated.c"), StringIO("".join(FUNCTION % i for i in range(functions))))
+
+
+if __name__ == "__main__":
+    ExternalParserSetup.setup()
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+
+    file_merge = generate(functions)
+    start = time.perf_counter()
+    file_merge.abstract_syntax_tree(Choice.left)
+    single = time.perf_counter() - start
+    file_merge.abstract_syntax_tree(Choice.right)
+    file_merge.base_syntax_tree()
+    serial = time.perf_counter() - start
+
+    AstCache.shared().clear()
+    file_merge = generate(functions)
+    start = time.perf_counter()
+    futures = file_merge.syntax_trees_async()
+    for future in futures.values():
+        future.result()
+    concurrent = time.perf_counter() - start
+
+    print("%d functions, %d versions, %d cores: single parse %.3f s, serial %.3f s, concurrent %.3f s" %
+          (functions, len(futures), os.cpu_count(), single, serial, concurrent))
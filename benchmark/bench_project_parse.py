@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Measures how `ProjectMerge.parse` scales with the number of worker processes.
+
+usage: bench_project_parse.py [files] [conflicted_files]      (default: 2000 200)
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from merge.project_merge import ProjectMerge
+from bench_marker_scanner import CHUNK, CONFLICT
+
+
+def generate(root: Path, files: int, conflicted: int):
+    for i in range(files):
+        path = root / ("module%d" % (i % 20)) / ("sub%d" % (i % 7)) / ("file%d.cpp" % i)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        size = 1 + i % 50  # files of different size to exercise the largest-first scheduling
+        if i % (files // conflicted) == 0:
+            path.write_text((CHUNK + CONFLICT) * size, encoding="utf-8")
+        else:
+            path.write_text(CHUNK * size, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    conflicted = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "project"
+        generate(root, files, conflicted)
+
+        for workers in [1, 2, 4, 8]:
+            start = time.perf_counter()
+            merge = ProjectMerge.parse(root, Path(tmp) / "~project", workers=workers)
+            elapsed = time.perf_counter() - start
+
+            conflicts = sum(len(file.conflicts) for file in merge.files)
+            print("%d worker(s)  %6d files  %8d conflicts  %8.3f s" % (workers, len(merge.files), conflicts, elapsed))
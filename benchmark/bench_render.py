@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Measures `FileMerge.result` of a large file: the first rendering and a rendering after one choice change.
+
+usage: bench_render.py [size_mb]      (default: 50)
+"""
+import sys
+import time
+from io import StringIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from merge.choice import Choice
+from merge.file_merge import FileMerge
+from bench_marker_scanner import generate
+
+
+if __name__ == "__main__":
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    file_merge = FileMerge.parse(Path("generated.cpp"), StringIO(generate(size_mb * 1024 * 1024)))
+
+    start = time.perf_counter()
+    file_merge.result()
+    first = time.perf_counter() - start
+
+    start = time.perf_counter()
+    file_merge.result()
+    unchanged = time.perf_counter() - start
+
+    file_merge.conflicts[len(file_merge.conflicts) // 2].select(Choice.left)
+    start = time.perf_counter()
+    file_merge.result()
+    changed = time.perf_counter() - start
+
+    print("%d MB, %d conflicts: first %.3f s, unchanged %.4f s, after one choice %.4f s" %
+          (size_mb, len(file_merge.conflicts), first, unchanged, changed))
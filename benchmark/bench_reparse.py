@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Measures `FileMerge.abstract_syntax_tree` of a C++ file including standard headers:
+the first parse and the analysis after one choice change, which reparses the previous translation unit.
+
+usage: bench_reparse.py [functions]      (default: 2000)
+"""
+import sys
+import time
+from io import StringIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from merge.ast_cache import AstCache
+from merge.choice import Choice
+from merge.external_parser_setup import ExternalParserSetup
+from merge.file_merge import FileMerge
+
+
+HEADER = "#include <vector>\n#include <string>\n#include <map>\n#include <algorithm>\n\n"
+
+FUNCTION = ("int f%d(std::vector<int> &v) {\n"
+            "<<<<<<< ours\n"
+            "    std::sort(v.begin(), v.end());\n"
+            "=======\n"
+            "    std::reverse(v.begin(), v.end());\n"
+            ">>>>>>> theirs\n"
+            "    return v.size();\n"
+            "}\n\n")
+
+
+if __name__ == "__main__":
+    ExternalParserSetup.setup()
+
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    text = HEADER + "".join(FUNCTION % i for i in range(functions))
+    file_merge = FileMerge.parse(Path("generated.cpp"), StringIO(text))
+    file_merge.select_all(Choice.left)
+
+    start = time.perf_counter()
+    file_merge.abstract_syntax_tree(None)
+    first = time.perf_counter() - start
+
+    times = []
+    for conflict in file_merge.conflicts[:5]:
+        conflict.select(Choice.right)
+        start = time.perf_counter()
+        file_merge.abstract_syntax_tree(None)
+        times.append(time.perf_counter() - start)
+
+    print("%d functions: first parse %.3f s, after one choice %.3f s (min of %d)" %
+          (functions, first, min(times), len(times)))
+    print(AstCache.shared())
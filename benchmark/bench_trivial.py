@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Measures `TrivialResolver.run` over many conflicts, a quarter of each kind: identical sides,
+sides differing in whitespace, one side unchanged from the base and real conflicts.
+
+usage: bench_trivial.py [conflicts]      (default: 100000)
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from merge.conflict import Conflict3Way
+from merge.file_merge import FileMerge
+from merge.file_bit import FileBit
+from merge.trivial import TrivialResolver
+
+
+def generate(count: int) -> [Conflict3Way]:
+    conflicts = []
+    for i in range(count):
+        body = "    int value_%d = compute(%d, items[%d]);\n    total += value_%d;\n" % (i, i, i, i)
+        other = body.replace("total +=", "total -=")
+        left, base, right = [(body, other, body), (body, other, body.replace("\n", "\r\n")),
+                             (other, other, body), (body, "", other)][i % 4]
+        conflicts.append(Conflict3Way(i, i, i, left, base, right, "<<<<<<<\n", "|||||||\n", "=======\n", ">>>>>>>\n"))
+    return conflicts
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    conflicts = generate(count)
+    file_merge = FileMerge(Path("generated.cpp"), [FileBit(1, "")] * (count + 1), conflicts)
+
+    resolver = TrivialResolver()
+    start = time.perf_counter()
+    resolver.run([file_merge])
+    seconds = time.perf_counter() - start
+
+    print("%s in %.2f s" % (resolver, seconds))
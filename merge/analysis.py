@@ -0,0 +1,77 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from .file_merge import FileMerge, PassthroughFileMerge, LazyFileMerge
+from .preamble import PreambleCache
+
+
+class ProjectAnalysis:
+    """
+    Refactors the syntax blocks of all the parsed files of a project, see `FileMerge.refactor_syntax_blocks`.
+
+    With several workers every file is sent to a worker process as its file bits and conflicts,
+    parsed and analysed there. Only the list of adjustments comes back and is replayed on the file in this process,
+    libclang objects never cross process boundaries. The largest files are analysed first.
+    Lazy files are skipped, they are refactored when loaded.
+    """
+    def __init__(self, workers: int = 1):
+        """
+        :ivar timings: seconds spent on parsing and analysing every file, measured where it was done
+        """
+        self.workers = workers
+        self.timings = {}  # {Path: float}
+
+    def __str__(self):
+        slowest = sorted(self.timings.items(), key=lambda item: item[1], reverse=True)[:5]
+        return "Analysis: %d files, %.2f s in total, the slowest: %s" % \
+               (len(self.timings), sum(self.timings.values()),
+                ", ".join("%s %.2f s" % (path.name, seconds) for path, seconds in slowest))
+
+    @staticmethod
+    def needs_analysis(file: FileMerge) -> bool:
+        return not isinstance(file, (PassthroughFileMerge, LazyFileMerge)) \
+               and FileMerge.can_parse(file.path) and len(file.conflicts) > 0
+
+    def run(self, files: [FileMerge]):
+        files = [file for file in files if ProjectAnalysis.needs_analysis(file)]
+
+        if self.workers <= 1 or len(files) <= 1:
+            for file in files:
+                start = time.perf_counter()
+                file.refactor_syntax_blocks()
+                self.timings[file.path] = time.perf_counter() - start
+            return
+
+        files.sort(key=lambda file: sum(len(file_bit.text) for file_bit in file.file_bits), reverse=True)
+        preambles = FileMerge.preamble_cache.folder if FileMerge.preamble_cache else None
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=ProjectAnalysis._init_worker,
+                                 initargs=(preambles,)) as executor:
+            futures = {executor.submit(ProjectAnalysis._analyse, file.path, file.file_bits, file.conflicts,
+                                       file.parse_args): file
+                       for file in files}
+
+            for future in as_completed(futures):
+                file = futures[future]
+                adjustments, seconds = future.result()
+                file.apply_adjustments(adjustments)
+                self.timings[file.path] = seconds
+
+    @staticmethod
+    def _init_worker(preambles: Path):
+        from .external_parser_setup import ExternalParserSetup
+        ExternalParserSetup.setup()
+
+        if preambles:
+            FileMerge.preamble_cache = PreambleCache(preambles)
+
+    @staticmethod
+    def _analyse(path: Path, file_bits, conflicts, parse_args: [str]) -> ([(int, int, int)], float):
+        start = time.perf_counter()
+
+        file = FileMerge(path, file_bits, conflicts)
+        file.parse_args = parse_args
+        adjustments = file.refactor_syntax_blocks()
+
+        return adjustments, time.perf_counter() - start
@@ -0,0 +1,145 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from clang.cindex import TranslationUnit, Index, TranslationUnitLoadError
+
+
+class AstCache:
+    """
+    Translation units shared by the whole process, all parsed with a single `Index`.
+
+    Units are keyed by a hash of the parsed text, the file name and the parse arguments,
+    so equal versions of a file (e.g. the left one after all the conflicts were resolved as left)
+    are parsed once. A unit of an older version of a file can be reparsed in place,
+    libclang then reuses its precompiled preamble.
+    The least recently used units are evicted when there are more than `max_entries` of them
+    or their approximate footprint exceeds `max_bytes`.
+    """
+    max_entries = 64
+    max_bytes = 512 * 1024 * 1024
+    bytes_per_char = 32  # rough memory footprint of a translation unit per character of its source
+    parse_options = TranslationUnit.PARSE_PRECOMPILED_PREAMBLE | TranslationUnit.PARSE_CACHE_COMPLETION_RESULTS
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_entries: int = max_entries, max_bytes: int = max_bytes):
+        """
+        :ivar hits:      number of lookups which found a parsed unit
+        :ivar misses:    number of lookups which parsed the text
+        :ivar reparses:  number of misses served by reparsing an older unit
+        :ivar evictions: number of units dropped from the cache
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.reparses = 0
+        self.evictions = 0
+
+        self._index = None
+        self._entries = OrderedDict()  # {key: (TranslationUnit, size)}
+        self._size = 0
+        self._parsing = {}  # {key: threading.Event}, set when the parse of `key` is over
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def shared():  # -> AstCache
+        with AstCache._shared_lock:
+            if AstCache._shared is None:
+                AstCache._shared = AstCache()
+            return AstCache._shared
+
+    @property
+    def index(self) -> Index:
+        """ Created on the first parse, after `ExternalParserSetup` had a chance to locate libclang """
+        with self._lock:
+            if self._index is None:
+                self._index = Index.create()
+            return self._index
+
+    @staticmethod
+    def key(filename: str, text: str, args: [str] = ()) -> str:
+        digest = hashlib.sha1()
+        digest.update(filename.encode("utf-8", "surrogateescape"))
+        for arg in args:
+            digest.update(b'\0' + arg.encode("utf-8", "surrogateescape"))
+        digest.update(b'\0\0' + text.encode("utf-8", "surrogateescape"))
+        return digest.hexdigest()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __str__(self):
+        return "AST cache: %d units, ~%d MB, %d hits, %d misses (%d reparses), %d evictions" % \
+               (len(self._entries), self._size // (1024 * 1024), self.hits, self.misses, self.reparses, self.evictions)
+
+    def parse(self, filename: str, text: str, args: [str] = (), previous: TranslationUnit = None) -> TranslationUnit:
+        """
+        Translation unit of `text` saved as `filename` or `None` if it could not be parsed
+
+        :param previous: unit of another version of `filename` parsed with the same `args`.
+                         On a miss it is reparsed with `text` and returned instead of parsing from scratch,
+                         so it must not be used for the old version anymore
+        """
+        key = AstCache.key(filename, text, args)
+
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+
+                parsing = self._parsing.get(key)
+                if parsing is None:
+                    self._parsing[key] = threading.Event()
+                    self.misses += 1
+                    break
+
+            parsing.wait()  # the same text is being parsed by another thread
+
+        translation_unit = None
+        try:
+            if previous is not None:
+                self._discard(previous)
+                previous.reparse(unsaved_files=[(filename, text)], options=AstCache.parse_options)
+                translation_unit = previous
+                self.reparses += 1
+            else:
+                translation_unit = self.index.parse(filename, args=list(args), unsaved_files=[(filename, text)],
+                                                    options=AstCache.parse_options)
+        except TranslationUnitLoadError:
+            pass
+        finally:
+            with self._lock:
+                if translation_unit:
+                    self._put(key, translation_unit, len(text) * AstCache.bytes_per_char)
+                self._parsing.pop(key).set()
+
+        return translation_unit
+
+    def _put(self, key: str, translation_unit: TranslationUnit, size: int):
+        self._entries[key] = (translation_unit, size)
+        self._size += size
+
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._size > self.max_bytes):
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+            self.evictions += 1
+
+    def _discard(self, translation_unit: TranslationUnit):
+        """ Removes `translation_unit` from the cache as it is going to change """
+        with self._lock:
+            for key, (unit, size) in self._entries.items():
+                if unit is translation_unit:
+                    del self._entries[key]
+                    self._size -= size
+                    break
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
@@ -0,0 +1,139 @@
+from array import array
+from ctypes import CDLL, byref, cast, c_uint, c_void_p
+
+from clang.cindex import TranslationUnit, CursorKind, File, SourceLocation, conf, callbacks, c_object_p
+
+from .ast_traversal import PrunedTraversal
+
+
+class AstSnapshot:
+    """
+    Cursors of a translation unit flattened into columns by a single `clang_visitChildren` pass.
+
+    Node `i` has the kind `kinds[i]` (a `CursorKind` id), the parent `parents[i]` (`-1` for top-level cursors),
+    its extent spans the lines `starts[i]..ends[i]` of the file `file_names[files[i]]` (`0` is the main file).
+    The children of a node are linked by `first_children` and `next_siblings` (`-1` for none).
+    Nodes are numbered in pre-order.
+
+    Pruned cursors (see `PrunedTraversal`) are kept without their subtrees, with `expanded[i] == 0`.
+    Nothing in the snapshot refers to libclang once it is built.
+    """
+    visit_continue = 1
+    visit_recurse = 2
+
+    def __init__(self):
+        self.kinds = array('i')
+        self.parents = array('i')
+        self.starts = array('i')
+        self.ends = array('i')
+        self.files = array('i')
+        self.first_children = array('i')
+        self.next_siblings = array('i')
+        self.expanded = bytearray()
+        self.file_names = []
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def children(self, i: int) -> [int]:
+        result = []
+        child = self.first_children[i]
+        while child != -1:
+            result.append(child)
+            child = self.next_siblings[child]
+        return result
+
+    def is_compound(self, i: int) -> bool:
+        return self.kinds[i] == CursorKind.COMPOUND_STMT.value
+
+    def find(self, kind: CursorKind) -> [int]:
+        """ Expanded nodes of `kind` in pre-order """
+        kind_id = kind.value
+        kinds = self.kinds
+        expanded = self.expanded
+        return [i for i in range(len(kinds)) if kinds[i] == kind_id and expanded[i]]
+
+    _location = None
+
+    @staticmethod
+    def _location_function():
+        """
+        `clang_getInstantiationLocation` writing the file to a plain `c_void_p` and accepting `NULL` outputs,
+        which spares a cast and two conversions per call compared to the prototype of the bindings
+        """
+        if AstSnapshot._location is None:
+            location = CDLL(conf.lib._name).clang_getInstantiationLocation
+            location.argtypes = [SourceLocation, c_void_p, c_void_p, c_void_p, c_void_p]
+            location.restype = None
+            AstSnapshot._location = location
+        return AstSnapshot._location
+
+    @staticmethod
+    def build(translation_unit: TranslationUnit, traversal: PrunedTraversal = None):  # -> AstSnapshot
+        """ Visits the translation unit once, `traversal` decides what is pruned and counts it """
+        lib = conf.lib
+        traversal = traversal or PrunedTraversal(translation_unit.spelling)
+
+        snapshot = AstSnapshot()
+        kinds, parents, starts, ends, files = \
+            snapshot.kinds, snapshot.parents, snapshot.starts, snapshot.ends, snapshot.files
+        first_children, next_siblings, expanded = snapshot.first_children, snapshot.next_siblings, snapshot.expanded
+
+        main_file = lib.clang_getFile(translation_unit, traversal.filename)
+        file_ids = {cast(main_file, c_void_p).value: 0}  # {address of a `CXFile`: file id}
+        snapshot.file_names.append(traversal.filename)
+
+        root = translation_unit.cursor
+        nodes = {bytes(root): -1}  # {raw cursor: node} of the expanded cursors, libclang passes them back as parents
+        last_children = {}         # {node: its last child seen so far}
+        pruned = [0]
+
+        get_extent, get_start, get_end = lib.clang_getCursorExtent, lib.clang_getRangeStart, lib.clang_getRangeEnd
+        get_location = AstSnapshot._location_function()
+        file, line = c_void_p(), c_uint()
+        location_out = (byref(file), byref(line), None, None)
+
+        def visit(cursor, parent, _):
+            parent_node = nodes[bytes(parent)]
+
+            extent = get_extent(cursor)
+            get_location(get_end(extent), *location_out)
+            end = line.value
+            get_location(get_start(extent), *location_out)
+            start = line.value
+
+            address = file.value
+            file_id = file_ids.get(address)
+            if file_id is None:
+                file_id = file_ids[address] = len(snapshot.file_names)
+                snapshot.file_names.append(File(cast(file, c_object_p)).name if address else None)
+
+            node = len(kinds)
+            kinds.append(cursor._kind_id)
+            parents.append(parent_node)
+            starts.append(start)
+            ends.append(end)
+            files.append(file_id)
+            first_children.append(-1)
+            next_siblings.append(-1)
+
+            previous = last_children.get(parent_node)
+            if previous is not None:
+                next_siblings[previous] = node
+            elif parent_node != -1:
+                first_children[parent_node] = node
+            last_children[parent_node] = node
+
+            if file_id != 0 or traversal.is_pruned_lines(start, end):
+                expanded.append(0)
+                pruned[0] += 1
+                return AstSnapshot.visit_continue
+
+            expanded.append(1)
+            nodes[bytes(cursor)] = node
+            return AstSnapshot.visit_recurse
+
+        lib.clang_visitChildren(root, callbacks["cursor_visit"](visit), [])
+
+        traversal.count(len(kinds), pruned[0])
+        return snapshot
@@ -0,0 +1,85 @@
+import threading
+
+from clang.cindex import Cursor, CursorKind
+
+from .conflict_index import ConflictIndex
+
+
+class PrunedTraversal:
+    """
+    Pre-order walk over the cursors of a translation unit which skips whole subtrees:
+    the ones not in the main file (e.g. declarations of included headers)
+    and the ones whose lines do not overlap any conflict.
+
+    A cursor which overlaps a conflict is kept together with all its ancestors, whose extents contain it,
+    so every block which may intersect a conflict is still found.
+    The same rules prune `AstSnapshot.build`.
+    """
+    _totals_lock = threading.Lock()
+    visited_total = 0
+    pruned_total = 0
+
+    def __init__(self, filename: str, conflicts: ConflictIndex = None):
+        """
+        :ivar visited: cursors looked at, including the pruned ones
+        :ivar pruned:  cursors skipped together with their subtrees
+        """
+        self.filename = filename
+        self.conflicts = conflicts
+        self.visited = 0
+        self.pruned = 0
+
+    def __str__(self):
+        return "%d cursors visited, %d subtrees pruned" % (self.visited, self.pruned)
+
+    @staticmethod
+    def summary() -> str:
+        return "AST traversal: %d cursors visited, %d subtrees pruned" % \
+               (PrunedTraversal.visited_total, PrunedTraversal.pruned_total)
+
+    def is_pruned(self, cursor: Cursor) -> bool:
+        extent = cursor.extent
+        start = extent.start
+        if start.file is None or start.file.name != self.filename:
+            return True
+
+        return self.is_pruned_lines(start.line, extent.end.line)
+
+    def is_pruned_lines(self, start: int, end: int) -> bool:
+        """ Whether the main file lines `start..end` are far from the conflicts """
+        return self.conflicts is not None and not self.conflicts.overlaps(start, end)
+
+    def count(self, visited: int, pruned: int):
+        self.visited += visited
+        self.pruned += pruned
+        with PrunedTraversal._totals_lock:
+            PrunedTraversal.visited_total += visited
+            PrunedTraversal.pruned_total += pruned
+
+    def extract(self, root: Cursor, kind_list: [CursorKind]) -> [Cursor]:
+        """ Cursors of `kind_list` under `root` which were not pruned, in pre-order """
+        nodes = []
+        visited = pruned = 0
+
+        stack = list(root.get_children())
+        stack.reverse()
+        while stack:
+            cursor = stack.pop()
+            visited += 1
+
+            if self.is_pruned(cursor):
+                pruned += 1
+                continue
+
+            try:
+                if cursor.kind in kind_list:
+                    nodes.append(cursor)
+            except ValueError:  # a kind unknown to the bindings
+                pass
+
+            children = list(cursor.get_children())
+            children.reverse()
+            stack.extend(children)
+
+        self.count(visited, pruned)
+        return nodes
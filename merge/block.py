@@ -17,26 +17,39 @@ class Block:
     def structure_of_IF(cursor: Cursor):  # -> [Block]
         assert cursor.kind == CursorKind.IF_STMT
 
-        children = list(cursor.get_children())
-        ch1 = children[1]
+        children = [(ch.start, ch.end, ch.is_compound) for ch in cursor.get_children()]
+        return Block._structure_of_if(cursor.start, children)
+
+    @staticmethod
+    def structure_of_if_node(snapshot, i: int):  # -> [Block]
+        """ The same as `structure_of_IF` for the node `i` of an `AstSnapshot` """
+        assert snapshot.kinds[i] == CursorKind.IF_STMT.value
+
+        children = [(snapshot.starts[ch], snapshot.ends[ch], snapshot.is_compound(ch)) for ch in snapshot.children(i)]
+        return Block._structure_of_if(snapshot.starts[i], children)
+
+    @staticmethod
+    def _structure_of_if(start: int, children: [(int, int, bool)]):  # -> [Block]
+        """ :param children: `(start, end, is_compound)` of the children of the `if` statement """
+        ch1_start, ch1_end, ch1_is_compound = children[1]
 
         if len(children) > 2:
-            ch2 = children[2]
+            ch2_start, ch2_end, ch2_is_compound = children[2]
 
-            if ch1.is_compound and ch2.is_compound:         # if {} else {} ;
-                return [Block.from_cursor(ch1), Block.from_cursor(ch2),
-                        Block(cursor.start, ch1.end), Block(cursor.start, ch2.end)]
+            if ch1_is_compound and ch2_is_compound:         # if {} else {} ;
+                return [Block(ch1_start, ch1_end), Block(ch2_start, ch2_end),
+                        Block(start, ch1_end), Block(start, ch2_end)]
 
-            elif not ch1.is_compound and ch2.is_compound:   # if ... else {} ;
-                return [Block.from_cursor(ch2), Block(cursor.start, ch1.end), Block(cursor.start, ch2.end)]
+            elif not ch1_is_compound and ch2_is_compound:   # if ... else {} ;
+                return [Block(ch2_start, ch2_end), Block(start, ch1_end), Block(start, ch2_end)]
 
-            elif ch1.is_compound and not ch2.is_compound:   # if {} else ... ;
-                return [Block.from_cursor(ch1), Block(cursor.start, ch1.end), Block(cursor.start, ch2.end)]
+            elif ch1_is_compound and not ch2_is_compound:   # if {} else ... ;
+                return [Block(ch1_start, ch1_end), Block(start, ch1_end), Block(start, ch2_end)]
 
             else:                                           # if ... else ... ;
-                return [Block(cursor.start, ch1.end), Block(cursor.start, ch2.end)]
+                return [Block(start, ch1_end), Block(start, ch2_end)]
         else:
-            if ch1.is_compound:   # if {} ;
-                return [Block(ch1.start, ch1.end), Block(cursor.start, ch1.end)]
+            if ch1_is_compound:   # if {} ;
+                return [Block(ch1_start, ch1_end), Block(start, ch1_end)]
             else:                 # if ... ;
-                return [Block(cursor.start, ch1.end)]
+                return [Block(start, ch1_end)]
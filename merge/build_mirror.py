@@ -0,0 +1,222 @@
+import errno
+import hashlib
+import os
+import shutil
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # not a POSIX system
+    fcntl = None
+
+from .file_merge import FileMerge, PassthroughFileMerge, LazyFileMerge
+
+
+class FileCloner:
+    """
+    Places copies of files without reading them into Python: by a reflink (`FICLONE`),
+    `os.copy_file_range` or, as the last resort, a plain copy. Never by a hard link: a build writing
+    a file of the copy in place would write into the source.
+
+    What works is probed once per pair of source and target file systems: a method failing with
+    "not supported" (or "cross-device") is never tried for the pair again.
+    Copies get the modification time of their source.
+    """
+    ficlone = 0x40049409  # `_IOW(0x94, 9, int)` from `linux/fs.h`
+    methods = ["reflink", "copy_range", "copy"]
+    unsupported = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EPERM,
+                   errno.EBADF}
+
+    def __init__(self):
+        """
+        :ivar used: number of files placed by every method
+        """
+        self.used = {method: 0 for method in FileCloner.methods}
+        self._first_methods = {}  # {(source device, target device): index of the first method to try}
+
+    def place(self, source: Path, target: Path, source_stat: os.stat_result = None):
+        """ Atomically replaces `target` (if any) with a copy of `source` """
+        source_stat = source_stat or source.stat()
+        target.parent.mkdir(parents=True, exist_ok=True)
+        devices = (source_stat.st_dev, target.parent.stat().st_dev)
+
+        method = self._first_methods.get(devices, 0)
+        writing = target.with_name(".%s.%d.tmp" % (target.name, os.getpid()))
+        if writing.exists():  # left by an interrupted run
+            writing.unlink()
+
+        while True:
+            try:
+                getattr(self, "_" + FileCloner.methods[method])(str(source), str(writing), source_stat)
+                break
+            except OSError as error:
+                if writing.exists():
+                    writing.unlink()
+                if error.errno not in FileCloner.unsupported or method == len(FileCloner.methods) - 1:
+                    raise
+                method += 1
+                self._first_methods[devices] = method
+
+        os.replace(str(writing), str(target))
+        self.used[FileCloner.methods[method]] += 1
+
+    @staticmethod
+    def _reflink(source: str, target: str, source_stat: os.stat_result):
+        if fcntl is None:
+            raise OSError(errno.ENOSYS, "reflinks are not supported")
+
+        with open(source, 'rb') as source_stream, open(target, 'wb') as target_stream:
+            fcntl.ioctl(target_stream.fileno(), FileCloner.ficlone, source_stream.fileno())
+        FileCloner._copy_times(target, source_stat)
+
+    @staticmethod
+    def _copy_range(source: str, target: str, source_stat: os.stat_result):
+        if not hasattr(os, "copy_file_range"):
+            raise OSError(errno.ENOSYS, "copy_file_range is not supported")
+
+        with open(source, 'rb') as source_stream, open(target, 'wb') as target_stream:
+            left = source_stat.st_size
+            while left > 0:
+                copied = os.copy_file_range(source_stream.fileno(), target_stream.fileno(), left)
+                if copied == 0:
+                    break
+                left -= copied
+        FileCloner._copy_times(target, source_stat)
+
+    @staticmethod
+    def _copy(source: str, target: str, source_stat: os.stat_result):
+        shutil.copyfile(source, target)
+        FileCloner._copy_times(target, source_stat)
+
+    @staticmethod
+    def _copy_times(target: str, source_stat: os.stat_result):
+        os.chmod(target, source_stat.st_mode & 0o7777)
+        os.utime(target, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+
+
+class BuildMirror:
+    """
+    A folder kept equal to the results of the files of a project merge.
+
+    Only the files whose content changed since the last `sync` are written, the others keep their modification
+    times, so `make` in the folder rebuilds only what depends on the changed files.
+    The content of every written file is remembered as a hash; a file left by a previous run is hashed
+    from the disk once. Files are replaced atomically, nothing is ever removed from the folder.
+
+    Passthrough files are never read: they are placed by `FileCloner` when their size or modification time
+    differs from the ones of the copy in the folder. Lazy files which are not loaded are not loaded for that,
+    they are placed the same way or rendered from their markers, see `LazyFileMerge.marker_result`.
+    """
+    def __init__(self, root: Path, project_path: Path):
+        """
+        :ivar written:   number of files written by the last `sync`
+        :ivar unchanged: number of files left alone by the last `sync`
+        """
+        self.root = root
+        self.project_path = project_path
+        self.written = 0
+        self.unchanged = 0
+
+        self._hashes = {}  # {relative path: digest of the content in the folder}
+        self._texts = {}   # {relative path: the last result written}, an identical object needs no hashing
+        self._stamps = {}  # {relative path: (size, modification time)} of the passthrough files placed
+        self.cloner = FileCloner()
+
+    def __str__(self):
+        return "%d files written, %d unchanged in %s" % (self.written, self.unchanged, self.root)
+
+    @staticmethod
+    def digest(data: bytes) -> bytes:
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def sync(self, files: [FileMerge]) -> int:
+        """ Writes the changed results of `files`, returns the number of the written ones """
+        self.written = 0
+        self.unchanged = 0
+
+        for file in files:
+            relative = file.path.relative_to(self.project_path)
+
+            if isinstance(file, LazyFileMerge) and not file.is_loaded():
+                text = file.marker_result()
+            elif isinstance(file, PassthroughFileMerge):
+                text = None
+            else:
+                text = file.result()
+
+            if text is None:
+                self._hashes.pop(relative, None)  # the file in the folder is not a written result anymore
+                self._texts.pop(relative, None)
+                if self._place(relative, file.path):
+                    self.written += 1
+                else:
+                    self.unchanged += 1
+                continue
+
+            self._stamps.pop(relative, None)
+
+            if self._texts.get(relative) is text:
+                self.unchanged += 1
+                continue
+
+            data = text.encode("utf-8")
+            digest = BuildMirror.digest(data)
+            target = self.root / relative
+
+            if relative not in self._hashes:
+                self._hashes[relative] = BuildMirror._digest_of(target)
+
+            if self._hashes[relative] == digest:
+                self.unchanged += 1
+            else:
+                BuildMirror._write(target, data)
+                self._hashes[relative] = digest
+                self.written += 1
+
+            self._texts[relative] = text
+
+        return self.written
+
+    def _place(self, relative: Path, source: Path) -> bool:
+        """ Places a copy of an unchanged file unless it is in the folder already, returns whether it was placed """
+        source_stat = source.stat()
+        stamp = (source_stat.st_size, source_stat.st_mtime_ns)
+        if self._stamps.get(relative) == stamp:
+            return False
+
+        target = self.root / relative
+        if target == source:  # the results are written to the project itself
+            return False
+
+        try:
+            target_stat = target.stat()
+            # a hard link to the source (e.g. made by an older version) is replaced by a copy
+            if (target_stat.st_dev, target_stat.st_ino) != (source_stat.st_dev, source_stat.st_ino) \
+                    and (target_stat.st_size, target_stat.st_mtime_ns) == stamp:
+                self._stamps[relative] = stamp
+                return False
+        except FileNotFoundError:
+            pass
+
+        self.cloner.place(source, target, source_stat)
+        self._stamps[relative] = stamp
+        return True
+
+    @staticmethod
+    def _digest_of(path: Path):  # -> bytes or None
+        try:
+            return BuildMirror.digest(path.read_bytes())
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            return None
+
+    @staticmethod
+    def _write(target: Path, data: bytes):
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        writing = target.with_name(".%s.%d.tmp" % (target.name, os.getpid()))
+        writing.write_bytes(data)
+        try:
+            shutil.copymode(str(target), str(writing))  # e.g. keeps scripts executable
+        except FileNotFoundError:
+            pass
+        os.replace(writing, target)
@@ -0,0 +1,115 @@
+import os
+import signal
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+
+class BuildRunner:
+    """
+    Runs `make -j<jobs>` in a folder and streams its output line by line while it builds.
+
+    `make` runs in a session of its own, so Ctrl+C reaches only this process: it cancels the build
+    (the whole process group is terminated) and returns to the caller instead of ending the program.
+    `cancel` does the same from another thread.
+    """
+    error_marks = [": error:", ": fatal error:", "] Error "]
+    terminate_timeout = 5.0  # seconds to wait for the build to stop before killing it
+
+    def __init__(self, directory: Path, jobs: int = None, output=None):
+        """
+        :param output: called with every line of the output, printing by default
+        :ivar returncode: exit status of the last build, `None` if it was cancelled
+        :ivar seconds:    wall-clock time of the last build
+        :ivar errors:     the lines of the last build's output which report errors
+        :ivar first_error_seconds: when the first error of the last build was printed, `None` without errors
+        :ivar cancelled:  whether the last build was cancelled
+        """
+        self.directory = directory
+        self.jobs = jobs or BuildRunner.cpu_count()
+        self.output = output or (lambda line: print(line, end='', flush=True))
+
+        self.returncode = None
+        self.seconds = 0.0
+        self.errors = []
+        self.first_error_seconds = None
+        self.cancelled = False
+
+        self._process = None
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        if self.cancelled:
+            return "The build was cancelled after %.1f s" % self.seconds
+        if self.returncode == 0:
+            return "The project has been built with no errors in %.1f s" % self.seconds
+        if self.first_error_seconds is not None:
+            return "The build failed in %.1f s with %d errors, the first one after %.1f s" % \
+                   (self.seconds, len(self.errors), self.first_error_seconds)
+        return "The build failed in %.1f s with status %s" % (self.seconds, self.returncode)
+
+    @staticmethod
+    def cpu_count() -> int:
+        """ CPUs this process may run on, which can be less than the ones of the machine """
+        if hasattr(os, "sched_getaffinity"):
+            return max(1, len(os.sched_getaffinity(0)))
+        return os.cpu_count() or 1
+
+    def command(self) -> [str]:
+        return ["make", "-j%d" % self.jobs, "--directory=%s" % self.directory]
+
+    def run(self) -> bool:
+        """ Builds, returns whether the build succeeded. Ctrl+C cancels the build """
+        self.returncode = None
+        self.errors = []
+        self.first_error_seconds = None
+        self.cancelled = False
+
+        start = time.perf_counter()
+        with self._lock:
+            self._process = subprocess.Popen(self.command(), stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                             stdin=subprocess.DEVNULL, start_new_session=True)
+        try:
+            for line in iter(self._process.stdout.readline, b""):
+                line = line.decode("utf-8", "replace")
+                if any(mark in line for mark in BuildRunner.error_marks):
+                    if self.first_error_seconds is None:
+                        self.first_error_seconds = time.perf_counter() - start
+                    self.errors.append(line.rstrip('\n'))
+                self.output(line)
+
+            self._process.wait()
+        except KeyboardInterrupt:
+            self.cancel()
+        finally:
+            self._process.stdout.close()
+            self.seconds = time.perf_counter() - start
+
+        if not self.cancelled:
+            self.returncode = self._process.returncode
+        return self.returncode == 0
+
+    def cancel(self):
+        """ Stops the running build, if any """
+        with self._lock:
+            process = self._process
+            if process is None or process.poll() is not None:
+                return
+            self.cancelled = True
+
+        BuildRunner._signal(process, signal.SIGTERM)
+        try:
+            process.wait(BuildRunner.terminate_timeout)
+        except subprocess.TimeoutExpired:
+            BuildRunner._signal(process, signal.SIGKILL)
+            process.wait()
+
+    @staticmethod
+    def _signal(process: subprocess.Popen, signal_number: int):
+        try:
+            os.killpg(process.pid, signal_number)  # `make` and the compilers it started
+        except (ProcessLookupError, PermissionError):
+            pass
+        except AttributeError:  # not a POSIX system
+            process.kill()
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import pickle
+import shlex
+import tempfile
+from pathlib import Path
+
+
+class CompileDatabase:
+    """
+    Parse arguments of the files of a `compile_commands.json`.
+
+    Arguments are normalized for parsing: the compiler, the source, the output and dependency-file options
+    are dropped, relative paths are made absolute. Options keep their values given as separate arguments.
+    Equal argument lists are stored once.
+    The lookup tables are pickled under the temp folder and reused while the json file does not change.
+    """
+    source_suffixes = [".c", ".cc", ".cpp", ".cxx"]
+    dropped_options = {"-c", "-MD", "-MMD", "-MP", "-M", "-MM"}
+    dropped_options_with_value = {"-o", "-MF", "-MT", "-MQ"}
+    path_options = {"-I", "-isystem", "-iquote", "-idirafter", "-include", "-imacros", "--sysroot",
+                    "-isysroot", "-iprefix", "-include-pch", "-ivfsoverlay", "-resource-dir", "-working-directory"}
+    value_options = {"-x", "-D", "-U", "-target", "-arch", "-Xclang", "-Xpreprocessor", "-Xassembler", "-Xlinker",
+                     "-mllvm", "--param", "-iwithprefix", "-iwithprefixbefore"}  # the next argument is their value
+    version = 2  # of the pickled format
+
+    def __init__(self, files: {str: (str,)}):
+        """
+        :ivar files:       normalized arguments by absolute normalized file path
+        :ivar directories: arguments of a source file of every folder with sources
+        """
+        self.files = files
+        self.directories = {}
+        for file, args in sorted(files.items()):
+            self.directories.setdefault(os.path.dirname(file), args)
+
+    def __len__(self):
+        return len(self.files)
+
+    def args(self, path: Path):  # -> [str] or None
+        """
+        Arguments to parse `path` with. A file which is not in the database (e.g. a header) gets the arguments
+        of the source file with the same name next to it, then of a source in the nearest folder above
+        """
+        file = os.path.normpath(os.path.abspath(str(path)))
+        args = self.files.get(file)
+        if args is not None:
+            return list(args)
+
+        stem = os.path.splitext(file)[0]
+        for suffix in CompileDatabase.source_suffixes:
+            args = self.files.get(stem + suffix)
+            if args is not None:
+                return list(args)
+
+        directory = os.path.dirname(file)
+        while True:
+            args = self.directories.get(directory)
+            if args is not None:
+                return list(args)
+
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                return None
+            directory = parent
+
+    @staticmethod
+    def normalize(arguments: [str], directory: str, file: str = None) -> (str,):
+        """
+        :param file: the source file of the command, relative to `directory` or absolute.
+                     Without it every bare argument with a source suffix is taken for the source
+        """
+        source = os.path.normpath(os.path.join(directory, file)) if file else None
+
+        args = []
+        pending = None  # the option whose value is the next argument
+        for arg in arguments[1:]:
+            if pending in CompileDatabase.dropped_options_with_value:
+                pending = None
+            elif pending in CompileDatabase.path_options:
+                args.append(os.path.normpath(os.path.join(directory, arg)))
+                pending = None
+            elif pending is not None:
+                args.append(arg)
+                pending = None
+            elif arg in CompileDatabase.dropped_options:
+                pass
+            elif arg in CompileDatabase.dropped_options_with_value:
+                pending = arg
+            elif any(arg.startswith(option) and len(arg) > len(option)
+                     for option in CompileDatabase.dropped_options_with_value):
+                pass
+            elif arg in CompileDatabase.path_options or arg in CompileDatabase.value_options:
+                args.append(arg)
+                pending = arg
+            elif not arg.startswith("-"):
+                if not CompileDatabase._is_source(arg, directory, source):
+                    args.append(arg)
+            else:
+                for option in ("-I", "-isystem", "-iquote"):
+                    if arg.startswith(option) and len(arg) > len(option) and arg[len(option)] != "-":
+                        arg = option + os.path.normpath(os.path.join(directory, arg[len(option):]))
+                        break
+                args.append(arg)
+
+        return tuple(args)
+
+    @staticmethod
+    def _is_source(arg: str, directory: str, source: str) -> bool:
+        if source is not None:
+            return os.path.normpath(os.path.join(directory, arg)) == source
+        return os.path.splitext(arg)[1] in CompileDatabase.source_suffixes
+
+    @staticmethod
+    def parse(entries: [dict]):  # -> CompileDatabase
+        files = {}
+        unique = {}  # {args: args}, so equal argument lists are one object
+        for entry in entries:
+            directory = entry.get("directory", "")
+            file = os.path.normpath(os.path.join(directory, entry["file"]))
+            arguments = entry["arguments"] if "arguments" in entry else shlex.split(entry["command"])
+
+            args = CompileDatabase.normalize(arguments, directory, entry["file"])
+            files[file] = unique.setdefault(args, args)
+
+        return CompileDatabase(files)
+
+    @staticmethod
+    def cache_path(path: Path) -> Path:
+        key = hashlib.sha1(os.path.abspath(str(path)).encode("utf-8", "surrogateescape")).hexdigest()
+        return Path(tempfile.gettempdir()) / "merge-compile-commands" / (key + ".pickle")
+
+    @staticmethod
+    def load(path: Path):  # -> CompileDatabase
+        """ Reads `compile_commands.json` at `path`, through the pickled tables of a previous run if they are fresh """
+        stat = path.stat()
+        stamp = (CompileDatabase.version, stat.st_mtime_ns, stat.st_size)
+        cache = CompileDatabase.cache_path(path)
+
+        try:
+            with cache.open('rb') as stream:
+                cached_stamp, files = pickle.load(stream)
+            if cached_stamp == stamp:
+                return CompileDatabase(files)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+            pass
+
+        with path.open('r', encoding="utf-8") as stream:
+            database = CompileDatabase.parse(json.load(stream))
+
+        try:
+            cache.parent.mkdir(parents=True, exist_ok=True)
+            writing = cache.with_suffix(".%d.tmp" % os.getpid())
+            with writing.open('wb') as stream:
+                pickle.dump((stamp, database.files), stream, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(writing, cache)
+        except OSError:
+            pass  # the cache is only an optimization
+
+        return database
@@ -1,4 +1,7 @@
+import sys
+
 from .choice import Choice
+from .line_index import LineIndex
 
 
 class Conflict3Way:
@@ -31,6 +34,10 @@ class Conflict3Way:
         >>>>>>> master             13     sep4
         }                          14
     """
+    __slots__ = ('line_number', 'line_num_left', 'line_num_right',
+                 '_left', '_base', '_right', '_left_lines', '_base_lines', '_right_lines',
+                 'sep1', 'sep2', 'sep3', 'sep4', 'choice', 'version')
+
     def __init__(self, line_number: int, line_num_left: int, line_num_right: int,
                  left: str, base: str, right: str, sep1: str, sep2: str, sep3: str, sep4: str):
         """
@@ -46,14 +53,17 @@ class Conflict3Way:
         :ivar sep2: complete line with the `|||||||` separator
         :ivar sep3: complete line with the `=======` separator
         :ivar sep4: complete line with the `>>>>>>>` separator
+
+        :ivar version: incremented on every change of the text or the choice, see `PieceTable`
         """
         self.line_number = line_number
         self.line_num_left = line_num_left
         self.line_num_right = line_num_right
 
-        self.left = left
-        self.base = base
-        self.right = right
+        self._left = left
+        self._base = base
+        self._right = right
+        self._left_lines = self._base_lines = self._right_lines = None
 
         self.sep1 = sep1
         self.sep2 = sep2
@@ -61,6 +71,7 @@ class Conflict3Way:
         self.sep4 = sep4
 
         self.choice = Choice.undecided
+        self.version = 0
 
     def __eq__(self, other):
         return isinstance(self, Conflict3Way) and\
@@ -72,11 +83,64 @@ class Conflict3Way:
                    other.left, other.base, other.right,
                    other.sep1, other.sep2, other.sep3, other.sep4)
 
+    @property
+    def left(self) -> str:
+        return self._left
+
+    @left.setter
+    def left(self, text: str):
+        self._set_parts(text, self.base, self.right)
+        self._left_lines = None
+
+    @property
+    def base(self) -> str:
+        return self._base
+
+    @base.setter
+    def base(self, text: str):
+        self._set_parts(self.left, text, self.right)
+        self._base_lines = None
+
+    @property
+    def right(self) -> str:
+        return self._right
+
+    @right.setter
+    def right(self, text: str):
+        self._set_parts(self.left, self.base, text)
+        self._right_lines = None
+
+    def _set_parts(self, left: str, base: str, right: str):
+        self._left, self._base, self._right = left, base, right
+        self.version += 1
+
+    @property
+    def left_lines(self) -> LineIndex:
+        """ Line starts of `left`. Built on the first access, then kept up to date by the `extend_*` methods """
+        if self._left_lines is None:
+            self._left_lines = LineIndex(self.left)
+        return self._left_lines
+
+    @property
+    def base_lines(self) -> LineIndex:
+        """ Line starts of `base`, see `left_lines` """
+        if self._base_lines is None:
+            self._base_lines = LineIndex(self.base)
+        return self._base_lines
+
+    @property
+    def right_lines(self) -> LineIndex:
+        """ Line starts of `right`, see `left_lines` """
+        if self._right_lines is None:
+            self._right_lines = LineIndex(self.right)
+        return self._right_lines
+
     def is_resolved(self) -> bool:
         return self.choice.is_resolved()
 
     def select(self, choice: Choice):
         self.choice = choice
+        self.version += 1
 
     def result(self, choice: Choice = None) -> str:
         _choice = self.choice if not choice else choice
@@ -100,14 +164,24 @@ class Conflict3Way:
         self.line_number -= line_num
         self.line_num_left -= line_num
         self.line_num_right -= line_num
-        self.left = chunk + self.left
-        self.base = chunk + self.base
-        self.right = chunk + self.right
+        self._extend(chunk, "")
 
     def extend_bottom_down(self, chunk: str):
-        self.left += chunk
-        self.base += chunk
-        self.right += chunk
+        self._extend("", chunk)
+
+    def _extend(self, head: str, tail: str):
+        """ Adds `head` and `tail` to all the parts, the built line indices are updated rather than rebuilt """
+        head_lines = LineIndex(head)
+        tail_lines = LineIndex(tail)
+
+        indices = (self._left_lines, self._base_lines, self._right_lines)
+        self._set_parts(head + self.left + tail, head + self.base + tail, head + self.right + tail)
+
+        for index in indices:
+            if index is not None:
+                index.prepend(head_lines)
+                index.extend(tail_lines)
+        self._left_lines, self._base_lines, self._right_lines = indices
 
     def start(self, choice: Choice):
         if choice is Choice.left:
@@ -118,7 +192,12 @@ class Conflict3Way:
             raise ValueError
 
     def end(self, choice: Choice):
-        return self.start(choice) + len(self.result(choice).splitlines())
+        if choice is Choice.left:
+            return self.line_num_left + self.left_lines.count()
+        elif choice is Choice.right:
+            return self.line_num_right + self.right_lines.count()
+        else:
+            raise ValueError
 
 
 class Conflict2Way(Conflict3Way):
@@ -128,6 +207,8 @@ class Conflict2Way(Conflict3Way):
 
     Implemented as a special case of `Conflict3Way`.
     """
+    __slots__ = ()
+
     def __init__(self, line_number: int, line_num_left: int, line_num_right: int,
                  left: str, right: str, sep1: str, sep3: str, sep4: str):
         """
@@ -148,6 +229,107 @@ class Conflict2Way(Conflict3Way):
         return "\n left = \n" + self.left + "\n right = \n" + self.right
 
 
+class CompactConflict3Way(Conflict3Way):
+    """
+    `Conflict3Way` which keeps no text of its own.
+
+    `left`, `base` and `right` are `(start, end)` views into the buffer shared by the whole file
+    and are only materialized on access, e.g. by `result()` or `description()`.
+    Separator lines are interned, so equal separators are stored once per process.
+
+    Assigning or extending a part moves the conflict to a private buffer holding all three parts.
+    """
+    __slots__ = ('_buffer', '_left_start', '_left_end', '_base_start', '_base_end', '_right_start', '_right_end')
+    _state = ('line_number', 'line_num_left', 'line_num_right', '_left_lines', '_base_lines', '_right_lines',
+              'sep1', 'sep2', 'sep3', 'sep4', 'choice', 'version') + __slots__
+
+    def __init__(self, line_number: int, line_num_left: int, line_num_right: int, buffer: str,
+                 left: (int, int), base: (int, int), right: (int, int),
+                 sep1: str, sep2: str, sep3: str, sep4: str):
+        """
+        :ivar buffer: text of the whole file
+        :ivar left, base, right: `(start, end)` offsets of the parts in `buffer`
+        """
+        self.line_number = line_number
+        self.line_num_left = line_num_left
+        self.line_num_right = line_num_right
+
+        self._buffer = buffer
+        self._left_start, self._left_end = left
+        self._base_start, self._base_end = base
+        self._right_start, self._right_end = right
+        self._left_lines = self._base_lines = self._right_lines = None
+
+        self.sep1 = sys.intern(sep1)
+        self.sep2 = sys.intern(sep2)
+        self.sep3 = sys.intern(sep3)
+        self.sep4 = sys.intern(sep4)
+
+        self.choice = Choice.undecided
+        self.version = 0
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in CompactConflict3Way._state)
+
+    def __setstate__(self, state):
+        for name, value in zip(CompactConflict3Way._state, state):
+            setattr(self, name, value)
+
+        self.sep1, self.sep2, self.sep3, self.sep4 = map(sys.intern, (self.sep1, self.sep2, self.sep3, self.sep4))
+
+    def _set_parts(self, left: str, base: str, right: str):
+        self._buffer = left + base + right
+        self._left_start, self._left_end = 0, len(left)
+        self._base_start, self._base_end = self._left_end, self._left_end + len(base)
+        self._right_start, self._right_end = self._base_end, len(self._buffer)
+        self.version += 1
+
+    @property
+    def left(self) -> str:
+        return self._buffer[self._left_start:self._left_end]
+
+    @left.setter
+    def left(self, text: str):
+        Conflict3Way.left.fset(self, text)
+
+    @property
+    def base(self) -> str:
+        return self._buffer[self._base_start:self._base_end]
+
+    @base.setter
+    def base(self, text: str):
+        Conflict3Way.base.fset(self, text)
+
+    @property
+    def right(self) -> str:
+        return self._buffer[self._right_start:self._right_end]
+
+    @right.setter
+    def right(self, text: str):
+        Conflict3Way.right.fset(self, text)
+
+
+class CompactConflict2Way(CompactConflict3Way, Conflict2Way):
+    """ `Conflict2Way` stored as views, see `CompactConflict3Way` """
+    __slots__ = ()
+
+    def __init__(self, line_number: int, line_num_left: int, line_num_right: int, buffer: str,
+                 left: (int, int), right: (int, int), sep1: str, sep3: str, sep4: str):
+        super().__init__(line_number, line_num_left, line_num_right, buffer,
+                         left, (0, 0), right, sep1, "", sep3, sep4)
+
+    def _set_parts(self, left: str, base: str, right: str):
+        super()._set_parts(left, "", right)
+
+    @property
+    def base(self) -> str:
+        return "NOSTR"
+
+    @base.setter
+    def base(self, text: str):
+        pass
+
+
 """
 A type alias for exporting `Conflict3Way` and `Conflict2Way` into other modules.
 Use it when you do not care which implementation of conflict to use.
@@ -185,3 +367,12 @@ class ConflictBuilder:
         else:
             return Conflict2Way(self.line_number, self.line_num_left, self.line_num_right,
                                 self.left, self.right, self.sep1, self.sep3, self.sep4)
+
+    def build_view(self, buffer: str, left: (int, int), base: (int, int), right: (int, int)) -> Conflict:
+        """ Builds a compact conflict, whose parts are `(start, end)` offsets into `buffer` """
+        if self.has_base:
+            return CompactConflict3Way(self.line_number, self.line_num_left, self.line_num_right, buffer,
+                                       left, base, right, self.sep1, self.sep2, self.sep3, self.sep4)
+        else:
+            return CompactConflict2Way(self.line_number, self.line_num_left, self.line_num_right, buffer,
+                                       left, right, self.sep1, self.sep3, self.sep4)
@@ -0,0 +1,37 @@
+from bisect import bisect_right
+
+from .choice import Choice
+from .conflict import Conflict
+
+
+class ConflictIndex:
+    """
+    Line ranges `[start, end)` of the conflicts of a file on the `choice` side, sorted by `start`.
+
+    The ranges never overlap and keep their order when a conflict is extended,
+    since a conflict only grows into the file bits around it.
+    So the only conflict which may contain a line is the last one starting at or before it,
+    found by a binary search over `starts`.
+    The position of a conflict in the index is its position in `conflicts`,
+    file bits `i` and `i + 1` surround the conflict `i`.
+    """
+    def __init__(self, conflicts: [Conflict], choice: Choice):
+        self.conflicts = conflicts
+        self.choice = choice
+        self.starts = [conflict.start(choice) for conflict in conflicts]
+
+    def containing(self, line: int) -> int:
+        """ Position of the conflict whose range contains `line`, `-1` if there is none """
+        i = bisect_right(self.starts, line) - 1
+        if i >= 0 and line < self.conflicts[i].end(self.choice):
+            return i
+        return -1
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """ Whether any conflict intersects the lines `start..end` (both inclusive), an empty one counts as one line """
+        i = bisect_right(self.starts, end) - 1  # ends grow with starts, so the last conflict starting before is enough
+        return i >= 0 and max(self.conflicts[i].end(self.choice), self.starts[i] + 1) > start
+
+    def update(self, i: int):
+        """ Must be called after the conflict at `i` was extended """
+        self.starts[i] = self.conflicts[i].start(self.choice)
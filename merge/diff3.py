@@ -0,0 +1,284 @@
+from bisect import bisect_left
+
+from .conflict import Conflict3Way
+from .file_bit import FileBit
+
+
+class HistogramDiff:
+    """
+    Line diff combining git's patience and histogram strategies.
+
+    Lines are compared by integer ids, so every line is hashed once.
+    A region is first anchored at the longest increasing sequence of lines which are unique on both sides
+    (patience), the gaps between the anchors are diffed the same way.
+    A region without unique common lines is split at the longest run of equal lines
+    around its rarest common line (histogram).
+    Regions without a common line which is rare enough are considered completely changed.
+    """
+    max_chain = 64
+
+    @staticmethod
+    def matches(a: [int], b: [int]):  # -> [(int, int)]
+        """ Pairs `(i, j)` of equal lines `a[i] == b[j]`, increasing in both `i` and `j` """
+        found = []
+        regions = [(0, len(a), 0, len(b))]
+
+        while regions:
+            a_lo, a_hi, b_lo, b_hi = regions.pop()
+
+            while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+                found.append((a_lo, b_lo))
+                a_lo += 1
+                b_lo += 1
+
+            while a_lo < a_hi and b_lo < b_hi and a[a_hi - 1] == b[b_hi - 1]:
+                a_hi -= 1
+                b_hi -= 1
+                found.append((a_hi, b_hi))
+
+            if a_lo == a_hi or b_lo == b_hi:
+                continue
+
+            anchors = HistogramDiff._unique_anchors(a, a_lo, a_hi, b, b_lo, b_hi)
+            if anchors:
+                found.extend(anchors)
+                previous_i, previous_j = a_lo - 1, b_lo - 1
+                for i, j in anchors + [(a_hi, b_hi)]:
+                    if i > previous_i + 1 or j > previous_j + 1:
+                        regions.append((previous_i + 1, i, previous_j + 1, j))
+                    previous_i, previous_j = i, j
+                continue
+
+            split = HistogramDiff._split(a, a_lo, a_hi, b, b_lo, b_hi)
+            if not split:
+                continue
+
+            a_start, b_start, length = split
+            found.extend((a_start + k, b_start + k) for k in range(length))
+            regions.append((a_lo, a_start, b_lo, b_start))
+            regions.append((a_start + length, a_hi, b_start + length, b_hi))
+
+        found.sort()
+        return HistogramDiff._compact(a, b, found)
+
+    @staticmethod
+    def _compact(a: [int], b: [int], found: [(int, int)]):  # -> [(int, int)]
+        """
+        `found` with every group of changed lines slid down as far as the equal lines after it allow,
+        as xdiff's change compaction does. A change inside a run of equal lines is so placed at the same lines
+        whatever the other version is, and the two diffs of a 3-way merge agree on it
+        """
+        kept_a = [i for i, _ in found]
+        kept_b = [j for _, j in found]
+        if len(found) < len(a):
+            kept_a = HistogramDiff._slide(a, kept_a)
+        if len(found) < len(b):
+            kept_b = HistogramDiff._slide(b, kept_b)
+        return list(zip(kept_a, kept_b))
+
+    @staticmethod
+    def _slide(lines: [int], kept: [int]) -> [int]:
+        """ The unchanged ones of `lines` after the groups of changed ones slide down, `kept` before """
+        changed = [True] * len(lines) + [False]  # the sentinel ends the last group
+        for i in kept:
+            changed[i] = False
+
+        i = changed.index(True)
+        while i < len(lines):
+            start = i
+            i = changed.index(False, i)
+
+            # the group `[start, i)` moves down by a line, it joins the group after it if they meet
+            while i < len(lines) and lines[start] == lines[i]:
+                changed[start] = False
+                changed[i] = True
+                start += 1
+                i = changed.index(False, i + 1)
+
+            try:
+                i = changed.index(True, i)
+            except ValueError:
+                break
+
+        return [i for i in range(len(lines)) if not changed[i]]
+
+    @staticmethod
+    def _unique_anchors(a: [int], a_lo: int, a_hi: int, b: [int], b_lo: int, b_hi: int):  # -> [(int, int)]
+        """ The longest increasing sequence of pairs of lines which occur once in both regions """
+        in_a = {}
+        for i in range(a_lo, a_hi):
+            in_a[a[i]] = -1 if a[i] in in_a else i
+
+        in_b = {}
+        for j in range(b_lo, b_hi):
+            in_b[b[j]] = -1 if b[j] in in_b else j
+
+        pairs = [(i, in_b[line]) for line, i in in_a.items() if i != -1 and in_b.get(line, -1) != -1]
+        pairs.sort()
+
+        # patience sorting of `j`s
+        tails = []      # the smallest `j` ending an increasing sequence of each length
+        tail_pairs = []
+        previous = []   # index of the previous pair in the sequence
+        for index, (i, j) in enumerate(pairs):
+            length = bisect_left(tails, j)
+            if length == len(tails):
+                tails.append(j)
+                tail_pairs.append(index)
+            else:
+                tails[length] = j
+                tail_pairs[length] = index
+            previous.append(tail_pairs[length - 1] if length > 0 else -1)
+
+        anchors = []
+        index = tail_pairs[-1] if tail_pairs else -1
+        while index != -1:
+            anchors.append(pairs[index])
+            index = previous[index]
+
+        anchors.reverse()
+        return anchors
+
+    @staticmethod
+    def _split(a: [int], a_lo: int, a_hi: int, b: [int], b_lo: int, b_hi: int):  # -> (int, int, int) or None
+        occurrences = {}
+        for i in range(a_lo, a_hi):
+            occurrences.setdefault(a[i], []).append(i)
+
+        best = None  # (occurrences, -length, a_start, b_start, length)
+        j = b_lo
+        while j < b_hi:
+            positions = occurrences.get(b[j])
+            next_j = j + 1
+
+            if positions and len(positions) <= HistogramDiff.max_chain:
+                for i in positions:
+                    a_start, b_start = i, j
+                    while a_start > a_lo and b_start > b_lo and a[a_start - 1] == b[b_start - 1]:
+                        a_start -= 1
+                        b_start -= 1
+
+                    a_end, b_end = i + 1, j + 1
+                    while a_end < a_hi and b_end < b_hi and a[a_end] == b[b_end]:
+                        a_end += 1
+                        b_end += 1
+
+                    length = a_end - a_start
+                    candidate = (len(positions), -length, a_start, b_start, length)
+                    if best is None or candidate < best:
+                        best = candidate
+
+                    next_j = max(next_j, b_end)
+
+            j = next_j
+
+        return best[2:] if best else None
+
+
+class Diff3:
+    """
+    Three-way merge of whole file versions.
+
+    Lines equal in all three versions are kept, chunks changed on a single side (or identically on both)
+    are merged automatically, everything else becomes a `Conflict3Way` with a real `base`.
+    The result has the same layout and line numbering as `FileMerge.parse` of a conflicted file
+    with the `diff3` conflict style.
+    """
+    def __init__(self, base: str, left: str, right: str, labels: (str, str, str) = ("ours", "base", "theirs")):
+        self.base = Diff3.split_lines(base)
+        self.left = Diff3.split_lines(left)
+        self.right = Diff3.split_lines(right)
+
+        self.sep1 = "<<<<<<< %s\n" % labels[0]
+        self.sep2 = "||||||| %s\n" % labels[1]
+        self.sep3 = "=======\n"
+        self.sep4 = ">>>>>>> %s\n" % labels[2]
+
+    @staticmethod
+    def split_lines(text: str) -> [str]:
+        lines = text.split('\n')
+        result = [line + '\n' for line in lines[:-1]]
+        if lines[-1]:
+            result.append(lines[-1])
+        return result
+
+    def chunks(self):
+        """
+        Yields `(base, left, right)` ranges (as `(start, end)` pairs) of unstable chunks
+        and `None` for every line which is the same in all the versions
+        """
+        ids = {}
+        base = [ids.setdefault(line, len(ids)) for line in self.base]
+        left = [ids.setdefault(line, len(ids)) for line in self.left]
+        right = [ids.setdefault(line, len(ids)) for line in self.right]
+
+        to_left = dict(HistogramDiff.matches(base, left))
+        to_right = dict(HistogramDiff.matches(base, right))
+
+        i_base = i_left = i_right = 0
+        for i in range(len(base) + 1):
+            if i == len(base):
+                j, k = len(left), len(right)
+            elif i in to_left and i in to_right:
+                j, k = to_left[i], to_right[i]
+            else:
+                continue
+
+            if i > i_base or j > i_left or k > i_right:
+                yield (i_base, i), (i_left, j), (i_right, k)
+
+            if i < len(base):
+                yield None
+
+            i_base, i_left, i_right = i + 1, j + 1, k + 1
+
+    def merge(self):  # -> ([FileBit], [Conflict3Way])
+        file_bits = []
+        conflicts = []
+
+        text = []
+        line_number = 1
+        bit_line_number = 1
+        line_num_left = 1
+        line_num_right = 1
+
+        i_base = 0
+        for chunk in self.chunks():
+            if chunk is None:
+                text.append(self.base[i_base])
+                i_base += 1
+                line_number += 1
+                line_num_left += 1
+                line_num_right += 1
+                continue
+
+            (base_start, base_end), (left_start, left_end), (right_start, right_end) = chunk
+            base = self.base[base_start:base_end]
+            left = self.left[left_start:left_end]
+            right = self.right[right_start:right_end]
+            i_base = base_end
+
+            if base == left or left == right:
+                resolved = right if base == left else left
+            elif base == right:
+                resolved = left
+            else:
+                file_bits.append(FileBit(bit_line_number, "".join(text)))
+                conflicts.append(Conflict3Way(line_number, line_num_left, line_num_right,
+                                              "".join(left), "".join(base), "".join(right),
+                                              self.sep1, self.sep2, self.sep3, self.sep4))
+                text = []
+                line_number += len(left) + len(base) + len(right) + 4
+                line_num_left += len(left)
+                line_num_right += len(right)
+                bit_line_number = line_number
+                continue
+
+            text.extend(resolved)
+            line_number += len(resolved)
+            line_num_left += len(resolved)
+            line_num_right += len(resolved)
+
+        file_bits.append(FileBit(bit_line_number, "".join(text)))
+
+        return file_bits, conflicts
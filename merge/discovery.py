@@ -0,0 +1,148 @@
+import os
+from fnmatch import fnmatchcase
+from pathlib import Path
+
+
+class IgnoreRules:
+    """
+    Patterns of one `.gitignore` file.
+
+    Supported syntax: shell globs, `**`, `!` negation,
+    a leading (or inner) `/` anchoring the pattern to the `.gitignore` folder
+    and a trailing `/` matching folders only.
+    """
+    def __init__(self, patterns: [str], base: str = ""):
+        """
+        :ivar base: folder of the `.gitignore` file relative to the project root, `""` for the root itself
+        """
+        self.base = base
+        self.rules = []  # [(pattern, negated, anchored, dir_only)]
+
+        for pattern in patterns:
+            pattern = pattern.rstrip("\n").rstrip()
+            if not pattern or pattern.startswith("#"):
+                continue
+
+            negated = pattern.startswith("!")
+            if negated:
+                pattern = pattern[1:]
+
+            dir_only = pattern.endswith("/")
+            pattern = pattern.rstrip("/")
+
+            anchored = "/" in pattern
+            pattern = pattern.lstrip("/")
+
+            if pattern:
+                self.rules.append((pattern, negated, anchored, dir_only))
+
+    @staticmethod
+    def read(path: Path, base: str = ""):  # -> IgnoreRules
+        with path.open('r', encoding="utf-8", errors="replace") as stream:
+            return IgnoreRules(stream.readlines(), base)
+
+    def match(self, relative_path: str, is_dir: bool):  # -> bool or None
+        """
+        :param relative_path: `/`-separated path relative to the project root
+        :return: `True` if ignored, `False` if explicitly un-ignored, `None` if no rule matches
+        """
+        if self.base:
+            if not relative_path.startswith(self.base + "/"):
+                return None
+            relative_path = relative_path[len(self.base) + 1:]
+
+        name = relative_path.rsplit("/", 1)[-1]
+
+        result = None
+        for pattern, negated, anchored, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+
+            if anchored:
+                matched = fnmatchcase(relative_path, pattern) or \
+                          (pattern.startswith("**/") and fnmatchcase(relative_path, pattern[3:]))
+            else:
+                matched = fnmatchcase(name, pattern)
+
+            if matched:
+                result = not negated
+
+        return result
+
+
+class ProjectDiscovery:
+    """
+    Recursively lists the files of a project with `os.scandir`.
+
+    Files matched by `skip_patterns` or by any `.gitignore` on the way are not scanned for conflicts,
+    but they are still listed in `skipped`: the build may need them (e.g. sources of third party libraries
+    or generated headers). Only `unlisted_names` (the git metadata) are left out completely.
+    """
+    default_skip_patterns = [".git/", "build/", "third_party/"]
+    unlisted_names = {".git"}
+
+    def __init__(self, root: Path, skip_patterns: [str] = None):
+        """
+        :ivar skipped: paths of the files skipped by the last `files`, in a stable (sorted) order
+        """
+        self.root = root
+        self.skip_patterns = ProjectDiscovery.default_skip_patterns if skip_patterns is None else skip_patterns
+        self.skipped = []
+
+    def files(self):  # -> [(Path, int)]
+        """ Paths and sizes of all the project files to scan in a stable (sorted) order """
+        found = []
+        self.skipped = []
+        self._walk(str(self.root), "", [IgnoreRules(self.skip_patterns)], found)
+        return found
+
+    def _walk(self, folder: str, relative: str, rules: [IgnoreRules], found: [(Path, int)]):
+        gitignore = os.path.join(folder, ".gitignore")
+        if os.path.isfile(gitignore):
+            rules = rules + [IgnoreRules.read(Path(gitignore), relative)]
+
+        with os.scandir(folder) as entries:
+            entries = sorted(entries, key=lambda e: e.name)
+
+        for entry in entries:
+            entry_relative = relative + "/" + entry.name if relative else entry.name
+            is_dir = entry.is_dir(follow_symlinks=False)
+
+            if entry.name in ProjectDiscovery.unlisted_names:
+                continue
+
+            if ProjectDiscovery._is_ignored(rules, entry_relative, is_dir):
+                if is_dir:
+                    self._list(entry.path)
+                elif entry.is_file():
+                    self.skipped.append(Path(entry.path))
+                continue
+
+            if is_dir:
+                self._walk(entry.path, entry_relative, rules, found)
+            elif entry.is_file():
+                found.append((Path(entry.path), entry.stat().st_size))
+
+    def _list(self, folder: str):
+        """ Adds all the files under the skipped `folder` to `skipped`, ignore rules do not matter there """
+        with os.scandir(folder) as entries:
+            entries = sorted(entries, key=lambda e: e.name)
+
+        for entry in entries:
+            if entry.name in ProjectDiscovery.unlisted_names:
+                continue
+
+            if entry.is_dir(follow_symlinks=False):
+                self._list(entry.path)
+            elif entry.is_file():
+                self.skipped.append(Path(entry.path))
+
+    @staticmethod
+    def _is_ignored(rules: [IgnoreRules], relative_path: str, is_dir: bool) -> bool:
+        ignored = False
+        for rule in rules:  # deeper `.gitignore` files take precedence
+            result = rule.match(relative_path, is_dir)
+            if result is not None:
+                ignored = result
+
+        return ignored
@@ -1,28 +1,113 @@
+from .line_index import LineIndex
+
+
 class FileBit:
+    __slots__ = ('line_number', '_text', '_lines', 'version')
+
     def __init__(self, line_number: int, text: str):
+        """
+        :ivar version: incremented on every change of `text`, see `PieceTable`
+        """
         self.line_number = line_number
-        self.text = text
+        self._text = text
+        self._lines = None
+        self.version = 0
 
     def __eq__(self, other):
         return isinstance(other, FileBit)\
                and self.line_number == other.line_number \
                and self.text == other.text
 
+    @property
+    def text(self) -> str:
+        return self._text
+
+    @text.setter
+    def text(self, text: str):
+        self._text = text
+        self._lines = None
+        self.version += 1
+
+    @property
+    def lines(self) -> LineIndex:
+        """ Line starts of `text`. Built on the first access, then kept up to date by the `shrink_*` methods """
+        if self._lines is None:
+            self._lines = LineIndex(self.text)
+        return self._lines
+
+    def _substring(self, start: int, end: int) -> str:
+        return self._text[start:end]
+
+    def _narrow(self, start: int, end: int):
+        """ Leaves only `text[start:end]` """
+        self._text = self._text[start:end]
+
     def shrink_top_down(self, num: int) -> str:
-        self.line_number += num
-        lines = self.text.splitlines(keepends=True)
+        lines = self.lines
 
         assert num > 0  # to be symmetrical with `shrink_bottom_up`
-        assert len(lines) >= num
+        assert lines.count() >= num
 
-        self.text = "".join(lines[num:])
-        return "".join(lines[:num])
+        length = lines.length
+        cut = lines.drop_head(num)
+        chunk = self._substring(0, cut)
+        self._narrow(cut, length)
+
+        self.line_number += num
+        self.version += 1
+        return chunk
 
     def shrink_bottom_up(self, num: int) -> str:
-        lines = self.text.splitlines(keepends=True)
+        lines = self.lines
 
         assert num > 0
-        assert len(lines) >= num
+        assert lines.count() >= num
+
+        length = lines.length
+        cut = lines.drop_tail(num)
+        chunk = self._substring(cut, length)
+        self._narrow(0, cut)
+
+        self.version += 1
+        return chunk
+
+
+class CompactFileBit(FileBit):
+    """
+    `FileBit` which keeps no text of its own.
+    `text` is a `(start, end)` view into the buffer shared by the whole file
+    and is only materialized on access.
+    """
+    __slots__ = ('_buffer', '_start', '_end')
+
+    def __init__(self, line_number: int, buffer: str, start: int, end: int):
+        self.line_number = line_number
+        self._buffer = buffer
+        self._start = start
+        self._end = end
+        self._lines = None
+        self.version = 0
+
+    def __getstate__(self):
+        return self.line_number, self._buffer, self._start, self._end, self._lines, self.version
+
+    def __setstate__(self, state):
+        self.line_number, self._buffer, self._start, self._end, self._lines, self.version = state
+
+    @property
+    def text(self) -> str:
+        return self._buffer[self._start:self._end]
+
+    @text.setter
+    def text(self, text: str):
+        self._buffer = text
+        self._start = 0
+        self._end = len(text)
+        self._lines = None
+        self.version += 1
+
+    def _substring(self, start: int, end: int) -> str:
+        return self._buffer[self._start + start:self._start + end]
 
-        self.text = "".join(lines[:-num])
-        return "".join(lines[-num:])
+    def _narrow(self, start: int, end: int):
+        self._start, self._end = self._start + start, self._start + end
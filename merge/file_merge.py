@@ -1,23 +1,41 @@
 import re
-from enum import Enum
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
 from pathlib import Path
 
-from clang.cindex import TranslationUnit, Index, TranslationUnitLoadError, Cursor, CursorKind
+from clang.cindex import TranslationUnit, Cursor, CursorKind
 from io import TextIOBase
 
 from .choice import Choice
-from .conflict import ConflictBuilder, Conflict
+from .conflict import Conflict, Conflict2Way
+from .conflict_index import ConflictIndex
 from .file_bit import FileBit
+from .ast_cache import AstCache
+from .ast_snapshot import AstSnapshot
+from .ast_traversal import PrunedTraversal
 from .block import Block
+from .diff3 import Diff3
+from .marker_scanner import MarkerScanner
+from .piece_table import PieceTable
 
 
 class FileMerge:
+    preamble_cache = None  # `PreambleCache` to parse with the real includes, the includes are removed otherwise
+    base_version = "base"  # key of the common ancestor version, besides the `Choice`s
+    parse_threads = 3
+    _executor = None
+    _executor_lock = threading.Lock()
+
     def __init__(self, path: Path, file_bits: [FileBit], conflicts: [Conflict]):
+        """
+        :ivar parse_args: compiler arguments to parse the file with, see `CompileDatabase`
+        """
         self.path = path
         self.file_bits = file_bits
         self.conflicts = conflicts
-        self._translation_unit = None
-        self._translation_unit_choice = None
+        self.parse_args = []
+        self._renderings = {}  # {Choice: PieceTable}
+        self._translation_units = {}  # {Choice or base_version: (TranslationUnit, args)}, see `AstCache`
 
     def is_resolved(self):
         return len([c for c in self.conflicts if not c.is_resolved()]) == 0
@@ -26,99 +44,197 @@ class FileMerge:
         for conflict in self.conflicts:
             conflict.select(choice)
 
+    def prefetch(self):
+        """ Prepares the file for being visited. A parsed file is always ready """
+        pass
+
     def result(self, choice: Choice = None) -> str:
-        if len(self.file_bits) == 1 and len(self.conflicts) == 0:
-            return self.file_bits[0].text
+        """
+        Text of the file with the conflicts rendered as `choice` or as chosen in each of them.
+
+        The rendering is incremental: only the file bits and conflicts which changed since the last call
+        with the same `choice` are rendered again, see `PieceTable`
+        """
+        file_bits = self.file_bits
+        conflicts = self.conflicts
+
+        if len(file_bits) == 1 and len(conflicts) == 0:
+            return file_bits[0].text
+
+        size = len(file_bits) + len(conflicts)
+        table = self._renderings.get(choice)
+        if table is None or len(table) != size:
+            table = self._renderings[choice] = PieceTable(size)
+
+        for i, file_bit in enumerate(file_bits):
+            table.update(2 * i, file_bit, FileMerge._render_file_bit)
+        for i, conflict in enumerate(conflicts):
+            table.update(2 * i + 1, conflict, lambda c: c.result(choice))
 
-        _file_bits = self.file_bits[:]
-        _conflicts = self.conflicts[:]
-        bits = []
-        for i in range(len(_file_bits) + len(_conflicts)):
-            if i % 2 == 0:
-                bits += _file_bits.pop(0).text
-            else:
-                bits += _conflicts.pop(0).result(choice)
+        return table.render()
 
-        return "".join(bits)
+    @staticmethod
+    def _render_file_bit(file_bit: FileBit) -> str:
+        return file_bit.text
+
+    def result_lines(self, choice: Choice = None) -> [(int, int)]:
+        """ Line ranges `[start, end)` (counting from `1`) of the conflicts in `result(choice)` """
+        ranges = []
+        line = 1
+        for conflict, file_bit in zip(self.conflicts, self.file_bits):
+            line += file_bit.lines.count()
+            end = line + conflict.result(choice).count('\n')
+            ranges.append((line, end))
+            line = end
+
+        return ranges
+
+    def base_result(self) -> str:
+        """ Text of the common ancestor version of this file or `None` if some conflict has no base """
+        if any(isinstance(conflict, Conflict2Way) for conflict in self.conflicts):
+            return None
+
+        pieces = [self.file_bits[0].text]
+        for conflict, file_bit in zip(self.conflicts, self.file_bits[1:]):
+            pieces.append(conflict.base)
+            pieces.append(file_bit.text)
+
+        return "".join(pieces)
 
     def abstract_syntax_tree(self, choice: Choice = Choice.left) -> TranslationUnit:
         """
         AST of the `choice` version of this file or `None` if an error occurred
 
-        The last result is cashed
+        Translation units are shared through `AstCache`, an equal text is never parsed twice.
+        A changed version is reparsed in the unit of its previous text, which is much faster than a new parse
         """
-        if self._translation_unit and self._translation_unit_choice == choice:
-            return self._translation_unit
+        return self._syntax_tree(choice, self.result(choice), True)
+
+    def base_syntax_tree(self) -> TranslationUnit:
+        """ AST of the common ancestor version, see `base_result` and `abstract_syntax_tree` """
+        text = self.base_result()
+        return self._syntax_tree(FileMerge.base_version, text, True) if text is not None else None
+
+    def syntax_trees_async(self, executor: Executor = None) -> {object: Future}:
+        """
+        Starts parsing the left, the right and (if there is one) the base versions of this file concurrently
+
+        libclang releases the GIL while parsing, so the versions are parsed in parallel on the threads of `executor`,
+        the shared pool of `parse_threads` threads by default. The units are parsed from scratch:
+        reparsing units in place could change a unit another thread is using
 
+        :return: futures of the translation units by `Choice.left`, `Choice.right` and `FileMerge.base_version`
+        """
+        texts = {Choice.left: self.result(Choice.left), Choice.right: self.result(Choice.right)}
+        base = self.base_result()
+        if base is not None:
+            texts[FileMerge.base_version] = base
+
+        executor = executor or FileMerge.parse_executor()
+        return {version: executor.submit(self._syntax_tree, version, text, False) for version, text in texts.items()}
+
+    @staticmethod
+    def parse_executor() -> ThreadPoolExecutor:
+        with FileMerge._executor_lock:
+            if FileMerge._executor is None:
+                FileMerge._executor = ThreadPoolExecutor(max_workers=FileMerge.parse_threads,
+                                                         thread_name_prefix="parse")
+            return FileMerge._executor
+
+    def _syntax_tree(self, version, text: str, reparse: bool) -> TranslationUnit:
+        """ :param version: a `Choice` or `base_version`, the key of the last unit of the version """
         if not FileMerge.can_parse(self.path):
             raise RuntimeError("This file extension is not supported")
 
-        text = self.result(choice)
-        text = re.sub(r'#include((<\w+>)|("\w+"))', '', text)  # TODO: hack
+        args = self.parse_args
+        if FileMerge.preamble_cache:
+            text, args = FileMerge.preamble_cache.prepare(self.path, text, args)
+        else:
+            text = re.sub(r'#include((<\w+>)|("\w+"))', '', text)  # TODO: hack
+
+        previous, previous_args = self._translation_units.get(version, (None, None)) if reparse else (None, None)
+        if previous_args != args or any(unit is previous for v, (unit, _) in list(self._translation_units.items())
+                                        if v != version):
+            previous = None  # a unit is only reparsed with its own arguments and if no other version uses it
 
-        filename = str(self.path)
-        index = Index.create()
-        try:
-            self._translation_unit_choice = choice
-            self._translation_unit = index.parse(filename, unsaved_files=[(filename, text)])
-        except TranslationUnitLoadError:
-            pass
+        translation_unit = AstCache.shared().parse(str(self.path), text, args, previous=previous)
+        self._translation_units[version] = (translation_unit, args)
+        return translation_unit
 
-        return self._translation_unit
+    def refactor_syntax_blocks(self) -> [(int, int, int)]:
+        """
+        Only `if` is supported by now
 
-    def refactor_syntax_blocks(self):
-        """ Only `if` is supported by now """
+        :return: the changes made to the conflicts, they can be replayed on an equal file by `apply_adjustments`
+        """
+        adjustments = []
 
         if len(self.conflicts) == 0:
-            return
+            return adjustments
 
         _choice = Choice.left
         ast = self.abstract_syntax_tree(_choice)
         if not ast:
-            return
+            return adjustments
+
+        index = ConflictIndex(self.conflicts, _choice)
 
-        if_statements = FileMerge.extract_children(ast.cursor, [CursorKind.IF_STMT])
-        # all_blocks = FileMerge.extract_children(ast.cursor, [CursorKind.COMPOUND_STMT])
+        snapshot = AstSnapshot.build(ast, PrunedTraversal(ast.spelling, index))
+        if_statements = snapshot.find(CursorKind.IF_STMT)
 
-        blocks = [block for stmt in if_statements for block in Block.structure_of_IF(stmt)]
+        blocks = [block for stmt in if_statements for block in Block.structure_of_if_node(snapshot, stmt)]
 
         # situation: `{ <<< } >>>`
         for block in blocks:
-            intersecting_conflicts = [conflict for conflict in self.conflicts
-                                      if block.start < conflict.start(_choice) <=
-                                      block.end < conflict.end(_choice)]
+            i = index.containing(block.end)
 
-            if len(intersecting_conflicts) > 0:
-                conflict = intersecting_conflicts[0]
-                i = self.conflicts.index(conflict)
-                file_bit = self.file_bits[i]
-
-                num = conflict.start(_choice) - block.start
-                chunk = file_bit.shrink_bottom_up(num)
-                conflict.extend_top_up(chunk)
+            if i != -1 and block.start < self.conflicts[i].start(_choice):
+                num = self.conflicts[i].start(_choice) - block.start
+                self._extend_conflict(FileMerge.extend_up, i, num)
+                adjustments.append((FileMerge.extend_up, i, num))
+                index.update(i)
 
         # situation: `<<< { >>> }`
         for block in blocks:
-            intersecting_conflicts = [conflict for conflict in self.conflicts
-                                      if conflict.start(_choice) <= block.start <
-                                      conflict.end(_choice) <= block.end]
+            i = index.containing(block.start)
+
+            if i != -1 and self.conflicts[i].end(_choice) <= block.end:
+                num = block.end - self.conflicts[i].end(_choice) + 1
+                self._extend_conflict(FileMerge.extend_down, i, num)
+                adjustments.append((FileMerge.extend_down, i, num))
+
+        return adjustments
+
+    extend_up = 0    # the conflict takes the last lines of the file bit above it
+    extend_down = 1  # the conflict takes the first lines of the file bit below it
+
+    def apply_adjustments(self, adjustments: [(int, int, int)]):
+        """ Replays `(direction, conflict position, number of lines)` changes made by `refactor_syntax_blocks` """
+        for direction, i, num in adjustments:
+            self._extend_conflict(direction, i, num)
 
-            if len(intersecting_conflicts) > 0:
-                conflict = intersecting_conflicts[0]
-                i = self.conflicts.index(conflict)
-                file_bit = self.file_bits[i + 1]
+    def _extend_conflict(self, direction: int, i: int, num: int):
+        conflict = self.conflicts[i]
 
-                num = block.end - conflict.end(_choice) + 1
-                chunk = file_bit.shrink_top_down(num)
-                conflict.extend_bottom_down(chunk)
+        if direction == FileMerge.extend_up:
+            chunk = self.file_bits[i].shrink_bottom_up(num)
+            conflict.extend_top_up(chunk)
+        else:
+            chunk = self.file_bits[i + 1].shrink_top_down(num)
+            conflict.extend_bottom_down(chunk)
 
     @staticmethod
     def _get_children_recursive(cursor: Cursor):
-        """ Returns a one-go iterator for efficiency """
-        for ch in cursor.get_children():
+        """ Returns a one-go pre-order iterator, the tree is walked with an explicit stack """
+        stack = list(cursor.get_children())
+        stack.reverse()
+        while stack:
+            ch = stack.pop()
             yield ch
-            for r_ch in FileMerge._get_children_recursive(ch):
-                yield r_ch
+
+            children = list(ch.get_children())
+            children.reverse()
+            stack.extend(children)
 
     @staticmethod
     def extract_children(root: Cursor, kind_list: [CursorKind]) -> [Cursor]:
@@ -134,89 +250,159 @@ class FileMerge:
         return nodes
 
     @staticmethod
-    def parse(path: Path, stream: TextIOBase):  # -> FileMerge:
-        """ Note that the number of the first line of a file is `1` """
-        class State(Enum):
-            text = 1
-            left = 2
-            base = 3
-            right = 4
+    def parse(path: Path, stream: TextIOBase, compact: bool = False):  # -> FileMerge:
+        """
+        Note that the number of the first line of a file is `1`
 
+        :param compact: store file bits and conflicts as views into one buffer, see `CompactConflict3Way`
+        """
         assert stream.readable()
 
         if not FileMerge.can_parse(path):
             text = path.read_text(encoding="utf-8")
             return FileMerge(path, [FileBit(1, text)], [])
 
-        fileobj_lines = stream.readlines()
-        file_bits = []
-        conflicts = []
-
-        state = State.text
-        file_bit = FileBit(1, "")
-        conflict = ConflictBuilder()
-
-        line_num_left = 1
-        line_num_right = 1
-        for index, line in enumerate(fileobj_lines):
-            switch = line[0:7]
-
-            line_number = index + 1  # the first line of a file is #1
-
-            if state == State.text:
-                if switch == ConflictBuilder.sep1_marker:
-                    state = State.left
-                    file_bits.append(file_bit)
-                    file_bit = FileBit(-1, "")  # the `line_number` will be overridden
-                    conflict.line_number = line_number
-                    conflict.line_num_left = line_num_left
-                    conflict.sep1 = line
-                else:
-                    file_bit.text += line
-                    line_num_left += 1
-                    line_num_right += 1
-
-            elif state == State.left:
-                if switch == ConflictBuilder.sep2_marker:
-                    state = State.base
-                    conflict.has_base = True
-                    conflict.sep2 = line
-                elif switch == ConflictBuilder.sep3_marker:
-                    state = State.right
-                    conflict.has_base = False
-                    conflict.line_num_right = line_num_right
-                    conflict.sep3 = line
-                else:
-                    conflict.left += line
-                    line_num_left += 1
-
-            elif state == State.base:
-                if switch == ConflictBuilder.sep3_marker:
-                    state = State.right
-                    conflict.line_num_right = line_num_right
-                    conflict.sep3 = line
-                else:
-                    conflict.base += line
-
-            elif state == State.right:
-                if switch == ConflictBuilder.sep4_marker:
-                    state = State.text
-                    conflict.sep4 = line
-                    conflicts.append(conflict.build())
-                    conflict = ConflictBuilder()
-                    file_bit.line_number = line_number + 1
-                else:
-                    conflict.right += line
-                    line_num_right += 1
-
-            else:
-                raise ValueError
-
-        file_bits.append(file_bit)
+        file_bits, conflicts = MarkerScanner(stream.read()).scan(compact)
 
         return FileMerge(path, file_bits, conflicts)
 
+    @staticmethod
+    def parse_versions(path: Path, base: str, left: str, right: str):  # -> FileMerge:
+        """
+        Merges the three versions of a file itself instead of reading conflict markers, see `Diff3`.
+        Every conflict has a real `base`
+        """
+        file_bits, conflicts = Diff3(base, left, right).merge()
+        return FileMerge(path, file_bits, conflicts)
+
     @staticmethod
     def can_parse(path: Path) -> bool:
         allowed_extensions = [".cpp", ".c", ".hpp", ".h"]
         return path.suffix in allowed_extensions
+
+
+class PassthroughFileMerge(FileMerge):
+    """
+    A file with no conflicts to resolve.
+
+    It is never tokenized: the text is only read from `path` when somebody asks for it
+    """
+    def __init__(self, path: Path):
+        self._file_bits = None
+        super().__init__(path, None, [])
+
+    @property
+    def file_bits(self) -> [FileBit]:
+        if self._file_bits is None:
+            self._file_bits = [FileBit(1, self.path.read_text(encoding="utf-8"))]
+
+        return self._file_bits
+
+    @file_bits.setter
+    def file_bits(self, file_bits: [FileBit]):
+        self._file_bits = file_bits
+
+
+class LazyFileMerge(FileMerge):
+    """
+    A conflicted file which is only parsed on the first access to `file_bits` or `conflicts`.
+    Syntax blocks are refactored right after parsing.
+
+    Until then it only knows its path and the number of its conflicts.
+    """
+    trivial_resolver = None  # `TrivialResolver` which settles the trivial conflicts of a file when it is loaded
+
+    def __init__(self, path: Path, conflict_count: int, compact: bool = False):
+        self._file_bits = None
+        self._conflicts = None
+        super().__init__(path, None, None)
+
+        self.conflict_count = conflict_count
+        self.compact = compact
+        self._pending_choice = None
+        self._lock = threading.Lock()
+
+    @property
+    def file_bits(self) -> [FileBit]:
+        self.load()
+        return self._file_bits
+
+    @file_bits.setter
+    def file_bits(self, file_bits: [FileBit]):
+        self._file_bits = file_bits
+
+    @property
+    def conflicts(self) -> [Conflict]:
+        self.load()
+        return self._conflicts
+
+    @conflicts.setter
+    def conflicts(self, conflicts: [Conflict]):
+        self._conflicts = conflicts
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def is_loaded(self) -> bool:
+        return self._conflicts is not None
+
+    def load(self):
+        """ Parses the file and refactors its syntax blocks, unless it was done before """
+        if self.is_loaded():
+            return
+
+        with self._lock:
+            if self.is_loaded():  # loaded by a prefetching thread
+                return
+
+            with self.path.open('r', encoding="utf-8") as stream:
+                file_merge = FileMerge.parse(self.path, stream, self.compact)
+
+            file_merge.parse_args = self.parse_args
+            file_merge.refactor_syntax_blocks()
+            if self._pending_choice:
+                file_merge.select_all(self._pending_choice)
+            if LazyFileMerge.trivial_resolver:
+                LazyFileMerge.trivial_resolver.resolve(file_merge)
+
+            self._file_bits = file_merge.file_bits
+            self._conflicts = file_merge.conflicts
+            self._translation_units = file_merge._translation_units
+
+    def marker_result(self):  # -> str or None
+        """
+        Text of the file with the conflicts rendered as the choice selected before loading, read from the markers
+        without loading the file (nor refactoring its syntax blocks). `None` if no choice is pending,
+        the text is the file itself then
+        """
+        if self._pending_choice in (None, Choice.undecided):
+            return None
+
+        file_bits, conflicts = MarkerScanner(self.path.read_text(encoding="utf-8")).scan(self.compact)
+        file_merge = FileMerge(self.path, file_bits, conflicts)
+        file_merge.select_all(self._pending_choice)
+        return file_merge.result()
+
+    def prefetch(self) -> threading.Thread:
+        """ Loads the file in a background thread """
+        thread = threading.Thread(target=self.load, daemon=True)
+        thread.start()
+        return thread
+
+    def is_resolved(self):
+        if self.is_loaded():
+            return super().is_resolved()
+
+        return self.conflict_count == 0 or (self._pending_choice is not None and self._pending_choice.is_resolved())
+
+    def select_all(self, choice: Choice):
+        if self.is_loaded():
+            super().select_all(choice)
+        else:
+            self._pending_choice = choice
@@ -0,0 +1,82 @@
+import os
+import subprocess
+from pathlib import Path
+
+
+class GitIndex:
+    """
+    Files of a git working tree as listed in its index.
+
+    Paths in the merging state have entries at stages 1 (base), 2 (ours) and 3 (theirs);
+    their blob ids are kept in `stages`.
+    """
+    base_stage = 1
+    ours_stage = 2
+    theirs_stage = 3
+
+    def __init__(self, path: Path, paths: [Path], stages: {Path: {int: str}}):
+        """
+        :ivar path:   folder the paths are relative to
+        :ivar paths:  all the files in the index, each one once
+        :ivar stages: blob ids of the unmerged files by their stage
+        """
+        self.path = path
+        self.paths = paths
+        self.stages = stages
+
+    def is_unmerged(self, path: Path) -> bool:
+        return path in self.stages
+
+    def read_blob(self, blob_id: str) -> bytes:
+        return subprocess.check_output(["git", "-C", str(self.path), "cat-file", "blob", blob_id])
+
+    def read_blobs(self, blob_ids: [str]) -> {str: bytes}:
+        """ Reads many blobs with a single `git cat-file --batch` call """
+        request = "".join(blob_id + "\n" for blob_id in blob_ids).encode("ascii")
+        output = subprocess.run(["git", "-C", str(self.path), "cat-file", "--batch"],
+                                input=request, stdout=subprocess.PIPE, check=True).stdout
+
+        blobs = {}
+        position = 0
+        for blob_id in blob_ids:
+            header_end = output.index(b'\n', position)
+            header = output[position:header_end].split(b' ')
+            if header[-1] == b'missing':
+                raise ValueError("Blob is missing from the repository", blob_id)
+
+            size = int(header[2])
+            blobs[blob_id] = output[header_end + 1:header_end + 1 + size]
+            position = header_end + 1 + size + 1  # the contents are followed by a newline
+
+        return blobs
+
+    @staticmethod
+    def read(path: Path):  # -> GitIndex:
+        """ Reads the index of the repository `path` belongs to with a single `git ls-files` call """
+        output = subprocess.check_output(["git", "-C", str(path), "ls-files", "--stage", "-z"])
+        return GitIndex.parse(path, output)
+
+    @staticmethod
+    def parse(path: Path, output: bytes):  # -> GitIndex:
+        """ Parses the output of `git ls-files --stage -z`: `<mode> <blob id> <stage>\\t<path>\\0` """
+        paths = []
+        stages = {}
+
+        for record in output.split(b'\0'):
+            if not record:
+                continue
+
+            info, name = record.split(b'\t', 1)
+            _, blob_id, stage = info.split(b' ')
+            file = path / os.fsdecode(name)
+            stage = int(stage)
+
+            if stage == 0:
+                paths.append(file)
+            else:
+                if file not in stages:
+                    paths.append(file)
+                    stages[file] = {}
+                stages[file][stage] = blob_id.decode("ascii")
+
+        return GitIndex(path, paths, stages)
@@ -0,0 +1,85 @@
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, repeat
+from operator import add
+
+
+class LineIndex:
+    """
+    Offsets of the line starts of a text.
+
+    Lines are separated by `\\n`, a last line without `\\n` counts as a line as well.
+    Line counts and line-to-offset lookups are O(1), offset-to-line lookups are O(log n).
+    The index is updated in place when the text is extended or shrunk, the text is never scanned again.
+    """
+    __slots__ = ('_breaks', '_shift', 'length')
+
+    def __init__(self, text: str = ""):
+        """
+        :ivar length: length of the indexed text
+        """
+        parts = text.split('\n')
+        self._breaks = array('q', accumulate(map(add, map(len, parts[:-1]), repeat(1))))  # offsets after `\n`s
+        self._shift = 0  # added to every value in `_breaks`
+        self.length = len(text)
+
+    def __eq__(self, other):
+        return isinstance(other, LineIndex) and self.length == other.length and list(self) == list(other)
+
+    def __iter__(self):
+        """ Offsets of the line starts """
+        if self.length > 0:
+            yield 0
+        shift = self._shift
+        for position in self._breaks:
+            if position + shift < self.length:
+                yield position + shift
+
+    def count(self) -> int:
+        """ Number of lines, the same as `len(text.splitlines())` for `\\n`-separated text """
+        breaks = len(self._breaks)
+        last = self._breaks[-1] + self._shift if breaks else 0
+        return breaks + (1 if self.length > last else 0)
+
+    def offset(self, line: int) -> int:
+        """ Offset of the start of `line` (counting from `0`), the text length for `line == count()` """
+        assert 0 <= line <= self.count()
+
+        if line == 0:
+            return 0
+        elif line > len(self._breaks):
+            return self.length
+        else:
+            return self._breaks[line - 1] + self._shift
+
+    def line_at(self, offset: int) -> int:
+        """ The line (counting from `0`) which `offset` belongs to """
+        return bisect_right(self._breaks, offset - self._shift)
+
+    def prepend(self, head):
+        """ Updates the index after `head` (a `LineIndex`) was prepended to the text """
+        self._shift += head.length
+        self._breaks[0:0] = array('q', [position + head._shift - self._shift for position in head._breaks])
+        self.length += head.length
+
+    def extend(self, tail):
+        """ Updates the index after `tail` (a `LineIndex`) was appended to the text """
+        delta = self.length + tail._shift - self._shift
+        self._breaks.extend(position + delta for position in tail._breaks)
+        self.length += tail.length
+
+    def drop_head(self, num: int) -> int:
+        """ Updates the index after the first `num` lines were removed, returns their length """
+        cut = self.offset(num)
+        del self._breaks[:min(num, len(self._breaks))]
+        self._shift -= cut
+        self.length -= cut
+        return cut
+
+    def drop_tail(self, num: int) -> int:
+        """ Updates the index after the last `num` lines were removed, returns the length of the rest """
+        keep = self.count() - num
+        cut = self.offset(keep)
+        del self._breaks[keep:]
+        self.length = cut
+        return cut
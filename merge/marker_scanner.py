@@ -0,0 +1,174 @@
+import mmap
+import re
+from enum import Enum
+from pathlib import Path
+
+from .conflict import ConflictBuilder
+from .file_bit import FileBit, CompactFileBit
+
+
+class State(Enum):
+    text = 1
+    left = 2
+    base = 3
+    right = 4
+
+
+class MarkerScanner:
+    """
+    Splits a conflicted text into `FileBit`s and `Conflict`s in a single pass over one buffer.
+
+    Separator lines are located with a bulk regular expression search,
+    so only the marker lines are looked at from Python.
+    Every region between two markers is sliced out of the buffer exactly once.
+
+    Note that the number of the first line of a file is `1`
+    """
+    marker_pattern = re.compile(r"^(?:<{7}|\|{7}|={7}|>{7})", re.MULTILINE)
+    sep1_marker_bytes = ConflictBuilder.sep1_marker.encode("ascii")
+
+    def __init__(self, text: str):
+        self.text = text
+
+    @staticmethod
+    def has_markers(path: Path) -> bool:
+        """
+        Checks if the file has a `<<<<<<<` marker at the start of a line
+
+        Only raw bytes are searched: nothing is decoded or split into lines
+        """
+        marker = MarkerScanner.sep1_marker_bytes
+
+        with path.open('rb') as stream:
+            try:
+                data = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty files cannot be mapped
+                return False
+
+            with data:
+                return data[:len(marker)] == marker or data.find(b'\n' + marker) != -1
+
+    @staticmethod
+    def count_markers(path: Path) -> int:
+        """ Number of `<<<<<<<` markers at the start of a line, i.e. the number of conflicts in the file """
+        marker = MarkerScanner.sep1_marker_bytes
+
+        with path.open('rb') as stream:
+            try:
+                data = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty files cannot be mapped
+                return 0
+
+            with data:
+                count = int(data[:len(marker)] == marker)
+                position = data.find(b'\n' + marker)
+                while position != -1:
+                    count += 1
+                    position = data.find(b'\n' + marker, position + 1)
+
+                return count
+
+    def markers(self):
+        """ Yields `(marker, start, end, line_number)` for every line which starts with a separator marker """
+        text = self.text
+        line_number = 1
+        last = 0
+
+        for match in self.marker_pattern.finditer(text):
+            start = match.start()
+            line_number += text.count('\n', last, start)
+            last = start
+
+            end = text.find('\n', start)
+            end = len(text) if end == -1 else end + 1
+
+            yield match.group(), start, end, line_number
+
+    def scan(self, compact: bool = False):  # -> ([FileBit], [Conflict])
+        """
+        :param compact: build `CompactFileBit`s and `CompactConflict3Way`s which are views into `text`
+        """
+        text = self.text
+        file_bits = []
+        conflicts = []
+
+        state = State.text
+        conflict = ConflictBuilder()
+
+        bit_start = 0
+        bit_line_number = 1
+        left = base = right = (0, 0)
+        region_start = 0
+
+        line_num_left = 1
+        line_num_right = 1
+        for marker, start, end, line_number in self.markers():
+            if state == State.text:
+                if marker == ConflictBuilder.sep1_marker:
+                    state = State.left
+                    lines = text.count('\n', bit_start, start)
+                    line_num_left += lines
+                    line_num_right += lines
+                    file_bits.append(self._file_bit(compact, bit_line_number, bit_start, start))
+                    conflict.line_number = line_number
+                    conflict.line_num_left = line_num_left
+                    conflict.sep1 = text[start:end]
+                    region_start = end
+
+            elif state == State.left:
+                if marker == ConflictBuilder.sep2_marker:
+                    state = State.base
+                    conflict.has_base = True
+                    left = (region_start, start)
+                    line_num_left += text.count('\n', region_start, start)
+                    conflict.sep2 = text[start:end]
+                    region_start = end
+                elif marker == ConflictBuilder.sep3_marker:
+                    state = State.right
+                    conflict.has_base = False
+                    left = (region_start, start)
+                    line_num_left += text.count('\n', region_start, start)
+                    conflict.line_num_right = line_num_right
+                    conflict.sep3 = text[start:end]
+                    region_start = end
+
+            elif state == State.base:
+                if marker == ConflictBuilder.sep3_marker:
+                    state = State.right
+                    base = (region_start, start)
+                    conflict.line_num_right = line_num_right
+                    conflict.sep3 = text[start:end]
+                    region_start = end
+
+            elif state == State.right:
+                if marker == ConflictBuilder.sep4_marker:
+                    state = State.text
+                    right = (region_start, start)
+                    line_num_right += text.count('\n', region_start, start)
+                    conflict.sep4 = text[start:end]
+                    if compact:
+                        conflicts.append(conflict.build_view(text, left, base, right))
+                    else:
+                        conflict.left = text[left[0]:left[1]]
+                        conflict.base = text[base[0]:base[1]]
+                        conflict.right = text[right[0]:right[1]]
+                        conflicts.append(conflict.build())
+                    conflict = ConflictBuilder()
+                    bit_start = end
+                    bit_line_number = line_number + 1
+
+            else:
+                raise ValueError
+
+        if state == State.text:
+            file_bits.append(self._file_bit(compact, bit_line_number, bit_start, len(text)))
+        else:
+            file_bits.append(FileBit(-1, ""))  # an unterminated conflict is dropped
+
+        return file_bits, conflicts
+
+    def _file_bit(self, compact: bool, line_number: int, start: int, end: int) -> FileBit:
+        if compact:
+            return CompactFileBit(line_number, self.text, start, end)
+        else:
+            return FileBit(line_number, self.text[start:end])
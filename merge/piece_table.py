@@ -0,0 +1,48 @@
+class PieceTable:
+    """
+    Rendered text of a file kept as a sequence of pieces: file bits interleaved with conflicts.
+
+    Every piece remembers which object and which `version` of it it was rendered from,
+    so only the pieces which changed since the last rendering are rendered again.
+    Pieces are grouped in blocks of `block_size`, each block caches its joined text;
+    re-rendering after a change of one piece costs that piece, its block and one join of the blocks.
+    """
+    block_size = 64
+
+    def __init__(self, size: int):
+        self.sources = [None] * size
+        self.versions = [None] * size
+        self.pieces = [""] * size
+        self.blocks = [None] * ((size + PieceTable.block_size - 1) // PieceTable.block_size)
+        self.text = None
+
+    def __len__(self):
+        return len(self.pieces)
+
+    def update(self, i: int, source, render) -> bool:
+        """
+        Re-renders the piece `i` if `source` or its `version` changed
+
+        :param render: function of `source` returning the text of the piece
+        :return: `True` if the piece was rendered again
+        """
+        if self.sources[i] is source and self.versions[i] == source.version:
+            return False
+
+        self.sources[i] = source
+        self.versions[i] = source.version
+        self.pieces[i] = render(source)
+        self.blocks[i // PieceTable.block_size] = None
+        self.text = None
+        return True
+
+    def render(self) -> str:
+        if self.text is None:
+            size = PieceTable.block_size
+            for b, block in enumerate(self.blocks):
+                if block is None:
+                    self.blocks[b] = "".join(self.pieces[b * size:(b + 1) * size])
+
+            self.text = "".join(self.blocks)
+
+        return self.text
@@ -0,0 +1,141 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+
+from clang.cindex import TranslationUnitLoadError, TranslationUnitSaveError
+
+from .ast_cache import AstCache
+
+
+class PreambleCache:
+    """
+    Precompiled headers of the `#include` prefixes of source files, kept on disk under the temp folder.
+
+    The prefix of a file is its leading run of `#include`s, blank lines and comments.
+    Files (and versions of a file) with equal prefixes and parse arguments share one precompiled header,
+    which is built once and reused by the next runs as well.
+    The file is then parsed with `-include-pch` and its prefix blanked out, so line numbers do not change.
+    """
+    include_line = re.compile(r'\s*#\s*include\s*["<]')
+    header_languages = {".c": "c-header", ".h": "c-header", ".cpp": "c++-header", ".hpp": "c++-header"}
+
+    def __init__(self, folder: Path = None):
+        """
+        :ivar built:  number of precompiled headers built by this process
+        :ivar reused: number of file versions prepared to be parsed with a precompiled header
+        """
+        self.folder = folder or Path(tempfile.gettempdir()) / "merge-preambles"
+        self.built = 0
+        self.reused = 0
+
+        self._preambles = {}  # {key: path of the precompiled header or `None` if it can not be built}
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return "Preambles: %d built, %d reused, in %s" % (self.built, self.reused, self.folder)
+
+    @staticmethod
+    def split(text: str) -> int:
+        """ Length of the `#include` prefix of `text`, `0` if the text does not start with includes """
+        end = 0
+        in_comment = False
+
+        position = 0
+        while position < len(text):
+            line_end = text.find('\n', position)
+            line_end = len(text) if line_end == -1 else line_end + 1
+            line = text[position:line_end].strip()
+            position = line_end
+
+            if in_comment:
+                in_comment = not line.endswith("*/")
+            elif not line or line.startswith("//"):
+                pass
+            elif line.startswith("/*"):
+                if "*/" not in line:
+                    in_comment = True
+                elif not line.endswith("*/"):
+                    break
+            elif PreambleCache.include_line.match(line):
+                end = position
+            else:
+                break
+
+        return end
+
+    def prepare(self, path: Path, text: str, args: [str]) -> (str, [str]):
+        """
+        The text and the arguments to parse the version `text` of `path` with.
+        The arguments do not change if the file has no include prefix or its header could not be precompiled
+        """
+        end = PreambleCache.split(text)
+        language = PreambleCache.header_languages.get(path.suffix)
+        if end == 0 or language is None:
+            return text, args
+
+        prefix = text[:end]
+        header_args = list(args) + ["-x", language]
+        if '"' in prefix:  # quoted includes are looked up next to the file
+            header_args += ["-I", str(path.resolve().parent)]
+
+        pch = self.preamble(prefix, header_args)
+        if pch is None:
+            return text, args
+
+        self.reused += 1
+        return '\n' * prefix.count('\n') + text[end:], list(args) + ["-include-pch", pch]
+
+    def preamble(self, prefix: str, header_args: [str]) -> str:
+        """ Path of the precompiled `prefix`, built on the first request. `None` if it can not be built """
+        digest = hashlib.sha1()
+        for arg in header_args:
+            digest.update(arg.encode("utf-8", "surrogateescape") + b'\0')
+        digest.update(prefix.encode("utf-8", "surrogateescape"))
+        key = digest.hexdigest()
+
+        with self._lock:
+            if key not in self._preambles:
+                pch = self.folder / (key + ".pch")
+                if not (pch.is_file() and PreambleCache._is_valid(pch, header_args)):
+                    pch = self._build(key, prefix, header_args)
+                self._preambles[key] = str(pch) if pch else None
+
+            return self._preambles[key]
+
+    @staticmethod
+    def _is_valid(pch: Path, header_args: [str]) -> bool:
+        """
+        A header built by a previous run is stale if any of its includes changed since. It is loaded with the
+        arguments it was built with (but the language of the header), a header built with other language options
+        would not load
+        """
+        source = str(pch.with_suffix(".check.c" if "c-header" in header_args else ".check.cpp"))
+        language = len(header_args) - 1 - header_args[::-1].index("-x")  # the last one, added by `prepare`
+        args = header_args[:language] + header_args[language + 2:] + ["-include-pch", str(pch)]
+        try:
+            AstCache.shared().index.parse(source, args=args, unsaved_files=[(source, "")])
+            return True
+        except TranslationUnitLoadError:
+            return False
+
+    def _build(self, key: str, prefix: str, header_args: [str]):  # -> Path or None
+        self.folder.mkdir(parents=True, exist_ok=True)
+        header = self.folder / (key + ".h")
+        pch = self.folder / (key + ".pch")
+        building = self.folder / ("%s.%d.tmp" % (key, os.getpid()))  # other processes may build the same header
+
+        try:
+            header.write_text(prefix, encoding="utf-8")
+            translation_unit = AstCache.shared().index.parse(str(header), args=header_args)
+            translation_unit.save(str(building))
+            os.replace(building, pch)
+        except (TranslationUnitLoadError, TranslationUnitSaveError, OSError):
+            if building.exists():
+                building.unlink()
+            return None
+
+        self.built += 1
+        return pch
@@ -1,10 +1,18 @@
-import shutil
-import subprocess
-import sys
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from stat import S_ISREG
 
+from .build_mirror import BuildMirror
+from .build_runner import BuildRunner
 from .choice import Choice
-from .file_merge import FileMerge
+from .compile_commands import CompileDatabase
+from .file_merge import FileMerge, PassthroughFileMerge, LazyFileMerge
+from .discovery import ProjectDiscovery
+from .git_index import GitIndex
+from .marker_scanner import MarkerScanner
+from .solver import ChoiceSolver, SyntaxEvaluation, BuildEvaluation
+from .syntax_check import SyntaxCheck
 
 
 class ProjectMergeChoise:
@@ -12,10 +20,24 @@ class ProjectMergeChoise:
 
 
 class ProjectMerge:
-    def __init__(self, path: Path, tmp_path: Path, files: [FileMerge]):
+    def __init__(self, path: Path, tmp_path: Path, files: [FileMerge], stages: {Path: {int: str}} = None):
+        """
+        :ivar stages: git blob ids of the conflicted files by their index stage, see `GitIndex`
+        :ivar make_jobs: number of `make` jobs to build with, all the available CPUs by default
+        :ivar last_build: the runner of the last `compile_print`, see `BuildRunner`
+        :ivar solver_budget: the most evaluations and seconds `solve` may take
+        :ivar last_solver: the solver of the last `solve`, see `ChoiceSolver`
+        """
         self.path = path
         self.tmp_path = tmp_path
         self.files = files
+        self.stages = stages if stages is not None else {}
+        self.make_jobs = None
+        self.last_build = None
+        self.solver_budget = (64, 300.0)
+        self.last_solver = None
+        self._mirrors = {}  # {Path: BuildMirror}
+        self._syntax_check = SyntaxCheck()
 
     def is_resolved(self):
         return len([f for f in self.files if not f.is_resolved()]) == 0
@@ -31,42 +53,149 @@ class ProjectMerge:
         self.write_result(self.tmp_path)
 
     def write_result(self, buf_path: Path):
-        if buf_path.exists():
-            if buf_path.is_dir():
-                shutil.rmtree(str(buf_path))
-            else:
-                buf_path.unlink()
+        """ Writes the files which changed since the last call with the same `buf_path`, see `BuildMirror` """
+        if buf_path.exists() and not buf_path.is_dir():
+            buf_path.unlink()
 
-        buf_path.mkdir()
+        mirror = self._mirrors.get(buf_path)
+        if mirror is None:
+            mirror = self._mirrors[buf_path] = BuildMirror(buf_path, self.path)
 
-        for file in self.files:
-            relative_path = file.path.relative_to(self.path)
-            path = buf_path / relative_path
-            path.write_text(file.result(), encoding="utf-8")
+        mirror.sync(self.files)
 
-    def compile_print(self):
+    def compile_print(self) -> bool:
+        """ Builds the written results, streaming the output of `make`. Ctrl+C cancels the build """
         self.write_result_tmp()
 
-        try:
-            # out, err = subprocess.check_output(["g++", buf_path])
+        self.last_build = BuildRunner(self.tmp_path, self.make_jobs)
+        succeeded = self.last_build.run()
+        print(self.last_build)
+
+        return succeeded
+
+    def check_syntax_print(self) -> bool:
+        """ Parses the results changed since the last check instead of building them, see `SyntaxCheck` """
+        problems = self._syntax_check.run(self.files)
+        for problem in problems:
+            print(problem)
+
+        print(self._syntax_check)
+        if not problems:
+            print("No syntax errors found")
+
+        return not problems
+
+    def solve(self, build: bool = False) -> {FileMerge: [Choice]}:
+        """
+        Searches for choices of the undecided conflicts which make the project compile, see `ChoiceSolver`.
+        The conflicts are left undecided, the found choices are selected by `ChoiceSolver.apply`
+
+        :param build: evaluate the choices by building the project rather than by a `SyntaxCheck`
+        """
+        self.last_solver = ChoiceSolver(BuildEvaluation() if build else SyntaxEvaluation(), *self.solver_budget)
+        return self.last_solver.solve(self)
+
+    @staticmethod
+    def parse(path: Path, tmp_path: Path, compact: bool = False, lazy: bool = False,
+              workers: int = 1, skip_patterns: [str] = None, git: bool = False,
+              rebuild: bool = False, compile_commands: Path = None):  # -> ProjectMerge:
+        """
+        Files are discovered recursively, see `ProjectDiscovery`
+
+        :param compact: see `FileMerge.parse`
+        :param lazy: only count conflicts in the files, parsing is deferred, see `LazyFileMerge`
+        :param workers: number of processes to parse the files with. The largest files are parsed first
+        :param skip_patterns: `.gitignore`-like patterns to skip besides the `.gitignore` files of the project.
+                              Skipped files are not scanned for conflicts, they are passed through
+        :param git: take the files from the git index instead of walking the tree.
+                    Only the unmerged ones are parsed, the rest are passed through
+        :param rebuild: with `git`, merge the base/ours/theirs versions of the unmerged C/C++ files
+                        instead of reading conflict markers, see `FileMerge.parse_versions`
+        :param compile_commands: `compile_commands.json` to take the parse arguments of the files from,
+                                 see `CompileDatabase`
+        """
+        stages = {}
+        versions = {}
+        skipped = []
+        if git:
+            index = GitIndex.read(path)
+            if rebuild:
+                versions = ProjectMerge._read_versions(index)
+            stages = index.stages
+            files = [(file, ProjectMerge._size(file)) for file in index.paths]
+            files = [(file, size) for file, size in files if size is not None]  # deleted files, submodules
+        else:
+            discovery = ProjectDiscovery(path, skip_patterns)
+            files = discovery.files()
+            skipped = discovery.skipped
+
+        merges = [None] * len(files)
+        to_parse = []
+        for i, (file, _) in enumerate(files):
+            if git and file not in stages:
+                merges[i] = PassthroughFileMerge(file)
+            else:
+                to_parse.append(i)
+
+        if workers <= 1:
+            for i in to_parse:
+                merges[i] = ProjectMerge._parse_file(files[i][0], compact, lazy, versions.get(files[i][0]))
+        else:
+            order = sorted(to_parse, key=lambda i: files[i][1], reverse=True)
+            chunk_size = max(1, len(order) // (workers * 8))
+
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                parsed = executor.map(ProjectMerge._parse_file, [files[i][0] for i in order],
+                                      repeat(compact), repeat(lazy), [versions.get(files[i][0]) for i in order],
+                                      chunksize=chunk_size)
+                for i, file_merge in zip(order, parsed):
+                    merges[i] = file_merge
+
+        merges += [PassthroughFileMerge(file) for file in skipped]  # not scanned, but the build may need them
 
-            compiler = subprocess.Popen(["make", "--directory=%s" % self.tmp_path],
-                                        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            out, err = compiler.communicate()
-            print(out.decode())
-            print(err.decode(), file=sys.stderr)
+        if compile_commands:
+            database = CompileDatabase.load(compile_commands)
+            for file_merge in merges:
+                if not isinstance(file_merge, PassthroughFileMerge):  # passthrough files are never parsed
+                    file_merge.parse_args = database.args(file_merge.path) or []
 
-            if not err:
-                print("The project has been build with no errors")
+        return ProjectMerge(path, tmp_path, merges, stages)
 
-        except subprocess.CalledProcessError:
-            print("Make terminated unexpectedly")
+    @staticmethod
+    def _size(file: Path):  # -> int or None
+        """ Size of a regular file or `None` if it is missing from the working tree or is not a regular file """
+        try:
+            stat = file.stat()
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        return stat.st_size if S_ISREG(stat.st_mode) else None
 
     @staticmethod
-    def parse(path: Path, tmp_path: Path):  # -> ProjectMerge:
-        merges = []
-        for file in path.iterdir():
-            stream = file.open('r', encoding="utf-8")
-            merges.append(FileMerge.parse(file, stream))
+    def _read_versions(index: GitIndex) -> {Path: (str, str, str)}:
+        """ Base, ours and theirs texts of the unmerged C/C++ files which are present on both sides """
+        stages = {file: stages for file, stages in index.stages.items()
+                  if FileMerge.can_parse(file) and GitIndex.ours_stage in stages and GitIndex.theirs_stage in stages}
+        blobs = index.read_blobs([blob_id for file_stages in stages.values() for blob_id in file_stages.values()])
+
+        versions = {}
+        for file, file_stages in stages.items():
+            base = blobs[file_stages[GitIndex.base_stage]] if GitIndex.base_stage in file_stages else b""
+            versions[file] = (base.decode("utf-8"),
+                              blobs[file_stages[GitIndex.ours_stage]].decode("utf-8"),
+                              blobs[file_stages[GitIndex.theirs_stage]].decode("utf-8"))
 
-        return ProjectMerge(path, tmp_path, merges)
+        return versions
+
+    @staticmethod
+    def _parse_file(file: Path, compact: bool, lazy: bool, versions: (str, str, str) = None) -> FileMerge:
+        if versions:
+            return FileMerge.parse_versions(file, *versions)
+        elif lazy and FileMerge.can_parse(file):
+            conflict_count = MarkerScanner.count_markers(file)
+            if conflict_count > 0:
+                return LazyFileMerge(file, conflict_count, compact)
+        elif FileMerge.can_parse(file) and MarkerScanner.has_markers(file):
+            with file.open('r', encoding="utf-8") as stream:
+                return FileMerge.parse(file, stream, compact)
+
+        return PassthroughFileMerge(file)
@@ -0,0 +1,214 @@
+import re
+import time
+from pathlib import Path
+
+from .build_runner import BuildRunner
+from .choice import Choice
+from .file_merge import FileMerge
+from .syntax_check import SyntaxCheck, SyntaxProblem
+
+
+class SyntaxEvaluation:
+    """ Evaluates the choices of a project merge by a `SyntaxCheck`, only the changed files are parsed again """
+    def __init__(self):
+        self.check = SyntaxCheck()
+
+    def __call__(self, project_merge) -> {Path: [SyntaxProblem]}:
+        problems = {}
+        for problem in self.check.run(project_merge.files):
+            problems.setdefault(problem.path, []).append(problem)
+        return problems
+
+
+class BuildEvaluation:
+    """
+    Evaluates the choices of a project merge by building it, see `BuildRunner`.
+
+    The build folder is synced incrementally (see `BuildMirror`), so `make` rebuilds only what the changed files
+    affect. Errors are mapped back to the files and conflicts by their `path:line:` prefix;
+    the ones which name no merged file (e.g. link errors) are reported with the path `None`
+    """
+    error_line = re.compile(r'^(?P<path>[^:\s][^:]*):(?P<line>\d+):(\d+:)? (fatal )?error: (?P<message>.*)$')
+
+    def __init__(self, jobs: int = None):
+        self.jobs = jobs
+
+    def __call__(self, project_merge) -> {Path: [SyntaxProblem]}:
+        project_merge.write_result_tmp()
+        runner = BuildRunner(project_merge.tmp_path, self.jobs or project_merge.make_jobs, output=lambda line: None)
+        if runner.run():
+            return {}
+
+        files = {file.path: file for file in project_merge.files}
+        problems = {}
+        for error in runner.errors:
+            match = BuildEvaluation.error_line.match(error)
+            path = BuildEvaluation._project_path(project_merge, match.group("path")) if match else None
+
+            if path in files:
+                ranges = files[path].result_lines()
+                line = int(match.group("line"))
+                conflict = SyntaxCheck.conflict_at(ranges, [start for start, _ in ranges], line)
+                problems.setdefault(path, []).append(SyntaxProblem(path, line, match.group("message"), conflict))
+            elif "] Error " not in error:  # not the summary of `make`
+                problems.setdefault(None, []).append(SyntaxProblem(None, 0, error, -1))
+
+        return problems or {None: [SyntaxProblem(None, 0, str(runner), -1)]}
+
+    @staticmethod
+    def _project_path(project_merge, path: str):  # -> Path or None
+        """ The project file which `path` (as printed by the build in the build folder) is the result of """
+        built = (project_merge.tmp_path / path).resolve()
+        try:
+            return project_merge.path / built.relative_to(project_merge.tmp_path.resolve())
+        except ValueError:
+            return None
+
+
+class ChoiceSolver:
+    """
+    Searches for choices of the undecided conflicts of a project merge which make it compile.
+
+    Every file with undecided conflicts is searched on its own, the searches advance in lockstep:
+    each evaluation (a build or a syntax check, see `SyntaxEvaluation` and `BuildEvaluation`) tries the next
+    candidate of every file at once, since the errors of a file depend only on its own choices.
+    A search tries the whole-side choices first. From the one with the fewest errors it then bisects:
+    the conflicts the errors point to (all of them, if an error is outside of the conflicts) are switched
+    to another choice as a group, then as halves of the group and so on, keeping every switch which lowers
+    the number of errors of the file.
+
+    The search stops when the budget of evaluations or seconds runs out; the best choices found are kept.
+    The choices of the conflicts are restored, `apply` selects the found ones.
+    """
+    whole_side = "whole-side"
+    bisection = "bisection"
+    candidates = [Choice.left, Choice.right, Choice.both]
+
+    def __init__(self, evaluate=None, max_builds: int = 64, max_seconds: float = 300.0):
+        """
+        :param evaluate: called with the project merge, returns the problems of the current choices by file path
+
+        :ivar builds:  number of evaluations by the strategy they were made for. An evaluation made for
+                       several strategies at once (by different files) counts for each of them
+        :ivar seconds: wall-clock time of the last `solve`
+        :ivar exhausted: whether the last `solve` stopped because of the budget
+        """
+        self.evaluate = evaluate or SyntaxEvaluation()
+        self.max_builds = max_builds
+        self.max_seconds = max_seconds
+
+        self.builds = {ChoiceSolver.whole_side: 0, ChoiceSolver.bisection: 0}
+        self.seconds = 0.0
+        self.exhausted = False
+        self._best = {}  # {FileMerge: ([Choice], number of problems)}
+
+    def __str__(self):
+        return "Solver: %s in %.1f s%s" % (", ".join("%d builds for %s" % (n, strategy)
+                                                      for strategy, n in self.builds.items()),
+                                            self.seconds, ", the budget ran out" if self.exhausted else "")
+
+    def solve(self, project_merge) -> {FileMerge: [Choice]}:
+        """ The best choices found for the undecided conflicts of every file, in the order of the conflicts """
+        start = time.perf_counter()
+        self.builds = {ChoiceSolver.whole_side: 0, ChoiceSolver.bisection: 0}
+        self.exhausted = False
+        self._best = {}
+
+        files = [file for file in project_merge.files if SyntaxCheck.needs_check(file) and not file.is_resolved()]
+        undecided = {file: [i for i, conflict in enumerate(file.conflicts) if not conflict.is_resolved()]
+                     for file in files}
+
+        searches = {}
+        candidates = {}  # {FileMerge: (strategy, [Choice])}
+        for file in files:
+            searches[file] = self._search(file, undecided[file])
+            candidates[file] = next(searches[file])
+
+        try:
+            while candidates:
+                if sum(self.builds.values()) >= self.max_builds or time.perf_counter() - start >= self.max_seconds:
+                    self.exhausted = True
+                    break
+
+                for file, (_, choices) in candidates.items():
+                    ChoiceSolver._select(file, undecided[file], choices)
+                for strategy in set(strategy for strategy, _ in candidates.values()):
+                    self.builds[strategy] += 1
+
+                problems = self.evaluate(project_merge)
+                unattributed = problems.get(None, [])
+
+                for file in list(candidates):
+                    try:
+                        candidates[file] = searches[file].send(problems.get(file.path, []) + unattributed)
+                    except StopIteration:
+                        del candidates[file]
+                        ChoiceSolver._select(file, undecided[file], self._best[file][0])  # while the others go on
+        finally:
+            for file in files:
+                ChoiceSolver._select(file, undecided[file], [Choice.undecided] * len(undecided[file]))
+            self.seconds = time.perf_counter() - start
+
+        return {file: self._best[file][0] for file in files if file in self._best}
+
+    def problems(self, file: FileMerge) -> int:
+        """ Number of errors of the best choices found for `file` """
+        return self._best[file][1]
+
+    @staticmethod
+    def apply(solution: {FileMerge: [Choice]}):
+        for file, choices in solution.items():
+            undecided = [i for i, conflict in enumerate(file.conflicts) if not conflict.is_resolved()]
+            ChoiceSolver._select(file, undecided, choices)
+
+    @staticmethod
+    def _select(file: FileMerge, undecided: [int], choices: [Choice]):
+        for i, choice in zip(undecided, choices):
+            if file.conflicts[i].choice is not choice:
+                file.conflicts[i].select(choice)
+
+    def _search(self, file: FileMerge, undecided: [int]):
+        """
+        Yields `(strategy, choices)` candidates for the `undecided` conflicts of `file`,
+        receives the problems of each of them
+        """
+        n = len(undecided)
+        positions = {i: position for position, i in enumerate(undecided)}
+
+        best, best_problems = None, None
+        for choice in ChoiceSolver.candidates:
+            choices = [choice] * n
+            problems = yield ChoiceSolver.whole_side, choices
+            if best is None or len(problems) < len(best_problems):
+                best, best_problems = choices, problems
+                self._best[file] = (best, len(best_problems))
+            if not problems:
+                return
+
+        while best_problems:
+            suspects = sorted(set(positions[problem.conflict] for problem in best_problems
+                                  if problem.conflict in positions))
+            if not suspects or any(problem.conflict == -1 for problem in best_problems):
+                suspects = list(range(n))
+
+            improved = False
+            groups = [suspects]
+            while groups and not improved:
+                group = groups.pop(0)
+                for choice in ChoiceSolver.candidates:
+                    choices = [choice if position in group else best[position] for position in range(n)]
+                    if choices == best:
+                        continue
+
+                    problems = yield ChoiceSolver.bisection, choices
+                    if len(problems) < len(best_problems):
+                        best, best_problems = choices, problems
+                        self._best[file] = (best, len(best_problems))
+                        improved = True
+                        break
+
+                if not improved and len(group) > 1:
+                    groups += [group[:len(group) // 2], group[len(group) // 2:]]
+
+            if not improved:
+                return
@@ -0,0 +1,138 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .choice import Choice
+from .conflict import Conflict
+from .file_merge import FileMerge
+from .syntax_check import SyntaxCheck, SyntaxProblem
+
+
+class Speculation:
+    """
+    Checks the choices of the conflict on screen in the background while the user decides, see `SyntaxCheck`.
+
+    Every choice of `choices` is rendered into a text of the file (the other conflicts as chosen, the undecided ones
+    as `Choice.left`) on the calling thread and parsed on one of `workers` threads. A choice is fine if there are
+    no errors in the lines of the conflict nor outside of the conflicts.
+    Starting the speculation of another conflict cancels the checks which have not started yet,
+    the results of the running ones are dropped.
+    """
+    choices = [Choice.left, Choice.right, Choice.both]
+
+    def __init__(self, workers: int = 2, report=None):
+        """
+        :param report: called from a worker thread with the status of a conflict when all its choices are checked,
+                       only if the conflict is still the current one
+        """
+        self.workers = workers
+        self.report = report
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="speculation")
+        self._lock = threading.Lock()
+
+        self._conflict = None   # the current conflict
+        self._version = None    # of the file when the checks of the current conflict started
+        self._futures = {}      # {Choice: Future of [SyntaxProblem]} of the current conflict
+        self._reported = None   # the futures whose status was reported
+
+    def start(self, file: FileMerge, conflict: Conflict):
+        """ Starts checking the choices of `conflict` of `file`, unless they are being checked already """
+        if not SyntaxCheck.needs_check(file):
+            return
+
+        version = Speculation._version_of(file)
+        with self._lock:
+            if conflict is self._conflict and version == self._version:
+                return
+
+        i = next(i for i, c in enumerate(file.conflicts) if c is conflict)
+        texts = {choice: Speculation.render(file, i, choice) for choice in Speculation.choices}
+
+        with self._lock:
+            stale = self._futures
+            self._conflict = conflict
+            self._version = version
+            self._futures = futures = {choice: self._executor.submit(Speculation._check, file, i, text, ranges)
+                                       for choice, (text, ranges) in texts.items()}
+
+        # outside of the lock: a cancelled or a finished future calls back at once
+        Speculation._cancel(stale)
+        for future in futures.values():
+            future.add_done_callback(lambda _: self._finished(conflict, futures))
+
+    def status(self, conflict: Conflict) -> str:
+        """ What is known about the choices of `conflict`, empty if it is not the current one """
+        with self._lock:
+            if conflict is not self._conflict:
+                return ""
+            futures = dict(self._futures)
+
+        parts = []
+        for choice, future in futures.items():
+            if not future.done():
+                state = "checking"
+            elif future.cancelled() or future.exception() is not None:
+                state = "unknown"
+            elif not future.result():
+                state = "compiles"
+            else:
+                state = "%d errors" % len(future.result())
+            parts.append("%s %s" % (choice.name, state))
+
+        return "Speculation: " + ", ".join(parts)
+
+    def stop(self):
+        with self._lock:
+            stale = self._futures
+            self._conflict = None
+            self._futures = {}
+        Speculation._cancel(stale)
+
+    def shutdown(self):
+        self.stop()
+        self._executor.shutdown(wait=False)
+
+    def _finished(self, conflict: Conflict, futures: {Choice: Future}):
+        with self._lock:
+            if futures is not self._futures or self._reported is futures \
+                    or not all(future.done() for future in futures.values()):
+                return  # every future calls back, only the first one to see all of them done reports
+            self._reported = futures
+
+        if self.report:
+            self.report(self.status(conflict))
+
+    @staticmethod
+    def _cancel(futures: {Choice: Future}):
+        for future in futures.values():
+            future.cancel()
+
+    @staticmethod
+    def _version_of(file: FileMerge) -> int:
+        return sum(conflict.version for conflict in file.conflicts) + sum(bit.version for bit in file.file_bits)
+
+    @staticmethod
+    def render(file: FileMerge, i: int, choice: Choice) -> (str, [(int, int)]):
+        """ Text of `file` with the conflict `i` rendered as `choice`, with the line ranges of the conflicts """
+        pieces = [file.file_bits[0].text]
+        ranges = []
+        line = 1 + file.file_bits[0].lines.count()
+
+        for j, (conflict, file_bit) in enumerate(zip(file.conflicts, file.file_bits[1:])):
+            if j == i:
+                text = conflict.result(choice)
+            else:
+                text = conflict.result(conflict.choice if conflict.is_resolved() else Choice.left)
+
+            end = line + text.count('\n')
+            ranges.append((line, end))
+            pieces.append(text)
+            pieces.append(file_bit.text)
+            line = end + file_bit.lines.count()
+
+        return "".join(pieces), ranges
+
+    @staticmethod
+    def _check(file: FileMerge, i: int, text: str, ranges: [(int, int)]) -> [SyntaxProblem]:
+        """ Errors which depend on the choice of the conflict `i`: in its lines or outside of all the conflicts """
+        problems = SyntaxCheck.problems(file.path, file.parse_args, text, ranges)
+        return [problem for problem in problems if problem.conflict in (i, -1)]
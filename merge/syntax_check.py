@@ -0,0 +1,166 @@
+import hashlib
+import time
+from bisect import bisect_right
+from pathlib import Path
+
+from clang.cindex import Diagnostic, TranslationUnit
+
+from .ast_cache import AstCache
+from .file_merge import FileMerge, PassthroughFileMerge, LazyFileMerge
+
+
+class SyntaxProblem:
+    """ An error libclang reported in the result of a file, with the conflict it comes from """
+    __slots__ = ('path', 'line', 'message', 'conflict')
+
+    def __init__(self, path: Path, line: int, message: str, conflict: int):
+        """
+        :ivar line:     line of the error in the result, counting from `1`, `0` for an error in a header
+        :ivar conflict: position of the conflict whose lines contain the error, `-1` if it is outside of the conflicts
+        """
+        self.path = path
+        self.line = line
+        self.message = message
+        self.conflict = conflict
+
+    def __eq__(self, other):
+        return isinstance(other, SyntaxProblem) and (self.path, self.line, self.message, self.conflict) == \
+               (other.path, other.line, other.message, other.conflict)
+
+    def __repr__(self):
+        return "SyntaxProblem(%s, %d, %r, %d)" % (self.path, self.line, self.message, self.conflict)
+
+    def __str__(self):
+        where = "conflict %d" % (self.conflict + 1) if self.conflict != -1 else "outside of the conflicts"
+        return "%s:%d: %s (%s)" % (self.path, self.line, self.message, where)
+
+
+class SyntaxCheck:
+    """
+    A quick check of a project merge without building it: the results of the C/C++ files are parsed
+    with their real arguments (see `FileMerge.parse_args`) and the errors libclang reports are collected.
+
+    Only the files whose result changed since the previous `run` are parsed, concurrently on the threads of
+    `FileMerge.parse_executor`; the problems of the others are remembered. A changed result is reparsed in the unit
+    of the previous result of the file, results with equal texts share translation units through `AstCache`.
+    Errors in included headers are reported outside of the conflicts.
+    """
+    def __init__(self):
+        """
+        :ivar checked: number of files parsed by the last `run`
+        :ivar reused:  number of files whose problems the last `run` took from the previous ones
+        :ivar seconds: wall-clock time of the last `run`
+        """
+        self.checked = 0
+        self.reused = 0
+        self.seconds = 0.0
+        self._results = {}  # {Path: (digest of the result, [SyntaxProblem])}
+        self._units = {}    # {Path: (TranslationUnit, args)} of the last result of every file
+
+    def __str__(self):
+        return "Syntax check: %d files checked, %d unchanged, in %.2f s" % (self.checked, self.reused, self.seconds)
+
+    @staticmethod
+    def needs_check(file: FileMerge) -> bool:
+        return not isinstance(file, PassthroughFileMerge) and FileMerge.can_parse(file.path) \
+               and not (isinstance(file, LazyFileMerge) and not file.is_loaded())
+
+    def run(self, files: [FileMerge]) -> [SyntaxProblem]:
+        """ Problems of all the checkable `files`, in the order of the files """
+        start = time.perf_counter()
+        self.checked = 0
+        self.reused = 0
+
+        files = [file for file in files if SyntaxCheck.needs_check(file)]
+        texts = {file.path: file.result() for file in files}
+        digests = {path: hashlib.blake2b(text.encode("utf-8", "surrogateescape"), digest_size=16).digest()
+                   for path, text in texts.items()}
+
+        executor = FileMerge.parse_executor()
+        futures = {}
+        for file in files:
+            previous = self._results.get(file.path)
+            if previous is None or previous[0] != digests[file.path]:
+                futures[file.path] = executor.submit(self._check, file, texts[file.path], file.result_lines())
+
+        problems = []
+        for file in files:
+            future = futures.get(file.path)
+            if future is None:
+                self.reused += 1
+            else:
+                self._results[file.path] = (digests[file.path], future.result())
+                self.checked += 1
+            problems += self._results[file.path][1]
+
+        self.seconds = time.perf_counter() - start
+        return problems
+
+    def _check(self, file: FileMerge, text: str, ranges: [(int, int)]) -> [SyntaxProblem]:
+        """ `problems` of `text`, the result of `file`, reparsed in the unit of the previous result of the file """
+        previous, previous_args = self._units.pop(file.path, (None, None))
+        if any(unit is previous for unit, _ in file._translation_units.values()):
+            previous = None  # the unit of a version of the file is not changed under it
+
+        translation_unit, args = SyntaxCheck.parse(file.path, file.parse_args, text, previous, previous_args)
+        if translation_unit is not None:
+            self._units[file.path] = (translation_unit, args)
+        return SyntaxCheck.unit_problems(file.path, translation_unit, ranges)
+
+    @staticmethod
+    def problems(path: Path, args: [str], text: str, ranges: [(int, int)]) -> [SyntaxProblem]:
+        """
+        Errors of `text`, a version of the file at `path`, parsed with `args`
+
+        :param ranges: line ranges of the conflicts in `text`, see `FileMerge.result_lines`
+        """
+        translation_unit, _ = SyntaxCheck.parse(path, args, text)
+        return SyntaxCheck.unit_problems(path, translation_unit, ranges)
+
+    @staticmethod
+    def parse(path: Path, args: [str], text: str, previous: TranslationUnit = None, previous_args: [str] = None):
+        """
+        `(translation unit, args)` of `text`, the unit is `None` if the text could not be parsed
+
+        :param previous: unit of another version of the file parsed with `previous_args`, it is reparsed with `text`
+                         if the arguments are the same, see `AstCache.parse`
+        """
+        if FileMerge.preamble_cache:
+            text, args = FileMerge.preamble_cache.prepare(path, text, args)
+
+        previous = previous if previous_args == args else None
+        return AstCache.shared().parse(str(path), text, args, previous=previous), args
+
+    @staticmethod
+    def unit_problems(path: Path, translation_unit: TranslationUnit, ranges: [(int, int)]) -> [SyntaxProblem]:
+        """ Errors of `translation_unit` of the file at `path`, see `problems` """
+        if translation_unit is None:
+            return [SyntaxProblem(path, 0, "the file could not be parsed", -1)]
+
+        starts = [start for start, _ in ranges]
+
+        problems = []
+        for diagnostic in translation_unit.diagnostics:
+            if diagnostic.severity < Diagnostic.Error:
+                continue
+
+            location = diagnostic.location
+            if location.file is None or location.file.name != str(path):  # in a header
+                where = "%s:%d: " % (location.file.name, location.line) if location.file else ""
+                problems.append(SyntaxProblem(path, 0, where + diagnostic.spelling, -1))
+                continue
+
+            conflict = SyntaxCheck.conflict_at(ranges, starts, location.line)
+            problems.append(SyntaxProblem(path, location.line, diagnostic.spelling, conflict))
+
+        return problems
+
+    @staticmethod
+    def conflict_at(ranges: [(int, int)], starts: [int], line: int) -> int:
+        """
+        Position of the conflict whose lines contain `line`, `-1` if there is none. An empty conflict has its line
+
+        :param starts: the first lines of `ranges`
+        """
+        i = bisect_right(starts, line) - 1
+        return i if i >= 0 and line < max(ranges[i][1], ranges[i][0] + 1) else -1
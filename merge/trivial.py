@@ -0,0 +1,159 @@
+import re
+import threading
+
+from .choice import Choice
+from .conflict import Conflict, Conflict2Way
+from .file_merge import FileMerge, LazyFileMerge
+
+
+class TrivialResolver:
+    """
+    Settles the undecided conflicts which need no human, by the first of the rules:
+
+    - `identical`:       both sides are equal, `Choice.left`
+    - `whitespace`:      the sides differ only in whitespace or line endings, `Choice.left`
+    - `left unchanged`:  the left side equals the base (up to whitespace), only the right one changed, `Choice.right`
+    - `right unchanged`: the right side equals the base (up to whitespace), `Choice.left`
+
+    The base rules only apply to 3-way conflicts. Parts are equal up to whitespace if their C/C++ token streams
+    are equal, see `tokens`. Only the parts which are equal once all the whitespace is removed are tokenized,
+    so every part is read a constant number of times.
+    Lazy files which are not loaded yet are settled when they are loaded by `LazyFileMerge.trivial_resolver`,
+    the numbers of the resolver grow then.
+    """
+    identical = "identical"
+    whitespace = "whitespace"
+    left_unchanged = "left unchanged"
+    right_unchanged = "right unchanged"
+    rules = [identical, whitespace, left_unchanged, right_unchanged]
+
+    def __init__(self):
+        """
+        :ivar examined:  number of undecided conflicts the last `run` looked at
+        :ivar resolved:  number of conflicts the last `run` settled by every rule
+        :ivar decisions: `(path, line number, rule, choice)` of every settled conflict
+        :ivar deferred:  number of lazy files the last `run` left to be settled when they are loaded
+        """
+        self.examined = 0
+        self.resolved = {rule: 0 for rule in TrivialResolver.rules}
+        self.decisions = []
+        self.deferred = 0
+        self._lock = threading.Lock()  # lazy files are loaded by prefetching threads too
+
+    def __str__(self):
+        return "Trivial conflicts: %d of %d resolved (%s)%s" % \
+               (sum(self.resolved.values()), self.examined,
+                ", ".join("%s %d" % (rule, count) for rule, count in self.resolved.items()),
+                ", lazy files settled when loaded: %d" % self.deferred if self.deferred else "")
+
+    token = re.compile(r"""
+        (?P<newline>\n)
+        |(?P<space>(?:[ \t\r\f\v]|\\\r?\n)+)
+        |(?P<comment>//(?:[^\n\\]|\\.)*|/\*.*?\*/)
+        |(?P<literal>(?:u8|[uUL])?R"(?P<delimiter>[^()\\\s]{0,16})\(.*?\)(?P=delimiter)"
+                    |(?:u8|[uUL])?"(?:\\.|[^"\\\n])*"|(?:u8|[uUL])?'(?:\\.|[^'\\\n])*')
+        |(?P<number>\.?\d(?:[eEpP][+-]|[\w.'])*)
+        |(?P<identifier>[A-Za-z_]\w*)
+        |(?P<punctuator>>>=|<<=|->\*|\.\.\.|<=>|::|->|\+\+|--|<<|>>|&&|\|\||\#\#|[-+*/%&|^!=<>]=|.)
+        """, re.VERBOSE | re.DOTALL)
+    line_end = "\n"  # the token of a line end which ends a `//` comment or a preprocessor directive
+
+    @staticmethod
+    def tokens(text: str) -> [str]:
+        """
+        C/C++ tokens of `text`. String and character literals and comments are single tokens, so the whitespace
+        inside them matters; a line end matters after a `//` comment and at the end of a preprocessor directive,
+        as does a space between the name of a defined macro and its `(`. Other whitespace is dropped
+        """
+        tokens = []
+        line_start = True
+        directive = False  # the tokens of the directive on the current line so far, `False` outside of one
+        spaced = False     # whether whitespace precedes the current token
+
+        for match in TrivialResolver.token.finditer(text):
+            kind = match.lastgroup
+            value = match.group(kind) if kind != "literal" else match.group(0)
+
+            if kind == "newline":
+                if directive is not False or (tokens and tokens[-1].startswith("//")):
+                    tokens.append(TrivialResolver.line_end)
+                line_start = True
+                directive = False
+                spaced = True
+                continue
+            if kind == "space":
+                spaced = True
+                continue
+
+            if kind == "comment":
+                value = value.replace("\r\n", "\n").rstrip()
+            elif value == "#" and line_start:
+                directive = 0
+            elif directive is not False:
+                directive += 1
+                if directive == 3 and value == "(" and not spaced and tokens[-2] == "define":
+                    value = "define("  # a function-like macro
+
+            tokens.append(value)
+            line_start = False
+            spaced = False
+
+        return tokens
+
+    @staticmethod
+    def equal_tokens(a: str, b: str) -> bool:
+        """ Whether `a` and `b` differ only in the whitespace which does not matter, see `tokens` """
+        return a == b or ("".join(a.split()) == "".join(b.split())
+                          and TrivialResolver.tokens(a) == TrivialResolver.tokens(b))
+
+    @staticmethod
+    def classify(conflict: Conflict):  # -> (str, Choice) or None
+        """ The rule which settles `conflict` and the choice it makes, `None` if the conflict is not trivial """
+        left = conflict.left
+        right = conflict.right
+        if left == right:
+            return TrivialResolver.identical, Choice.left
+
+        if TrivialResolver.equal_tokens(left, right):
+            return TrivialResolver.whitespace, Choice.left
+
+        if isinstance(conflict, Conflict2Way):
+            return None
+
+        base = conflict.base
+        if TrivialResolver.equal_tokens(left, base):
+            return TrivialResolver.left_unchanged, Choice.right
+        if TrivialResolver.equal_tokens(right, base):
+            return TrivialResolver.right_unchanged, Choice.left
+
+        return None
+
+    def run(self, files: [FileMerge]) -> int:
+        """ Selects the choices of the trivial conflicts of `files`, returns the number of them """
+        self.examined = 0
+        self.resolved = {rule: 0 for rule in TrivialResolver.rules}
+        self.decisions = []
+        self.deferred = 0
+
+        for file in files:
+            if isinstance(file, LazyFileMerge) and not file.is_loaded():
+                self.deferred += 1
+            else:
+                self.resolve(file)
+
+        return sum(self.resolved.values())
+
+    def resolve(self, file: FileMerge):
+        """ Selects the choices of the trivial conflicts of `file`, counting them with the ones of the last `run` """
+        for conflict in file.conflicts:
+            if conflict.is_resolved():
+                continue
+
+            decision = TrivialResolver.classify(conflict)
+            with self._lock:
+                self.examined += 1
+                if decision:
+                    rule, choice = decision
+                    conflict.select(choice)
+                    self.resolved[rule] += 1
+                    self.decisions.append((file.path, conflict.line_number, rule, choice))
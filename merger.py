@@ -5,6 +5,13 @@ from merge.external_parser_setup import ExternalParserSetup
 from ui.cli_args import parse_cli_args
 from ui.cli_event_loop import resolve_conflicts_event_loop
 from merge.project_merge import ProjectMerge
+from merge.analysis import ProjectAnalysis
+from merge.ast_cache import AstCache
+from merge.ast_traversal import PrunedTraversal
+from merge.file_merge import FileMerge, LazyFileMerge
+from merge.preamble import PreambleCache
+from merge.speculation import Speculation
+from merge.trivial import TrivialResolver
 
 
 if __name__ == "__main__":
@@ -23,14 +30,36 @@ if __name__ == "__main__":
         print("Unable to build the project")
         quit()
 
+    if args.includes:
+        FileMerge.preamble_cache = PreambleCache()
+
     tmp_path = project_path.parent / ("~" + str(project_path.parts[-1]))
-    merge = ProjectMerge.parse(project_path, tmp_path)
+    merge = ProjectMerge.parse(project_path, tmp_path, compact=args.compact, lazy=args.lazy,
+                                workers=args.jobs, git=args.git, rebuild=args.rebuild,
+                                compile_commands=Path(args.compile_commands) if args.compile_commands else None)
+    merge.make_jobs = args.make_jobs
+    merge.solver_budget = (args.solve_builds, args.solve_seconds)
+
+    analysis = ProjectAnalysis(args.jobs)  # lazy files are refactored when loaded
+    analysis.run(merge.files)
 
-    for file in merge.files:
-        file.refactor_syntax_blocks()
+    if args.verbose:
+        print(analysis)
+        print(AstCache.shared())
+        print(PrunedTraversal.summary())
+        if FileMerge.preamble_cache:
+            print(FileMerge.preamble_cache)
 
     merge.select_all(args.choice)
 
+    if args.trivial:
+        trivial = LazyFileMerge.trivial_resolver = TrivialResolver()
+        trivial.run(merge.files)
+        print(trivial)
+        if args.verbose:
+            for path, line_number, rule, choice in trivial.decisions:
+                print("%s:%d: %s, %s" % (path, line_number, rule, choice.name))
+
     if merge.is_resolved():
         print("The project %s has no conflicts to resolve" % project_path)
         quit()
@@ -39,6 +68,9 @@ if __name__ == "__main__":
         print("Makefile cannot be in the merging state")
         quit()
 
-    resolve_conflicts_event_loop(merge)  # changes `merge`
+    speculation = Speculation(args.speculate, report=lambda status: print("\n" + status)) if args.speculate else None
+    resolve_conflicts_event_loop(merge, speculation)  # changes `merge`
+    if speculation:
+        speculation.shutdown()
 
     merge.compile_print()
@@ -0,0 +1,70 @@
+from io import StringIO
+from pathlib import Path
+from unittest import TestCase
+
+from merge.analysis import ProjectAnalysis
+from merge.file_merge import FileMerge, PassthroughFileMerge
+
+
+CODE = ("int f%d() {\n"
+        "    if(1 > 2) {\n"
+        "        printf(\"Hello!\")\n"
+        "<<<<<<< HEAD\n"
+        "        int n = 0;\n"
+        "    }\n"
+        "=======\n"
+        "        int x = 0;\n"
+        "    }\n"
+        ">>>>>>> master\n"
+        "}\n")
+
+EXPECTED = ("int f%d() {\n"
+            "<<<<<<< HEAD\n"
+            "    if(1 > 2) {\n"
+            "        printf(\"Hello!\")\n"
+            "        int n = 0;\n"
+            "    }\n"
+            "=======\n"
+            "    if(1 > 2) {\n"
+            "        printf(\"Hello!\")\n"
+            "        int x = 0;\n"
+            "    }\n"
+            ">>>>>>> master\n"
+            "}\n")
+
+
+class TestProjectAnalysis(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from merge.external_parser_setup import ExternalParserSetup
+        ExternalParserSetup.setup()
+
+    def files(self) -> [FileMerge]:
+        return [FileMerge.parse(Path("prog%d.c" % i), StringIO(CODE % i)) for i in range(3)] + \
+               [PassthroughFileMerge(Path("Makefile"))]
+
+    def test_adjustments(self):
+        file_merge = self.files()[0]
+        replayed = self.files()[0]
+
+        adjustments = file_merge.refactor_syntax_blocks()
+        self.assertListEqual(adjustments, [(FileMerge.extend_up, 0, 2)])
+
+        replayed.apply_adjustments(adjustments)
+        self.assertEqual(replayed.result(), file_merge.result())
+
+    def test_run(self):
+        files = self.files()
+        analysis = ProjectAnalysis()
+        analysis.run(files)
+
+        self.assertListEqual([file.result() for file in files[:3]], [EXPECTED % i for i in range(3)])
+        self.assertSetEqual(set(analysis.timings), {Path("prog0.c"), Path("prog1.c"), Path("prog2.c")})
+
+    def test_run_parallel(self):
+        files = self.files()
+        analysis = ProjectAnalysis(workers=2)
+        analysis.run(files)
+
+        self.assertListEqual([file.result() for file in files[:3]], [EXPECTED % i for i in range(3)])
+        self.assertEqual(len(analysis.timings), 3)
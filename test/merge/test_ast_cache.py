@@ -0,0 +1,67 @@
+from threading import Thread
+from unittest import TestCase
+
+from merge.ast_cache import AstCache
+
+
+class TestAstCache(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from merge.external_parser_setup import ExternalParserSetup
+        ExternalParserSetup.setup()
+
+    def test_hit(self):
+        cache = AstCache()
+        first = cache.parse("a.c", "int a;\n")
+        second = cache.parse("a.c", "int a;\n")
+
+        self.assertIs(first, second)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_key(self):
+        cache = AstCache()
+        units = [cache.parse("a.c", "int a;\n"), cache.parse("b.c", "int a;\n"),
+                 cache.parse("a.c", "int a;\n", ["-DX"]), cache.parse("a.c", "int b;\n")]
+
+        self.assertEqual(len(set(map(id, units))), 4)
+        self.assertEqual(cache.misses, 4)
+
+    def test_evict_by_count(self):
+        cache = AstCache(max_entries=2)
+        first = cache.parse("a.c", "int a;\n")
+        cache.parse("a.c", "int b;\n")
+        cache.parse("a.c", "int a;\n")  # `a` becomes the most recently used
+        cache.parse("a.c", "int c;\n")
+
+        self.assertEqual(cache.evictions, 1)
+        self.assertIs(cache.parse("a.c", "int a;\n"), first)
+        self.assertEqual(cache.misses, 3)
+
+    def test_evict_by_size(self):
+        cache = AstCache(max_bytes=10 * AstCache.bytes_per_char)
+        cache.parse("a.c", "int a;\n")
+        cache.parse("a.c", "int b;\n")
+
+        self.assertEqual((len(cache), cache.evictions), (1, 1))
+
+    def test_concurrent(self):
+        cache = AstCache()
+        threads = [Thread(target=cache.parse, args=("a.c", "int a;\n")) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+    def test_reparse(self):
+        cache = AstCache()
+        previous = cache.parse("a.c", "int a;\n")
+        reparsed = cache.parse("a.c", "int b;\nint c;\n", previous=previous)
+
+        self.assertIs(reparsed, previous)
+        self.assertEqual([cursor.spelling for cursor in reparsed.cursor.get_children()], ["b", "c"])
+        self.assertEqual((len(cache), cache.misses, cache.reparses), (1, 2, 1))
+
+        self.assertIs(cache.parse("a.c", "int b;\nint c;\n"), reparsed)
+        self.assertIsNot(cache.parse("a.c", "int a;\n"), reparsed)
@@ -0,0 +1,75 @@
+from io import StringIO
+from pathlib import Path
+from unittest import TestCase
+
+from clang.cindex import CursorKind
+
+from merge.ast_snapshot import AstSnapshot
+from merge.ast_traversal import PrunedTraversal
+from merge.block import Block
+from merge.choice import Choice
+from merge.conflict_index import ConflictIndex
+from merge.file_merge import FileMerge
+import merge.cursor_utils
+
+
+class TestAstSnapshot(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from merge.external_parser_setup import ExternalParserSetup
+        ExternalParserSetup.setup()
+
+    def setUp(self):
+        code = ("int f(int a) {\n"
+                "    if (a > 0) {\n"
+                "        a -= 1;\n"
+                "    } else if (a < -5)\n"
+                "        a += 1;\n"
+                "    return a;\n"
+                "}\n"
+                "int g(int b) {\n"
+                "    if (b > 0) {\n"
+                "<<<<<<< ours\n"
+                "        b -= 1;\n"
+                "=======\n"
+                "        b -= 2;\n"
+                ">>>>>>> theirs\n"
+                "    }\n"
+                "    return b;\n"
+                "}\n")
+        self.file_merge = FileMerge.parse(Path("prog.c"), StringIO(code))
+        self.ast = self.file_merge.abstract_syntax_tree(Choice.left)
+
+    def test_columns(self):
+        snapshot = AstSnapshot.build(self.ast)
+
+        cursors = list(FileMerge._get_children_recursive(self.ast.cursor))
+        self.assertEqual(len(snapshot), len(cursors))
+        self.assertListEqual(list(snapshot.kinds), [cursor.kind.value for cursor in cursors])
+        self.assertListEqual(list(snapshot.starts), [cursor.start for cursor in cursors])
+        self.assertListEqual(list(snapshot.ends), [cursor.end for cursor in cursors])
+        self.assertListEqual(list(snapshot.files), [0] * len(cursors))
+
+        functions = snapshot.find(CursorKind.FUNCTION_DECL)
+        self.assertListEqual([snapshot.parents[i] for i in functions], [-1, -1])
+        self.assertListEqual([snapshot.kinds[i] for i in snapshot.children(functions[0])],
+                             [CursorKind.PARM_DECL.value, CursorKind.COMPOUND_STMT.value])
+
+    def test_structure_of_if(self):
+        snapshot = AstSnapshot.build(self.ast)
+        statements = FileMerge.extract_children(self.ast.cursor, [CursorKind.IF_STMT])
+        nodes = snapshot.find(CursorKind.IF_STMT)
+
+        self.assertEqual(len(nodes), 3)
+        for statement, node in zip(statements, nodes):
+            self.assertListEqual([(b.start, b.end) for b in Block.structure_of_IF(statement)],
+                                 [(b.start, b.end) for b in Block.structure_of_if_node(snapshot, node)])
+
+    def test_pruned(self):
+        traversal = PrunedTraversal(self.ast.spelling, ConflictIndex(self.file_merge.conflicts, Choice.left))
+        snapshot = AstSnapshot.build(self.ast, traversal)
+
+        self.assertListEqual([snapshot.starts[i] for i in snapshot.find(CursorKind.IF_STMT)], [9])
+        self.assertEqual(snapshot.expanded.count(0), traversal.pruned)
+        self.assertEqual(len(snapshot), traversal.visited)
+        self.assertGreater(traversal.pruned, 0)
@@ -0,0 +1,58 @@
+from io import StringIO
+from pathlib import Path
+from unittest import TestCase
+
+from clang.cindex import CursorKind
+
+from merge.ast_traversal import PrunedTraversal
+from merge.choice import Choice
+from merge.conflict_index import ConflictIndex
+from merge.file_merge import FileMerge
+import merge.cursor_utils
+
+
+class TestPrunedTraversal(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from merge.external_parser_setup import ExternalParserSetup
+        ExternalParserSetup.setup()
+
+    def setUp(self):
+        code = ("int f(int a) {\n"
+                "    if (a > 0) {\n"
+                "        a -= 1;\n"
+                "    }\n"
+                "    return a;\n"
+                "}\n"
+                "int g(int b) {\n"
+                "    if (b > 0) {\n"
+                "<<<<<<< ours\n"
+                "        b -= 1;\n"
+                "=======\n"
+                "        b -= 2;\n"
+                ">>>>>>> theirs\n"
+                "    }\n"
+                "    return b;\n"
+                "}\n")
+        self.file_merge = FileMerge.parse(Path("prog.c"), StringIO(code))
+        self.ast = self.file_merge.abstract_syntax_tree(Choice.left)
+
+    def test_extract_near_conflicts(self):
+        traversal = PrunedTraversal(self.ast.spelling, ConflictIndex(self.file_merge.conflicts, Choice.left))
+        if_statements = traversal.extract(self.ast.cursor, [CursorKind.IF_STMT])
+
+        self.assertListEqual([stmt.start for stmt in if_statements], [8])
+        self.assertGreater(traversal.pruned, 0)
+        self.assertLess(traversal.visited, len(list(FileMerge._get_children_recursive(self.ast.cursor))))
+
+    def test_extract_main_file(self):
+        traversal = PrunedTraversal(self.ast.spelling)
+        if_statements = traversal.extract(self.ast.cursor, [CursorKind.IF_STMT])
+
+        self.assertListEqual([stmt.start for stmt in if_statements], [2, 8])
+        self.assertEqual(traversal.pruned, 0)
+
+    def test_extract_other_file(self):
+        traversal = PrunedTraversal("other.c")
+        self.assertListEqual(traversal.extract(self.ast.cursor, [CursorKind.IF_STMT]), [])
+        self.assertEqual(traversal.visited, traversal.pruned)
@@ -0,0 +1,161 @@
+import errno
+import os
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from merge.build_mirror import BuildMirror, FileCloner
+from merge.choice import Choice
+from merge.file_merge import FileMerge, PassthroughFileMerge, LazyFileMerge
+
+
+class TestBuildMirror(TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.project = Path(self._tmp.name) / "project"
+        (self.project / "src" / "lib").mkdir(parents=True)
+        (self.project / "Makefile").write_text("all:\n", encoding="utf-8")
+
+        code = "int main() {\n<<<<<<< HEAD\n   int n = 0;\n=======\n   int x = 0;\n>>>>>>> master\n}\n"
+        self.conflicted = FileMerge.parse(self.project / "src" / "lib" / "prog.cpp", StringIO(code))
+        self.files = [PassthroughFileMerge(self.project / "Makefile"), self.conflicted]
+
+        self.root = Path(self._tmp.name) / "~project"
+        self.mirror = BuildMirror(self.root, self.project)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def age(self, path: Path):
+        """ Moves the modification time of `path` to the past, so a rewrite is noticeable """
+        os.utime(str(path), ns=(0, 0))
+
+    def test_sync_nested(self):
+        self.assertEqual(self.mirror.sync(self.files), 2)
+        self.assertEqual((self.root / "Makefile").read_text(encoding="utf-8"), "all:\n")
+        self.assertEqual((self.root / "src" / "lib" / "prog.cpp").read_text(encoding="utf-8"), self.conflicted.result())
+
+    def test_sync_changed_only(self):
+        self.mirror.sync(self.files)
+        for path in [self.root / "Makefile", self.root / "src" / "lib" / "prog.cpp"]:
+            self.age(path)
+
+        self.assertEqual(self.mirror.sync(self.files), 0)
+        self.assertEqual(self.mirror.unchanged, 2)
+
+        self.conflicted.select_all(Choice.left)
+        self.assertEqual(self.mirror.sync(self.files), 1)
+
+        self.assertEqual((self.root / "Makefile").stat().st_mtime_ns, 0)
+        self.assertNotEqual((self.root / "src" / "lib" / "prog.cpp").stat().st_mtime_ns, 0)
+        self.assertEqual((self.root / "src" / "lib" / "prog.cpp").read_text(encoding="utf-8"),
+                         "int main() {\n   int n = 0;\n}\n")
+
+    def test_sync_previous_run(self):
+        self.mirror.sync(self.files)
+        self.age(self.root / "src" / "lib" / "prog.cpp")
+
+        next_run = BuildMirror(self.root, self.project)
+        self.assertEqual(next_run.sync(self.files), 0)
+        self.assertEqual((self.root / "src" / "lib" / "prog.cpp").stat().st_mtime_ns, 0)
+
+    def test_sync_keeps_mode(self):
+        self.mirror.sync(self.files)
+        os.chmod(str(self.root / "src" / "lib" / "prog.cpp"), 0o755)
+
+        self.conflicted.select_all(Choice.right)
+        self.mirror.sync(self.files)
+        self.assertEqual((self.root / "src" / "lib" / "prog.cpp").stat().st_mode & 0o777, 0o755)
+
+    def test_sync_lazy_unloaded(self):
+        code = "int f() {\n<<<<<<< HEAD\n   return 1;\n=======\n   return 2;\n>>>>>>> master\n}\n"
+        (self.project / "src" / "lazy.c").write_text(code, encoding="utf-8")
+        lazy = LazyFileMerge(self.project / "src" / "lazy.c", 1)
+
+        self.assertEqual(self.mirror.sync([lazy]), 1)
+        self.assertEqual((self.root / "src" / "lazy.c").read_text(encoding="utf-8"), code)
+
+        lazy.select_all(Choice.right)
+        self.assertEqual(self.mirror.sync([lazy]), 1)
+        self.assertEqual((self.root / "src" / "lazy.c").read_text(encoding="utf-8"), "int f() {\n   return 2;\n}\n")
+        self.assertFalse(lazy.is_loaded())
+
+        lazy.select_all(Choice.undecided)
+        self.assertEqual(self.mirror.sync([lazy]), 1)
+        self.assertEqual((self.root / "src" / "lazy.c").read_text(encoding="utf-8"), code)
+        self.assertFalse(lazy.is_loaded())
+
+
+class TestFileCloner(TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name)
+        self.source = self.path / "image.bin"
+        self.source.write_bytes(bytes(range(256)) * 16)  # not UTF-8
+        os.utime(str(self.source), ns=(10 ** 18, 10 ** 18))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def unsupported(self, *args):
+        raise OSError(errno.EOPNOTSUPP, "not supported")
+
+    def test_place(self):
+        cloner = FileCloner()
+        cloner.place(self.source, self.path / "copy" / "image.bin")
+
+        copy = self.path / "copy" / "image.bin"
+        self.assertEqual(copy.read_bytes(), self.source.read_bytes())
+        self.assertEqual(copy.stat().st_mtime_ns, 10 ** 18)
+        self.assertEqual(sum(cloner.used.values()), 1)
+
+    def test_fallback_probed_once(self):
+        cloner = FileCloner()
+        with patch.object(FileCloner, "_reflink", side_effect=self.unsupported) as reflink:
+            cloner.place(self.source, self.path / "a.bin")
+            cloner.place(self.source, self.path / "b.bin")
+
+        self.assertEqual(reflink.call_count, 1)
+        self.assertEqual(cloner.used["copy_range"] + cloner.used["copy"], 2)
+        self.assertEqual((self.path / "b.bin").read_bytes(), self.source.read_bytes())
+
+    def test_mirror_passthrough(self):
+        project = self.path / "project"
+        project.mkdir()
+        os.replace(str(self.source), str(project / "image.bin"))
+
+        mirror = BuildMirror(self.path / "~project", project)
+        files = [PassthroughFileMerge(project / "image.bin")]
+        self.assertEqual(mirror.sync(files), 1)
+        self.assertEqual(mirror.sync(files), 0)
+        self.assertEqual(BuildMirror(self.path / "~project", project).sync(files), 0)
+
+        (project / "new.bin").write_bytes(b"\xff\xfe")  # replaced like by a checkout
+        os.replace(str(project / "new.bin"), str(project / "image.bin"))
+        self.assertEqual(mirror.sync(files), 1)
+        self.assertEqual((self.path / "~project" / "image.bin").read_bytes(), b"\xff\xfe")
+
+    def test_mirror_not_linked(self):
+        project = self.path / "project"
+        project.mkdir()
+        os.replace(str(self.source), str(project / "image.bin"))
+        (self.path / "~project").mkdir()
+        os.link(str(project / "image.bin"), str(self.path / "~project" / "image.bin"))  # by an older version
+
+        mirror = BuildMirror(self.path / "~project", project)
+        self.assertEqual(mirror.sync([PassthroughFileMerge(project / "image.bin")]), 1)
+
+        with (self.path / "~project" / "image.bin").open("ab") as built:  # a build writing in place
+            built.write(b"\0")
+        self.assertEqual((project / "image.bin").stat().st_size, 4096)
+
+    def test_mirror_is_project(self):
+        project = self.path / "project"
+        project.mkdir()
+        os.replace(str(self.source), str(project / "image.bin"))
+        inode = (project / "image.bin").stat().st_ino
+
+        self.assertEqual(BuildMirror(project, project).sync([PassthroughFileMerge(project / "image.bin")]), 0)
+        self.assertEqual((project / "image.bin").stat().st_ino, inode)
@@ -0,0 +1,58 @@
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import TestCase
+
+from merge.build_runner import BuildRunner
+
+
+class TestBuildRunner(TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name)
+        self.lines = []
+        self.runner = BuildRunner(self.path, jobs=2, output=self.lines.append)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def makefile(self, text: str):
+        (self.path / "Makefile").write_text(text, encoding="utf-8")
+
+    def test_command(self):
+        self.assertListEqual(self.runner.command(), ["make", "-j2", "--directory=%s" % self.path])
+        self.assertGreaterEqual(BuildRunner(self.path).jobs, 1)
+
+    def test_success(self):
+        self.makefile("all:\n\t@echo one\n\t@echo two\n")
+
+        self.assertTrue(self.runner.run())
+        self.assertEqual(self.runner.returncode, 0)
+        self.assertIn("one\n", self.lines)
+        self.assertIn("two\n", self.lines)
+        self.assertListEqual(self.runner.errors, [])
+
+    def test_errors_streamed(self):
+        self.makefile("all:\n\t@echo 'prog.cpp:1:1: error: oops' >&2\n\t@sleep 0.5\n\t@false\n")
+
+        self.assertFalse(self.runner.run())
+        self.assertFalse(self.runner.cancelled)
+        self.assertEqual(self.runner.errors[0], "prog.cpp:1:1: error: oops")
+        self.assertLess(self.runner.first_error_seconds, self.runner.seconds)
+        self.assertIn("the first one after", str(self.runner))
+
+    def test_cancel(self):
+        self.makefile("all:\n\t@echo started\n\t@sleep 30\n")
+        started = threading.Event()
+        self.runner.output = lambda line: started.set()
+
+        canceller = threading.Thread(target=lambda: started.wait(10) and self.runner.cancel())
+        canceller.start()
+        start = time.perf_counter()
+        self.assertFalse(self.runner.run())
+        canceller.join()
+
+        self.assertTrue(self.runner.cancelled)
+        self.assertIsNone(self.runner.returncode)
+        self.assertLess(time.perf_counter() - start, 10)
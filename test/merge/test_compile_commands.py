@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from merge.compile_commands import CompileDatabase
+
+
+class TestCompileDatabase(TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name)
+
+        self.entries = [
+            {"directory": str(self.path / "build"), "file": "../src/a.cpp",
+             "arguments": ["g++", "-Iinclude", "-I", "../third", "-DX=1", "-std=c++17", "-MD", "-MF", "a.d",
+                           "-c", "../src/a.cpp", "-o", "a.o"]},
+            {"directory": str(self.path / "build"), "file": str(self.path / "src" / "b.cpp"),
+             "command": "g++ -Iinclude -DY -c %s -oa.o" % (self.path / "src" / "b.cpp")},
+            {"directory": str(self.path / "build"), "file": "../src/a.cpp",
+             "arguments": ["g++", "-Iinclude", "-I", "../third", "-DX=1", "-std=c++17", "-c", "../src/a.cpp"]},
+        ]
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self) -> Path:
+        path = self.path / "compile_commands.json"
+        path.write_text(json.dumps(self.entries), encoding="utf-8")
+        return path
+
+    def test_normalize(self):
+        database = CompileDatabase.parse(self.entries)
+
+        build = str(self.path / "build")
+        self.assertListEqual(database.args(self.path / "src" / "a.cpp"),
+                             ["-I" + build + "/include", "-I", str(self.path / "third"), "-DX=1", "-std=c++17"])
+        self.assertListEqual(database.args(self.path / "src" / "b.cpp"), ["-I" + build + "/include", "-DY"])
+
+    def test_normalize_separate_values(self):
+        args = CompileDatabase.normalize(["g++", "-x", "c++", "-D", "FOO=1", "-U", "BAR", "-target", "x86_64-linux",
+                                          "-Xclang", "-fno-pch-timestamp", "-include", "pre.h", "-c", "a.cpp",
+                                          "-o", "a.o"], "/w", "a.cpp")
+
+        self.assertTupleEqual(args, ("-x", "c++", "-D", "FOO=1", "-U", "BAR", "-target", "x86_64-linux",
+                                     "-Xclang", "-fno-pch-timestamp", "-include", os.path.normpath("/w/pre.h")))
+
+    def test_normalize_source_only_dropped(self):
+        self.assertTupleEqual(CompileDatabase.normalize(["cc", "-c", "/w/src/a.c", "extra.o"], "/w", "src/a.c"),
+                              ("extra.o",))
+        self.assertTupleEqual(CompileDatabase.normalize(["cc", "-c", "a.c", "-DX"], "/w"), ("-DX",))
+
+    def test_shared_args(self):
+        self.entries.append(dict(self.entries[1], file=str(self.path / "src" / "c.cpp"),
+                                 command=self.entries[1]["command"].replace("b.cpp", "c.cpp")))
+        database = CompileDatabase.parse(self.entries)
+
+        self.assertIs(database.files[str(self.path / "src" / "b.cpp")], database.files[str(self.path / "src" / "c.cpp")])
+
+    def test_header_fallback(self):
+        database = CompileDatabase.parse(self.entries)
+
+        self.assertEqual(database.args(self.path / "src" / "b.h"), database.args(self.path / "src" / "b.cpp"))
+        self.assertEqual(database.args(self.path / "src" / "sub" / "c.h"), database.args(self.path / "src" / "a.cpp"))
+        self.assertIsNone(database.args(self.path / "other" / "d.h"))
+
+    def test_load_cached(self):
+        path = self.write()
+        with patch("merge.compile_commands.tempfile.gettempdir", return_value=str(self.path)):
+            first = CompileDatabase.load(path)
+            self.assertTrue(CompileDatabase.cache_path(path).is_file())
+
+            with patch.object(CompileDatabase, "parse", side_effect=AssertionError("parsed again")):
+                cached = CompileDatabase.load(path)
+
+            self.assertDictEqual(cached.files, first.files)
+
+    def test_load_changed(self):
+        path = self.write()
+        with patch("merge.compile_commands.tempfile.gettempdir", return_value=str(self.path)):
+            CompileDatabase.load(path)
+
+            self.entries.pop()
+            self.entries[0]["arguments"].append("-DZ")
+            self.write()
+            self.assertIn("-DZ", CompileDatabase.load(path).args(self.path / "src" / "a.cpp"))
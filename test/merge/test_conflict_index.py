@@ -0,0 +1,26 @@
+from unittest import TestCase
+
+from merge.choice import Choice
+from merge.conflict import Conflict3Way
+from merge.conflict_index import ConflictIndex
+
+
+def conflict(start: int, lines: int) -> Conflict3Way:
+    return Conflict3Way(start, start, start, "x\n" * lines, "", "", "<<<<<<<\n", "|||||||\n", "=======\n", ">>>>>>>\n")
+
+
+class TestConflictIndex(TestCase):
+    def setUp(self):
+        self.conflicts = [conflict(3, 2), conflict(10, 0), conflict(10, 3), conflict(20, 1)]
+        self.index = ConflictIndex(self.conflicts, Choice.left)
+
+    def test_containing(self):
+        found = [self.index.containing(line) for line in range(1, 23)]
+        self.assertListEqual(found, [-1, -1, 0, 0, -1, -1, -1, -1, -1, 2, 2, 2, -1, -1, -1, -1, -1, -1, -1, 3, -1, -1])
+
+    def test_update(self):
+        self.conflicts[3].extend_top_up("a\nb\n")
+        self.index.update(3)
+
+        self.assertEqual(self.index.containing(18), 3)
+        self.assertEqual(self.index.containing(12), 2)
@@ -0,0 +1,103 @@
+from io import StringIO
+from pathlib import Path
+from unittest import TestCase
+
+from merge.choice import Choice
+from merge.conflict import Conflict3Way
+from merge.diff3 import Diff3, HistogramDiff
+from merge.file_bit import FileBit
+from merge.file_merge import FileMerge
+
+
+class TestHistogramDiff(TestCase):
+    def test_matches(self):
+        self.assertListEqual(HistogramDiff.matches([1, 2, 3], [1, 2, 3]), [(0, 0), (1, 1), (2, 2)])
+        self.assertListEqual(HistogramDiff.matches([1, 2, 3], [4, 5]), [])
+        self.assertListEqual(HistogramDiff.matches([], [1]), [])
+        self.assertListEqual(HistogramDiff.matches([1, 2, 3, 4], [1, 5, 3, 4]), [(0, 0), (2, 2), (3, 3)])
+        self.assertListEqual(HistogramDiff.matches([7, 1, 2, 8, 9], [1, 2, 9, 7]), [(1, 0), (2, 1), (4, 2)])
+
+    def test_matches_are_monotonic(self):
+        a = [1, 2, 1, 3, 1, 2, 4, 1, 5]
+        b = [2, 1, 1, 3, 4, 2, 1, 5, 1]
+        matches = HistogramDiff.matches(a, b)
+
+        for (i1, j1), (i2, j2) in zip(matches, matches[1:]):
+            self.assertLess(i1, i2)
+            self.assertLess(j1, j2)
+        for i, j in matches:
+            self.assertEqual(a[i], b[j])
+
+    def test_matches_slide_changes_down(self):
+        # a change in a run of equal lines is placed after the run, wherever the diff found it
+        self.assertListEqual(HistogramDiff.matches([1, 1, 1, 2], [1, 1, 2]), [(0, 0), (1, 1), (3, 2)])
+        self.assertListEqual(HistogramDiff.matches([1, 1, 2], [1, 1, 1, 2]), [(0, 0), (1, 1), (2, 3)])
+
+
+class TestDiff3(TestCase):
+    base = ("int main() {\n"
+            "    int n = 0;\n"
+            "    n += 1;\n"
+            "    return n;\n"
+            "}\n")
+
+    def test_split_lines(self):
+        self.assertListEqual(Diff3.split_lines(""), [])
+        self.assertListEqual(Diff3.split_lines("a\nb"), ["a\n", "b"])
+        self.assertListEqual(Diff3.split_lines("a\n\n"), ["a\n", "\n"])
+
+    def test_no_conflicts(self):
+        left = self.base.replace("int n = 0;", "int n = 1;")
+        right = self.base.replace("return n;", "return -n;")
+
+        file_bits, conflicts = Diff3(self.base, left, right).merge()
+
+        self.assertListEqual(conflicts, [])
+        self.assertListEqual(file_bits, [FileBit(1, left.replace("return n;", "return -n;"))])
+
+    def test_same_change(self):
+        left = self.base.replace("n += 1;", "n += 2;")
+
+        file_bits, conflicts = Diff3(self.base, left, left).merge()
+
+        self.assertListEqual(conflicts, [])
+        self.assertListEqual(file_bits, [FileBit(1, left)])
+
+    def test_conflict(self):
+        left = self.base.replace("n += 1;", "n += 2;\n    n *= 2;")
+        right = self.base.replace("n += 1;", "n -= 3;").replace("return n;", "return -n;")
+
+        file_bits, conflicts = Diff3(self.base, left, right).merge()
+
+        # the change of `return` is adjacent to the conflict, so it becomes a part of it
+        self.assertListEqual(file_bits, [FileBit(1, "int main() {\n    int n = 0;\n"), FileBit(14, "}\n")])
+        self.assertListEqual(conflicts, [Conflict3Way(3, 3, 3,
+                                                      "    n += 2;\n    n *= 2;\n    return n;\n",
+                                                      "    n += 1;\n    return n;\n",
+                                                      "    n -= 3;\n    return -n;\n",
+                                                      "<<<<<<< ours\n", "||||||| base\n",
+                                                      "=======\n", ">>>>>>> theirs\n")])
+
+    def test_same_as_marker_parsing(self):
+        left = self.base.replace("int n = 0;", "int n = 1;\n    int m = 2;").replace("n += 1;", "n += m;")
+        right = "#include <cstdio>\n" + self.base.replace("int n = 0;", "int n = 5;").replace("n += 1;", "")
+
+        file_merge = FileMerge.parse_versions(Path("prog.cpp"), self.base, left, right)
+        parsed = FileMerge.parse(Path("prog.cpp"), StringIO(file_merge.result(Choice.undecided)))
+
+        self.assertGreater(len(file_merge.conflicts), 0)
+        self.assertListEqual(parsed.file_bits, file_merge.file_bits)
+        self.assertListEqual(parsed.conflicts, file_merge.conflicts)
+        self.assertTrue(file_merge.result(Choice.left).startswith("#include <cstdio>\n"))
+
+    def test_same_deletion_in_run_of_equal_lines(self):
+        lines = lambda words: "".join(word + "\n" for word in words.split())
+        base = lines("d a b d d d { } a { c")
+        left = lines("a d a a b d d { } a { c")
+        right = lines("d a b d d { } a { { c")
+
+        file_bits, conflicts = Diff3(base, left, right).merge()
+
+        # both sides delete one of the `d`s, the merge must not delete two of them
+        self.assertListEqual(conflicts, [])
+        self.assertListEqual(file_bits, [FileBit(1, lines("a d a a b d d { } a { { c"))])
@@ -0,0 +1,65 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from merge.discovery import IgnoreRules, ProjectDiscovery
+
+
+class TestIgnoreRules(TestCase):
+    def test_match(self):
+        rules = IgnoreRules(["# comment", "", "*.o", "!main.o", "/out", "logs/", "docs/**/*.tmp"])
+
+        self.assertTrue(rules.match("a.o", False))
+        self.assertTrue(rules.match("src/a.o", False))
+        self.assertFalse(rules.match("src/main.o", False))
+        self.assertTrue(rules.match("out", True))
+        self.assertIsNone(rules.match("src/out", True))
+        self.assertTrue(rules.match("src/logs", True))
+        self.assertIsNone(rules.match("src/logs", False))
+        self.assertTrue(rules.match("docs/a/b.tmp", False))
+        self.assertIsNone(rules.match("prog.cpp", False))
+
+    def test_match_nested(self):
+        rules = IgnoreRules(["*.gen.cpp"], "src")
+
+        self.assertTrue(rules.match("src/a.gen.cpp", False))
+        self.assertIsNone(rules.match("a.gen.cpp", False))
+
+
+class TestProjectDiscovery(TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+
+        for name in ["Makefile", "prog.cpp", "prog.o", "src/a.cpp", "src/b.gen.cpp", "src/keep.o",
+                     "build/out.cpp", "third_party/lib/lib.cpp", ".git/HEAD", "src/deep/c.h"]:
+            path = self.root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(name)
+
+        (self.root / ".gitignore").write_text("*.o\n!keep.o\n")
+        (self.root / "src" / ".gitignore").write_text("*.gen.cpp\n")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_files(self):
+        files = ProjectDiscovery(self.root).files()
+
+        self.assertListEqual([path.relative_to(self.root).as_posix() for path, _ in files],
+                             [".gitignore", "Makefile", "prog.cpp",
+                              "src/.gitignore", "src/a.cpp", "src/deep/c.h", "src/keep.o"])
+        self.assertEqual(dict(files)[self.root / "prog.cpp"], len("prog.cpp"))
+
+    def test_skipped_listed(self):
+        discovery = ProjectDiscovery(self.root)
+        discovery.files()
+
+        self.assertListEqual([path.relative_to(self.root).as_posix() for path in discovery.skipped],
+                             ["build/out.cpp", "prog.o", "src/b.gen.cpp", "third_party/lib/lib.cpp"])
+
+    def test_skip_patterns(self):
+        files = ProjectDiscovery(self.root, skip_patterns=["src/"]).files()
+
+        self.assertIn(self.root / "build" / "out.cpp", [path for path, _ in files])
+        self.assertNotIn(self.root / "src" / "a.cpp", [path for path, _ in files])
@@ -1,6 +1,6 @@
 from unittest import TestCase
 
-from merge.file_bit import FileBit
+from merge.file_bit import FileBit, CompactFileBit
 
 
 class TestFileBit(TestCase):
@@ -36,3 +36,31 @@ class TestFileBit(TestCase):
 
         with self.assertRaises(AssertionError):
             self.file_bit.shrink_top_down(0)
+
+
+class TestCompactFileBit(TestFileBit):
+    def setUp(self):
+        buffer = ("<<<<<<<\n"
+                  "   if(true)\n"
+                  "   {\n"
+                  "	   cin >> n;\n"
+                  "	   n += 1;\n"
+                  "	   printf(\"left\");\n"
+                  "   }")
+        self.file_bit = CompactFileBit(239, buffer, len("<<<<<<<\n"), len(buffer))
+
+    def test_shrink_all(self):
+        chunk = self.file_bit.shrink_bottom_up(2)
+        self.assertEqual(chunk, "	   printf(\"left\");\n   }")
+
+        chunk = self.file_bit.shrink_top_down(4)
+        self.assertEqual(chunk, "   if(true)\n   {\n	   cin >> n;\n	   n += 1;\n")
+        self.assertEqual(self.file_bit.text, "")
+        self.assertEqual(self.file_bit.line_number, 243)
+
+        with self.assertRaises(AssertionError):
+            self.file_bit.shrink_top_down(1)
+
+    def test_text_setter(self):
+        self.file_bit.text = "int n;\n"
+        self.assertEqual(self.file_bit, FileBit(239, "int n;\n"))
@@ -139,6 +139,19 @@ class TestFileMerge(TestCase):
                                 "   return 0;\n"
                                 "}\n"))
 
+    def test_result_after_select(self):
+        undecided = self.file_merge.result()
+        self.assertIn("<<<<<<<", undecided)
+        self.assertIs(self.file_merge.result(), undecided)
+
+        self.ct1.select(Choice.left)
+        self.ct2.select(Choice.right)
+        self.assertEqual(self.file_merge.result(), self.file_merge.result(Choice.left).replace("   x = 0;\n   return",
+                                                                                             "   y = 2;\n   return"))
+
+        self.fb3.shrink_top_down(1)
+        self.assertTrue(self.file_merge.result().endswith("   y = 2;\n}\n"))
+
     def test_abstract_syntax_tree_left(self):
         root = self.file_merge.abstract_syntax_tree(Choice.left).cursor
         main_body = root.child(0).child(0)
@@ -192,6 +205,44 @@ class TestFileMerge(TestCase):
         self.assertNotEqual(left2, right)
         self.assertNotEqual(right, left3)
 
+    def test_abstract_syntax_tree_reparse(self):
+        def references(translation_unit) -> [str]:
+            return [ch.spelling for ch in FileMerge.extract_children(translation_unit.cursor, [CursorKind.DECL_REF_EXPR])]
+
+        self.file_merge.select_all(Choice.left)
+        chosen = self.file_merge.abstract_syntax_tree(None)
+        self.assertEqual(references(chosen).count("x"), 2)
+
+        self.ct2.select(Choice.right)
+        reparsed = self.file_merge.abstract_syntax_tree(None)
+
+        self.assertIs(reparsed, chosen)
+        self.assertEqual(references(reparsed).count("x"), 1)
+
+    def test_syntax_trees_async(self):
+        futures = self.file_merge.syntax_trees_async()
+        self.assertSetEqual(set(futures), {Choice.left, Choice.right})  # `ct1` has no base
+
+        kinds = [CursorKind.FUNCTION_DECL, CursorKind.IF_STMT, CursorKind.WHILE_STMT, CursorKind.BINARY_OPERATOR]
+        for choice, future in futures.items():
+            expected = self.file_merge.abstract_syntax_tree(choice)
+            self.assertListEqual([ch.kind for ch in FileMerge.extract_children(future.result().cursor, kinds)],
+                                 [ch.kind for ch in FileMerge.extract_children(expected.cursor, kinds)])
+
+    def test_syntax_trees_async_base(self):
+        file_merge = FileMerge(self.file_merge.path, [FileBit(1, "int main() {\n   int x;\n"), self.fb3], [self.ct2])
+        self.assertEqual(file_merge.base_result(), "int main() {\n   int x;\n   printf(\"Hello!\")\n   return 0;\n}\n")
+
+        futures = file_merge.syntax_trees_async()
+        self.assertSetEqual(set(futures), {Choice.left, Choice.right, FileMerge.base_version})
+
+        def assignments(translation_unit) -> int:
+            return len(FileMerge.extract_children(translation_unit.cursor, [CursorKind.BINARY_OPERATOR]))
+
+        self.assertEqual(assignments(futures[Choice.left].result()), 1)     # `x = 0`
+        self.assertEqual(assignments(futures[FileMerge.base_version].result()), 0)
+        self.assertIs(file_merge.base_syntax_tree(), futures[FileMerge.base_version].result())
+
     def test_refactor_syntax_blocks(self):
         before = copy(self.file_merge)
         self.file_merge.refactor_syntax_blocks()
@@ -0,0 +1,117 @@
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from merge.conflict import Conflict2Way
+from merge.file_merge import PassthroughFileMerge
+from merge.git_index import GitIndex
+from merge.project_merge import ProjectMerge
+
+
+def git(path: Path, *args: str) -> bytes:
+    env = dict(os.environ, GIT_AUTHOR_NAME="test", GIT_AUTHOR_EMAIL="test@example.com",
+               GIT_COMMITTER_NAME="test", GIT_COMMITTER_EMAIL="test@example.com")
+    return subprocess.run(["git", "-C", str(path), "-c", "init.defaultBranch=master"] + list(args),
+                          env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE).stdout
+
+
+def make_conflicted_repository(path: Path, conflict_style: str = "diff3"):
+    """ A repository in the middle of a merge with one conflicted file `prog.cpp` """
+    path.mkdir()
+    git(path, "init", "-q")
+    git(path, "config", "merge.conflictstyle", conflict_style)
+
+    (path / "prog.cpp").write_text("int main() {\n    int n = 0;\n}\n")
+    (path / "Makefile").write_text("prog: prog.cpp\n")
+    (path / "src").mkdir()
+    (path / "src" / "lib.cpp").write_text("int lib;\n")
+    git(path, "add", ".")
+    git(path, "commit", "-q", "-m", "base")
+
+    git(path, "checkout", "-q", "-b", "theirs")
+    (path / "prog.cpp").write_text("int main() {\n    int x = 1;\n}\n")
+    git(path, "commit", "-q", "-am", "theirs")
+
+    git(path, "checkout", "-q", "master")
+    (path / "prog.cpp").write_text("int main() {\n    int n = 2;\n}\n")
+    git(path, "commit", "-q", "-am", "ours")
+
+    git(path, "merge", "-q", "theirs")
+
+
+class TestGitIndex(TestCase):
+    def test_parse(self):
+        output = (b"100644 1111111111111111111111111111111111111111 0\tMakefile\0"
+                  b"100644 2222222222222222222222222222222222222222 1\tsrc/prog.cpp\0"
+                  b"100644 3333333333333333333333333333333333333333 2\tsrc/prog.cpp\0"
+                  b"100644 4444444444444444444444444444444444444444 3\tsrc/prog.cpp\0")
+
+        index = GitIndex.parse(Path("/project"), output)
+
+        self.assertListEqual(index.paths, [Path("/project/Makefile"), Path("/project/src/prog.cpp")])
+        self.assertDictEqual(index.stages, {Path("/project/src/prog.cpp"): {
+            1: "2222222222222222222222222222222222222222",
+            2: "3333333333333333333333333333333333333333",
+            3: "4444444444444444444444444444444444444444"}})
+        self.assertFalse(index.is_unmerged(Path("/project/Makefile")))
+
+    def test_read(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "repo"
+            make_conflicted_repository(path)
+
+            index = GitIndex.read(path)
+
+            self.assertListEqual(index.paths, [path / "Makefile", path / "prog.cpp", path / "src" / "lib.cpp"])
+            self.assertListEqual(list(index.stages), [path / "prog.cpp"])
+            stages = index.stages[path / "prog.cpp"]
+            self.assertEqual(index.read_blob(stages[GitIndex.base_stage]), b"int main() {\n    int n = 0;\n}\n")
+            self.assertEqual(index.read_blob(stages[GitIndex.ours_stage]), b"int main() {\n    int n = 2;\n}\n")
+            self.assertEqual(index.read_blob(stages[GitIndex.theirs_stage]), b"int main() {\n    int x = 1;\n}\n")
+
+    def test_project_merge(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "repo"
+            make_conflicted_repository(path)
+
+            merge = ProjectMerge.parse(path, Path(tmp) / "~repo", git=True)
+            files = {file.path.name: file for file in merge.files}
+
+            self.assertListEqual(sorted(files), ["Makefile", "lib.cpp", "prog.cpp"])
+            self.assertIsInstance(files["lib.cpp"], PassthroughFileMerge)
+            self.assertEqual(len(files["prog.cpp"].conflicts), 1)
+            self.assertEqual(files["prog.cpp"].conflicts[0].base, "    int n = 0;\n")
+            self.assertListEqual(list(merge.stages), [path / "prog.cpp"])
+
+    def test_project_merge_deleted_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "repo"
+            make_conflicted_repository(path)
+            (path / "src" / "lib.cpp").unlink()  # ` D` in `git status`
+            (path / "sub").mkdir()  # where a submodule would be checked out
+            git(path, "update-index", "--add", "--cacheinfo",
+                "160000,1111111111111111111111111111111111111111,sub")
+
+            merge = ProjectMerge.parse(path, Path(tmp) / "~repo", git=True)
+            self.assertListEqual(sorted(file.path.name for file in merge.files), ["Makefile", "prog.cpp"])
+
+            merge.write_result_tmp()
+            self.assertTrue((Path(tmp) / "~repo" / "Makefile").is_file())
+
+    def test_project_merge_rebuild(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "repo"
+            make_conflicted_repository(path, conflict_style="merge")
+
+            parsed = ProjectMerge.parse(path, Path(tmp) / "~repo", git=True)
+            rebuilt = ProjectMerge.parse(path, Path(tmp) / "~repo", git=True, rebuild=True)
+            parsed_conflict = [f for f in parsed.files if f.path.name == "prog.cpp"][0].conflicts[0]
+            rebuilt_conflict = [f for f in rebuilt.files if f.path.name == "prog.cpp"][0].conflicts[0]
+
+            self.assertIsInstance(parsed_conflict, Conflict2Way)
+            self.assertNotIsInstance(rebuilt_conflict, Conflict2Way)
+            self.assertEqual(rebuilt_conflict.base, "    int n = 0;\n")
+            self.assertEqual(rebuilt_conflict.left, parsed_conflict.left)
+            self.assertEqual(rebuilt_conflict.right, parsed_conflict.right)
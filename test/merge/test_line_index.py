@@ -0,0 +1,51 @@
+from unittest import TestCase
+
+from merge.conflict import Conflict3Way
+from merge.choice import Choice
+from merge.line_index import LineIndex
+
+
+class TestLineIndex(TestCase):
+    texts = ["", "a", "a\n", "a\nb", "a\nb\n", "\n\n", "ab\n\ncd\nef"]
+
+    def test_count(self):
+        for text in TestLineIndex.texts:
+            self.assertEqual(LineIndex(text).count(), len(text.splitlines()), text)
+
+    def test_offset(self):
+        index = LineIndex("ab\n\ncd\nef")
+        self.assertListEqual([index.offset(line) for line in range(5)], [0, 3, 4, 7, 9])
+        self.assertListEqual([index.line_at(offset) for offset in range(9)], [0, 0, 0, 1, 2, 2, 2, 3, 3])
+
+    def test_prepend_extend(self):
+        for head in TestLineIndex.texts:
+            for middle in TestLineIndex.texts:
+                for tail in TestLineIndex.texts:
+                    index = LineIndex(middle)
+                    index.prepend(LineIndex(head))
+                    index.extend(LineIndex(tail))
+                    self.assertEqual(index, LineIndex(head + middle + tail), (head, middle, tail))
+
+    def test_drop(self):
+        text = "a\n\nbc\nd\n"
+        index = LineIndex(text)
+
+        cut = index.drop_head(2)
+        self.assertEqual(cut, 3)
+        self.assertEqual(index, LineIndex(text[cut:]))
+
+        rest = index.drop_tail(1)
+        self.assertEqual(rest, 3)
+        self.assertEqual(index, LineIndex("bc\n"))
+
+    def test_conflict_end(self):
+        conflict = Conflict3Way(10, 5, 5, "a\nb\n", "", "c\n", "<<<<<<<\n", "|||||||\n", "=======\n", ">>>>>>>\n")
+        self.assertEqual(conflict.end(Choice.left), 7)
+        self.assertEqual(conflict.end(Choice.right), 6)
+
+        conflict.extend_top_up("x\ny\n")
+        conflict.extend_bottom_down("z\n")
+        self.assertEqual(conflict.left_lines, LineIndex(conflict.left))
+        self.assertEqual(conflict.start(Choice.left), 3)
+        self.assertEqual(conflict.end(Choice.left), 8)
+        self.assertEqual(conflict.end(Choice.right), 7)
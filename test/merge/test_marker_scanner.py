@@ -0,0 +1,159 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from merge.choice import Choice
+from merge.conflict import Conflict2Way, Conflict3Way, CompactConflict2Way, CompactConflict3Way
+from merge.file_bit import FileBit, CompactFileBit
+from merge.marker_scanner import MarkerScanner
+
+
+class TestMarkerScanner(TestCase):
+    def test_no_conflicts(self):
+        text = ("int main() {\n"
+                "   return 0;\n"
+                "}")
+
+        file_bits, conflicts = MarkerScanner(text).scan()
+
+        self.assertListEqual(file_bits, [FileBit(1, text)])
+        self.assertListEqual(conflicts, [])
+
+    def test_empty(self):
+        file_bits, conflicts = MarkerScanner("").scan()
+
+        self.assertListEqual(file_bits, [FileBit(1, "")])
+        self.assertListEqual(conflicts, [])
+
+    def test_markers(self):
+        text = ("a\n"
+                "<<<<<<< HEAD\n"
+                "b\n"
+                "=======\n"
+                ">>>>>>> master")
+
+        markers = list(MarkerScanner(text).markers())
+
+        self.assertListEqual(markers, [("<<<<<<<", 2, 15, 2),
+                                       ("=======", 17, 25, 4),
+                                       (">>>>>>>", 25, 39, 5)])
+
+    def test_line_numbers(self):
+        text = ("int a;\n"
+                "<<<<<<< HEAD\n"
+                "int b;\n"
+                "int c;\n"
+                "|||||||\n"
+                "int d;\n"
+                "=======\n"
+                "int e;\n"
+                ">>>>>>> master\n"
+                "int f;\n"
+                "<<<<<<< HEAD\n"
+                "=======\n"
+                "int g;\n"
+                "int h;\n"
+                "int i;\n"
+                ">>>>>>> master\n"
+                "int j;\n")
+
+        file_bits, conflicts = MarkerScanner(text).scan()
+
+        self.assertListEqual(file_bits, [FileBit(1, "int a;\n"), FileBit(10, "int f;\n"), FileBit(17, "int j;\n")])
+        self.assertListEqual(conflicts, [
+            Conflict3Way(2, 2, 2, "int b;\nint c;\n", "int d;\n", "int e;\n",
+                         "<<<<<<< HEAD\n", "|||||||\n", "=======\n", ">>>>>>> master\n"),
+            Conflict2Way(11, 5, 4, "", "int g;\nint h;\nint i;\n",
+                         "<<<<<<< HEAD\n", "=======\n", ">>>>>>> master\n")])
+        self.assertIsInstance(conflicts[1], Conflict2Way)
+
+    def test_out_of_place_markers(self):
+        text = ("=======\n"
+                ">>>>>>>\n"
+                "<<<<<<<\n"
+                "<<<<<<<\n"
+                "=======\n"
+                "|||||||\n"
+                ">>>>>>>\n")
+
+        file_bits, conflicts = MarkerScanner(text).scan()
+
+        self.assertListEqual(file_bits, [FileBit(1, "=======\n>>>>>>>\n"), FileBit(8, "")])
+        self.assertListEqual(conflicts, [Conflict2Way(3, 3, 3, "<<<<<<<\n", "|||||||\n",
+                                                      "<<<<<<<\n", "=======\n", ">>>>>>>\n")])
+
+    def test_no_trailing_newline(self):
+        text = ("<<<<<<<\n"
+                "a\n"
+                "=======\n"
+                "b\n"
+                ">>>>>>>")
+
+        file_bits, conflicts = MarkerScanner(text).scan()
+
+        self.assertListEqual(file_bits, [FileBit(1, ""), FileBit(6, "")])
+        self.assertListEqual(conflicts, [Conflict2Way(1, 1, 1, "a\n", "b\n", "<<<<<<<\n", "=======\n", ">>>>>>>")])
+
+    def test_unterminated_conflict(self):
+        text = ("a\n"
+                "<<<<<<<\n"
+                "b\n")
+
+        file_bits, conflicts = MarkerScanner(text).scan()
+
+        self.assertListEqual(file_bits, [FileBit(1, "a\n"), FileBit(-1, "")])
+        self.assertListEqual(conflicts, [])
+
+    def test_compact(self):
+        text = ("int a;\n"
+                "<<<<<<< HEAD\n"
+                "int b;\n"
+                "|||||||\n"
+                "int d;\n"
+                "=======\n"
+                "int e;\n"
+                ">>>>>>> master\n"
+                "int f;\n"
+                "<<<<<<< HEAD\n"
+                "=======\n"
+                "int g;\n"
+                ">>>>>>> master\n")
+
+        file_bits, conflicts = MarkerScanner(text).scan()
+        compact_bits, compact_conflicts = MarkerScanner(text).scan(compact=True)
+
+        self.assertListEqual(compact_bits, file_bits)
+        self.assertListEqual(compact_conflicts, conflicts)
+        self.assertTrue(all(isinstance(bit, CompactFileBit) for bit in compact_bits))
+        self.assertIsInstance(compact_conflicts[0], CompactConflict3Way)
+        self.assertIsInstance(compact_conflicts[1], CompactConflict2Way)
+        self.assertIsInstance(compact_conflicts[1], Conflict2Way)
+        self.assertIs(compact_conflicts[0].sep4, compact_conflicts[1].sep4)
+
+        for choice in Choice:
+            self.assertEqual(compact_conflicts[0].result(choice), conflicts[0].result(choice))
+            self.assertEqual(compact_conflicts[1].result(choice), conflicts[1].result(choice))
+        self.assertEqual(compact_conflicts[1].description(), conflicts[1].description())
+
+        compact_conflicts[0].extend_top_up("int z;\n")
+        conflicts[0].extend_top_up("int z;\n")
+        compact_conflicts[0].extend_bottom_down("int y;\n")
+        conflicts[0].extend_bottom_down("int y;\n")
+        self.assertEqual(compact_conflicts[0], conflicts[0])
+
+        compact_conflicts[0].right = "int x;\n"
+        self.assertEqual(compact_conflicts[0].right, "int x;\n")
+        self.assertEqual(compact_conflicts[0].left, "int z;\nint b;\nint y;\n")
+
+    def test_has_markers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "prog.cpp"
+
+            for data, expected in [(b"", False),
+                                   (b"int a;\n", False),
+                                   (b"int a; // <<<<<<< not a marker\n", False),
+                                   (b"<<<<<<< HEAD\n", True),
+                                   (b"int a;\n<<<<<<< HEAD\n", True),
+                                   (b"\xff\xfe\n<<<<<<<", True)]:
+                path.write_bytes(data)
+                self.assertEqual(MarkerScanner.has_markers(path), expected, data)
@@ -0,0 +1,43 @@
+from unittest import TestCase
+
+from merge.file_bit import FileBit
+from merge.piece_table import PieceTable
+
+
+class TestPieceTable(TestCase):
+    def setUp(self):
+        self.bits = [FileBit(i, "%d\n" % i) for i in range(200)]
+        self.table = PieceTable(len(self.bits))
+        self.renders = 0
+
+    def render(self, file_bit: FileBit) -> str:
+        self.renders += 1
+        return file_bit.text
+
+    def update(self):
+        for i, file_bit in enumerate(self.bits):
+            self.table.update(i, file_bit, self.render)
+
+    def test_render(self):
+        self.update()
+        self.assertEqual(self.table.render(), "".join(bit.text for bit in self.bits))
+        self.assertEqual(self.renders, 200)
+
+    def test_render_changed_only(self):
+        self.update()
+        self.table.render()
+
+        self.bits[150].shrink_top_down(1)
+        self.update()
+
+        self.assertEqual(self.renders, 201)
+        self.assertListEqual([block is None for block in self.table.blocks], [False, False, True, False])
+        self.assertEqual(self.table.render(), "".join(bit.text for bit in self.bits))
+
+    def test_render_replaced_piece(self):
+        self.update()
+        self.bits[0] = FileBit(0, "zero\n")
+        self.update()
+
+        self.assertEqual(self.renders, 201)
+        self.assertTrue(self.table.render().startswith("zero\n1\n"))
@@ -0,0 +1,104 @@
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+from unittest import TestCase
+
+from clang.cindex import CursorKind
+
+from merge.choice import Choice
+from merge.file_merge import FileMerge
+from merge.preamble import PreambleCache
+import merge.cursor_utils
+
+
+class TestPreambleSplit(TestCase):
+    def test_includes(self):
+        text = "#include <stdio.h>\n#include \"foo.h\"\nint x;\n"
+        self.assertEqual(PreambleCache.split(text), text.index("int"))
+
+    def test_comments(self):
+        text = "/*\n * License\n */\n// comment\n\n#include <stdio.h>\n\n#define X 1\n#include <stdlib.h>\n"
+        self.assertEqual(PreambleCache.split(text), text.index("\n#define"))
+
+    def test_no_includes(self):
+        self.assertEqual(PreambleCache.split("#ifndef FOO_H\n#define FOO_H\n#include <stdio.h>\n"), 0)
+        self.assertEqual(PreambleCache.split("/* a */ int x;\n#include <stdio.h>\n"), 0)
+        self.assertEqual(PreambleCache.split(""), 0)
+
+
+class TestPreambleCache(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from merge.external_parser_setup import ExternalParserSetup
+        ExternalParserSetup.setup()
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name)
+        (self.path / "foo.h").write_text("typedef struct { int a; } Foo;\n#define TWICE(x) ((x) * 2)\n")
+
+        self.cache = PreambleCache(self.path / "preambles")
+        FileMerge.preamble_cache = self.cache
+
+    def tearDown(self):
+        FileMerge.preamble_cache = None
+        self.directory.cleanup()
+
+    def file_merge(self, name: str) -> FileMerge:
+        code = ("#include \"foo.h\"\n"
+                "\n"
+                "int %s(Foo f) {\n"
+                "<<<<<<< ours\n"
+                "    return TWICE(f.a);\n"
+                "=======\n"
+                "    return f.a;\n"
+                ">>>>>>> theirs\n"
+                "}\n") % name
+        return FileMerge.parse(self.path / (name + ".c"), StringIO(code))
+
+    def test_parse(self):
+        ast = self.file_merge("f").abstract_syntax_tree(Choice.left)
+
+        functions = FileMerge.extract_children(ast.cursor, [CursorKind.FUNCTION_DECL])
+        self.assertListEqual([(function.spelling, function.start) for function in functions], [("f", 3)])
+        self.assertListEqual([str(diagnostic) for diagnostic in ast.diagnostics], [])
+
+    def test_shared(self):
+        self.file_merge("f").abstract_syntax_tree(Choice.left)
+        self.file_merge("f").abstract_syntax_tree(Choice.right)
+        self.file_merge("g").abstract_syntax_tree(Choice.left)
+
+        self.assertEqual((self.cache.built, self.cache.reused), (1, 3))
+        self.assertEqual(len(list((self.path / "preambles").glob("*.pch"))), 1)
+
+    def test_reused_by_next_run(self):
+        self.file_merge("f").abstract_syntax_tree(Choice.left)
+
+        next_run = PreambleCache(self.cache.folder)
+        text, args = next_run.prepare(self.path / "f.c", "#include \"foo.h\"\nint x;\n", [])
+        self.assertEqual(next_run.built, 0)
+        self.assertEqual(text, "\nint x;\n")
+        self.assertIn("-include-pch", args)
+
+    def test_stale(self):
+        self.file_merge("f").abstract_syntax_tree(Choice.left)
+
+        time.sleep(1.1)  # modification times are compared in seconds
+        with (self.path / "foo.h").open("a") as header:
+            header.write("int z;\n")
+
+        next_run = PreambleCache(self.cache.folder)
+        next_run.prepare(self.path / "f.c", "#include \"foo.h\"\nint x;\n", [])
+        self.assertEqual(next_run.built, 1)
+
+    def test_reused_with_args(self):
+        args = ["-std=c11", "-DLIMIT=3"]
+        self.cache.prepare(self.path / "f.c", "#include \"foo.h\"\nint x;\n", args)
+        self.assertEqual(self.cache.built, 1)
+
+        next_run = PreambleCache(self.cache.folder)
+        text, args = next_run.prepare(self.path / "g.c", "#include \"foo.h\"\nint y;\n", args)
+        self.assertEqual(next_run.built, 0)
+        self.assertEqual(args[:2], ["-std=c11", "-DLIMIT=3"])
+        self.assertIn("-include-pch", args)
@@ -0,0 +1,132 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from merge.choice import Choice
+from merge.file_merge import PassthroughFileMerge, LazyFileMerge
+from merge.project_merge import ProjectMerge
+
+
+class TestProjectMerge(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from merge.external_parser_setup import ExternalParserSetup
+        ExternalParserSetup.setup()
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "project"
+        self.path.mkdir()
+
+        (self.path / "prog.cpp").write_text(("int main() {\n"
+                                             "<<<<<<< HEAD\n"
+                                             "   int n = 0;\n"
+                                             "=======\n"
+                                             "   int x = 0;\n"
+                                             ">>>>>>> master\n"
+                                             "}\n"), encoding="utf-8")
+        (self.path / "clean.cpp").write_text("int f() { return 0; }\n", encoding="utf-8")
+        (self.path / "Makefile").write_text("prog: prog.cpp\n", encoding="utf-8")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def files(self, merge: ProjectMerge) -> {str: object}:
+        return {file.path.name: file for file in merge.files}
+
+    def test_parse_skips_clean_files(self):
+        merge = ProjectMerge.parse(self.path, self.path.parent / "~project")
+        files = self.files(merge)
+
+        self.assertNotIsInstance(files["prog.cpp"], PassthroughFileMerge)
+        self.assertEqual(len(files["prog.cpp"].conflicts), 1)
+
+        for name in ["clean.cpp", "Makefile"]:
+            self.assertIsInstance(files[name], PassthroughFileMerge)
+            self.assertIsNone(files[name]._file_bits)
+            self.assertTrue(files[name].is_resolved())
+
+    def test_passthrough_result(self):
+        merge = ProjectMerge.parse(self.path, self.path.parent / "~project")
+        clean = self.files(merge)["clean.cpp"]
+
+        self.assertEqual(clean.result(), "int f() { return 0; }\n")
+
+    def test_parse_lazy(self):
+        merge = ProjectMerge.parse(self.path, self.path.parent / "~project", lazy=True)
+        files = self.files(merge)
+        prog = files["prog.cpp"]
+
+        self.assertIsInstance(prog, LazyFileMerge)
+        self.assertIsInstance(files["clean.cpp"], PassthroughFileMerge)
+        self.assertFalse(prog.is_loaded())
+        self.assertEqual(prog.conflict_count, 1)
+        self.assertFalse(merge.is_resolved())
+        self.assertFalse(prog.is_loaded())
+
+        self.assertEqual(len(prog.conflicts), 1)
+        self.assertTrue(prog.is_loaded())
+        self.assertEqual(prog.conflicts[0].left, "   int n = 0;\n")
+
+    def test_lazy_select_all(self):
+        merge = ProjectMerge.parse(self.path, self.path.parent / "~project", lazy=True)
+        prog = self.files(merge)["prog.cpp"]
+
+        merge.select_all(Choice.right)
+        self.assertTrue(merge.is_resolved())
+        self.assertFalse(prog.is_loaded())
+
+        self.assertEqual(prog.result(), "int main() {\n   int x = 0;\n}\n")
+
+    def test_lazy_prefetch(self):
+        merge = ProjectMerge.parse(self.path, self.path.parent / "~project", lazy=True)
+        prog = self.files(merge)["prog.cpp"]
+
+        prog.prefetch().join()
+        self.assertTrue(prog.is_loaded())
+
+    def test_parse_recursive_parallel(self):
+        (self.path / "src").mkdir()
+        (self.path / "src" / "lib.cpp").write_text("<<<<<<<\na\n=======\nb\n>>>>>>>\n", encoding="utf-8")
+
+        serial = ProjectMerge.parse(self.path, self.path.parent / "~project")
+        parallel = ProjectMerge.parse(self.path, self.path.parent / "~project", workers=2)
+
+        self.assertListEqual([f.path for f in parallel.files], [f.path for f in serial.files])
+        self.assertListEqual([f.path.relative_to(self.path).as_posix() for f in parallel.files],
+                             ["Makefile", "clean.cpp", "prog.cpp", "src/lib.cpp"])
+        self.assertListEqual(self.files(parallel)["lib.cpp"].conflicts, self.files(serial)["lib.cpp"].conflicts)
+
+    def test_write_result_nested(self):
+        (self.path / "src").mkdir()
+        (self.path / "src" / "lib.cpp").write_text("int lib;\n", encoding="utf-8")
+
+        merge = ProjectMerge.parse(self.path, self.path.parent / "~project")
+        merge.write_result_tmp()
+
+        self.assertEqual((merge.tmp_path / "src" / "lib.cpp").read_text(encoding="utf-8"), "int lib;\n")
+
+    def test_skipped_files_written(self):
+        (self.path / "third_party").mkdir()
+        (self.path / "third_party" / "lib.c").write_text("<<<<<<<\na\n=======\nb\n>>>>>>>\n", encoding="utf-8")
+        (self.path / ".gitignore").write_text("*.gen.h\n", encoding="utf-8")
+        (self.path / "config.gen.h").write_text("#define N 1\n", encoding="utf-8")
+
+        merge = ProjectMerge.parse(self.path, self.path.parent / "~project")
+        files = self.files(merge)
+        self.assertIsInstance(files["lib.c"], PassthroughFileMerge)  # not scanned for conflicts
+        self.assertIsInstance(files["config.gen.h"], PassthroughFileMerge)
+
+        merge.write_result_tmp()
+        self.assertEqual((merge.tmp_path / "third_party" / "lib.c").read_text(encoding="utf-8"),
+                         "<<<<<<<\na\n=======\nb\n>>>>>>>\n")
+        self.assertEqual((merge.tmp_path / "config.gen.h").read_text(encoding="utf-8"), "#define N 1\n")
+
+    def test_parse_compile_commands(self):
+        commands = self.path.parent / "compile_commands.json"
+        commands.write_text(json.dumps([{"directory": str(self.path), "file": "prog.cpp",
+                                         "arguments": ["g++", "-DN=1", "-c", "prog.cpp"]}]), encoding="utf-8")
+
+        merge = ProjectMerge.parse(self.path, self.path.parent / "~project", compile_commands=commands)
+        self.assertListEqual(self.files(merge)["prog.cpp"].parse_args, ["-DN=1"])
@@ -0,0 +1,97 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import TestCase
+
+from merge.choice import Choice
+from merge.file_merge import FileMerge, PassthroughFileMerge
+from merge.project_merge import ProjectMerge
+from merge.solver import ChoiceSolver, BuildEvaluation
+
+
+def conflict(left: str, right: str) -> str:
+    return "<<<<<<< HEAD\n" + left + "=======\n" + right + ">>>>>>> master\n"
+
+
+class TestChoiceSolver(TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "project"
+        self.path.mkdir()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def merge(self, codes: {str: str}) -> ProjectMerge:
+        files = []
+        for name, code in codes.items():
+            (self.path / name).write_text(code, encoding="utf-8")
+            files.append(FileMerge.parse(self.path / name, StringIO(code)))
+        return ProjectMerge(self.path, self.path.parent / "~project", files)
+
+    def test_whole_side(self):
+        merge = self.merge({"prog.cpp": conflict("int a;\n", "int a = b;\n") + conflict("int c;\n", "int c = d;\n")})
+        solver = ChoiceSolver()
+
+        solution = solver.solve(merge)
+        self.assertListEqual(list(solution.values()), [[Choice.left, Choice.left]])
+        self.assertEqual(solver.builds, {ChoiceSolver.whole_side: 1, ChoiceSolver.bisection: 0})
+        self.assertFalse(merge.is_resolved())
+
+        ChoiceSolver.apply(solution)
+        self.assertListEqual([c.choice for c in merge.files[0].conflicts], [Choice.left, Choice.left])
+
+    def test_bisection(self):
+        merge = self.merge({"prog.cpp": "int b;\n" +
+                                        conflict("int a = x;\n", "int a = b;\n") +
+                                        conflict("int c;\n", "int c = y;\n") +
+                                        conflict("int d;\n", "int d = z;\n")})
+        solver = ChoiceSolver()
+
+        solution = solver.solve(merge)
+        self.assertListEqual(solution[merge.files[0]], [Choice.right, Choice.left, Choice.left])
+        self.assertEqual(solver.problems(merge.files[0]), 0)
+        self.assertEqual(solver.builds[ChoiceSolver.whole_side], 3)
+        self.assertGreater(solver.builds[ChoiceSolver.bisection], 0)
+
+    def test_decided_conflicts_kept(self):
+        merge = self.merge({"prog.cpp": conflict("int a;\n", "int b;\n") + conflict("int c = b;\n", "int c = a;\n")})
+        merge.files[0].conflicts[0].select(Choice.right)
+
+        solution = ChoiceSolver().solve(merge)
+        self.assertListEqual(solution[merge.files[0]], [Choice.left])
+        self.assertIs(merge.files[0].conflicts[0].choice, Choice.right)
+        self.assertIs(merge.files[0].conflicts[1].choice, Choice.undecided)
+
+    def test_files_in_lockstep(self):
+        merge = self.merge({"a.cpp": conflict("int a = x;\n", "int a;\n"),
+                            "b.cpp": conflict("int b;\n", "int b = y;\n")})
+        solver = ChoiceSolver()
+
+        solution = solver.solve(merge)
+        self.assertListEqual([solution[file] for file in merge.files], [[Choice.right], [Choice.left]])
+        self.assertEqual(solver.builds, {ChoiceSolver.whole_side: 2, ChoiceSolver.bisection: 0})
+
+    def test_budget(self):
+        merge = self.merge({"prog.cpp": conflict("int a = x;\n", "int a = y;\n")})
+        solver = ChoiceSolver(max_builds=2)
+
+        solution = solver.solve(merge)
+        self.assertTrue(solver.exhausted)
+        self.assertEqual(sum(solver.builds.values()), 2)
+        self.assertEqual(len(solution[merge.files[0]]), 1)
+        self.assertIn("the budget ran out", str(solver))
+
+    def test_build_evaluation(self):
+        merge = self.merge({"prog.cpp": "int b;\n" + conflict("int a = x;\n", "int a = b;\n")})
+        (self.path / "Makefile").write_text("prog.o: prog.cpp\n\tc++ -c prog.cpp -o prog.o\n", encoding="utf-8")
+        merge.files.append(PassthroughFileMerge(self.path / "Makefile"))
+        prog = merge.files[0]
+
+        problems = BuildEvaluation(jobs=1)(merge)  # the conflict markers are in the result
+        self.assertListEqual(list(problems), [prog.path])
+        self.assertIn(0, [problem.conflict for problem in problems[prog.path]])
+
+        solver = ChoiceSolver(BuildEvaluation(jobs=1))
+        self.assertListEqual(solver.solve(merge)[prog], [Choice.right])
+        self.assertEqual(solver.builds, {ChoiceSolver.whole_side: 2, ChoiceSolver.bisection: 0})
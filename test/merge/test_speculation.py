@@ -0,0 +1,82 @@
+import threading
+from io import StringIO
+from pathlib import Path
+from unittest import TestCase
+
+from merge.choice import Choice
+from merge.file_merge import FileMerge
+from merge.speculation import Speculation
+
+
+class TestSpeculation(TestCase):
+    def setUp(self):
+        code = "int f() {\n" \
+               "<<<<<<< HEAD\n" \
+               "    int n = 0;\n" \
+               "    return n;\n" \
+               "=======\n" \
+               "    return m;\n" \
+               ">>>>>>> master\n" \
+               "}\n" \
+               "<<<<<<< HEAD\n" \
+               "int g;\n" \
+               "=======\n" \
+               "int g;\n" \
+               ">>>>>>> master\n"
+        self.file = FileMerge.parse(Path("prog.cpp"), StringIO(code))
+        self.reports = []
+        self.reported = threading.Event()
+        self.speculation = Speculation(2, report=self.report)
+
+    def tearDown(self):
+        self.speculation.shutdown()
+
+    def report(self, status: str):
+        self.reports.append(status)
+        self.reported.set()
+
+    def test_render(self):
+        text, ranges = Speculation.render(self.file, 0, Choice.both)
+        self.assertEqual(text, "int f() {\n    int n = 0;\n    return n;\n    return m;\n}\nint g;\n")
+        self.assertListEqual(ranges, [(2, 5), (6, 7)])
+
+        self.file.conflicts[0].select(Choice.right)
+        text, ranges = Speculation.render(self.file, 1, Choice.both)
+        self.assertEqual(text, "int f() {\n    return m;\n}\nint g;\nint g;\n")
+        self.assertListEqual(ranges, [(2, 3), (4, 6)])
+
+    def test_status_reported(self):
+        conflict = self.file.conflicts[0]
+        self.speculation.start(self.file, conflict)
+
+        self.assertTrue(self.reported.wait(10))
+        self.assertListEqual(self.reports, ["Speculation: left compiles, right 1 errors, both 1 errors"])
+        self.assertEqual(self.speculation.status(conflict), self.reports[0])
+
+    def test_restart_only_when_changed(self):
+        conflict = self.file.conflicts[0]
+        self.speculation.start(self.file, conflict)
+        self.assertTrue(self.reported.wait(10))
+
+        self.speculation.start(self.file, conflict)
+        self.assertEqual(len(self.reports), 1)
+
+        self.reported.clear()
+        self.file.conflicts[1].select(Choice.left)
+        self.speculation.start(self.file, conflict)
+        self.assertTrue(self.reported.wait(10))
+        self.assertEqual(len(self.reports), 2)
+
+    def test_stale_speculation_dropped(self):
+        self.speculation.start(self.file, self.file.conflicts[0])  # may be reported before it is replaced
+        self.speculation.start(self.file, self.file.conflicts[1])
+
+        for _ in range(100):
+            self.reported.clear()
+            status = self.speculation.status(self.file.conflicts[1])
+            if "checking" not in status and self.reports and self.reports[-1] == status:
+                break
+            self.reported.wait(0.1)
+
+        self.assertEqual(self.reports[-1], "Speculation: left compiles, right compiles, both 1 errors")
+        self.assertEqual(self.speculation.status(self.file.conflicts[0]), "")
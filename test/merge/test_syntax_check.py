@@ -0,0 +1,99 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import TestCase
+
+from merge.ast_cache import AstCache
+from merge.choice import Choice
+from merge.file_merge import FileMerge, PassthroughFileMerge
+from merge.syntax_check import SyntaxCheck, SyntaxProblem
+
+
+class TestSyntaxCheck(TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name)
+
+        code = "int f() {\n" \
+               "<<<<<<< HEAD\n" \
+               "    int n = 0;\n" \
+               "    return n;\n" \
+               "=======\n" \
+               "    return m;\n" \
+               ">>>>>>> master\n" \
+               "}\n" \
+               "<<<<<<< HEAD\n" \
+               "int g;\n" \
+               "=======\n" \
+               "int h;\n" \
+               ">>>>>>> master\n"
+        self.file = FileMerge.parse(self.path / "prog.cpp", StringIO(code))
+        (self.path / "Makefile").write_text("all:\n", encoding="utf-8")
+        self.files = [PassthroughFileMerge(self.path / "Makefile"), self.file]
+        self.check = SyntaxCheck()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_result_lines(self):
+        self.assertListEqual(self.file.result_lines(Choice.left), [(2, 4), (5, 6)])
+        self.assertListEqual(self.file.result_lines(Choice.both), [(2, 5), (6, 8)])
+
+        self.file.conflicts[0].select(Choice.right)
+        self.assertListEqual(self.file.result_lines(), [(2, 3), (4, 9)])
+
+    def test_problems_mapped_to_conflicts(self):
+        self.file.select_all(Choice.right)
+        problems = self.check.run(self.files)
+
+        self.assertEqual(len(problems), 1)
+        self.assertEqual(problems[0].path, self.file.path)
+        self.assertEqual(problems[0].line, 2)
+        self.assertEqual(problems[0].conflict, 0)
+        self.assertIn("m", problems[0].message)
+        self.assertIn("conflict 1", str(problems[0]))
+
+    def test_outside_of_conflicts(self):
+        self.file.file_bits[-1].text = "int broken\n"
+        self.file.select_all(Choice.left)
+
+        problems = self.check.run(self.files)
+        self.assertTrue(problems)
+        self.assertListEqual([problem.conflict for problem in problems], [-1] * len(problems))
+
+    def test_only_changed_files_checked(self):
+        self.file.select_all(Choice.left)
+        self.assertListEqual(self.check.run(self.files), [])
+        self.assertEqual((self.check.checked, self.check.reused), (1, 0))
+
+        self.assertListEqual(self.check.run(self.files), [])
+        self.assertEqual((self.check.checked, self.check.reused), (0, 1))
+
+        self.file.conflicts[0].select(Choice.right)
+        problems = self.check.run(self.files)
+        self.assertEqual((self.check.checked, self.check.reused), (1, 0))
+        self.assertListEqual(problems, [SyntaxProblem(self.file.path, 2, problems[0].message, 0)])
+        self.assertListEqual(self.check.run(self.files), problems)
+
+    def test_changed_result_reparsed(self):
+        self.file.select_all(Choice.left)
+        self.check.run(self.files)
+
+        reparses = AstCache.shared().reparses
+        self.file.conflicts[0].select(Choice.right)
+        problems = self.check.run(self.files)
+
+        self.assertEqual(AstCache.shared().reparses, reparses + 1)
+        self.assertListEqual(problems, [SyntaxProblem(self.file.path, 2, problems[0].message, 0)])
+
+    def test_version_unit_not_reparsed(self):
+        self.file.select_all(Choice.left)
+        left = self.file.abstract_syntax_tree(Choice.left)  # the same text as the result, the unit is shared
+        self.check.run(self.files)
+
+        reparses = AstCache.shared().reparses
+        self.file.conflicts[0].select(Choice.right)
+        self.check.run(self.files)
+
+        self.assertEqual(AstCache.shared().reparses, reparses)
+        self.assertIs(self.file.abstract_syntax_tree(Choice.left), left)
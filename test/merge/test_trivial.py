@@ -0,0 +1,101 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import TestCase
+
+from merge.choice import Choice
+from merge.conflict import Conflict2Way, Conflict3Way
+from merge.file_merge import FileMerge, LazyFileMerge
+from merge.trivial import TrivialResolver
+
+
+def conflict3(left: str, base: str, right: str) -> Conflict3Way:
+    return Conflict3Way(1, 1, 1, left, base, right, "<<<<<<<\n", "|||||||\n", "=======\n", ">>>>>>>\n")
+
+
+def conflict2(left: str, right: str) -> Conflict2Way:
+    return Conflict2Way(1, 1, 1, left, right, "<<<<<<<\n", "=======\n", ">>>>>>>\n")
+
+
+class TestTrivialResolver(TestCase):
+    def test_classify(self):
+        cases = [
+            (conflict3("int a;\n", "int b;\n", "int a;\n"), (TrivialResolver.identical, Choice.left)),
+            (conflict3("int a;\r\n", "int b;\n", "int  a;\n"), (TrivialResolver.whitespace, Choice.left)),
+            (conflict3("int b;\n", "int b;\n", "int c;\n"), (TrivialResolver.left_unchanged, Choice.right)),
+            (conflict3("int a;\n", "int b;\n", "  int b;\r\n"), (TrivialResolver.right_unchanged, Choice.left)),
+            (conflict3("int a;\n", "int b;\n", "int c;\n"), None),
+            (conflict3("int a;\n", "int b;\n", "inta;\n"), None),
+            (conflict2("int a;\n", "int a;\n"), (TrivialResolver.identical, Choice.left)),
+            (conflict2("int a;\n", "int b;\n"), None),
+            (conflict2("", "int b;\n"), None),
+        ]
+
+        for conflict, expected in cases:
+            self.assertEqual(TrivialResolver.classify(conflict), expected, (conflict.left, conflict.right))
+
+    def test_whitespace_which_matters(self):
+        pairs = [
+            ("// old\nreset();\n", "// old reset();\n"),
+            ('puts("a  b");\n', 'puts("a b");\n'),
+            ("char c = ' ';\n", "char c = '';\n"),
+            ("#define A 1\nint b;\n", "#define A 1 int b;\n"),
+            ("#define F(x) x\n", "#define F (x) x\n"),
+            ("int c = a+ +b;\n", "int c = a++b;\n"),
+            ("/* a  b */\n", "/* a b */\n"),
+        ]
+
+        for left, right in pairs:
+            self.assertIsNone(TrivialResolver.classify(conflict2(left, right)), (left, right))
+            self.assertIsNone(TrivialResolver.classify(conflict3(left, right, "int z;\n")), (left, right))
+            self.assertIsNone(TrivialResolver.classify(conflict3(left, "int z;\n", right)), (left, right))
+
+    def test_whitespace_which_does_not_matter(self):
+        pairs = [
+            ("f(a,b);\n", "f(a, b);\n"),
+            ("int a;  // note\r\n", "int a; // note\n"),
+            ("#define A 1\r\nint b;\n", "#  define A  1\nint b;"),
+            ('puts("a  b");\n', '  puts( "a  b" ) ;\n\n'),
+        ]
+
+        for left, right in pairs:
+            self.assertEqual(TrivialResolver.classify(conflict2(left, right)),
+                             (TrivialResolver.whitespace, Choice.left), (left, right))
+
+    def test_run(self):
+        code = "<<<<<<< HEAD\nint a;\n||||||| base\nint a;\n=======\nint b;\n>>>>>>> master\n" \
+               "<<<<<<< HEAD\nint c;\n||||||| base\nint d;\n=======\nint e;\n>>>>>>> master\n" \
+               "<<<<<<< HEAD\nint f;\n||||||| base\nint g;\n=======\nint f;\n>>>>>>> master\n"
+        file = FileMerge.parse(Path("prog.cpp"), StringIO(code))
+        file.conflicts[2].select(Choice.right)
+        lazy = LazyFileMerge(Path("missing.cpp"), 1)
+        resolver = TrivialResolver()
+
+        self.assertEqual(resolver.run([file, lazy]), 1)
+        self.assertListEqual([c.choice for c in file.conflicts], [Choice.right, Choice.undecided, Choice.right])
+        self.assertEqual(resolver.examined, 2)
+        self.assertListEqual(resolver.decisions, [(Path("prog.cpp"), 1, TrivialResolver.left_unchanged, Choice.right)])
+        self.assertFalse(lazy.is_loaded())
+        self.assertIn("1 of 2 resolved", str(resolver))
+        self.assertIn("lazy files settled when loaded: 1", str(resolver))
+
+    def test_lazy_settled_when_loaded(self):
+        code = "<<<<<<< HEAD\nint a;\n||||||| base\nint a;\n=======\nint b;\n>>>>>>> master\n" \
+               "<<<<<<< HEAD\nint c;\n||||||| base\nint d;\n=======\nint e;\n>>>>>>> master\n"
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "prog.c"
+            path.write_text(code, encoding="utf-8")
+            lazy = LazyFileMerge(path, 2)
+
+            resolver = LazyFileMerge.trivial_resolver = TrivialResolver()
+            try:
+                self.assertEqual(resolver.run([lazy]), 0)
+                self.assertEqual(resolver.deferred, 1)
+
+                lazy.load()
+            finally:
+                LazyFileMerge.trivial_resolver = None
+
+        self.assertListEqual([c.choice for c in lazy.conflicts], [Choice.right, Choice.undecided])
+        self.assertEqual((resolver.examined, sum(resolver.resolved.values())), (2, 1))
+        self.assertListEqual(resolver.decisions, [(path, 1, TrivialResolver.left_unchanged, Choice.right)])
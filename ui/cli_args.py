@@ -8,6 +8,34 @@ def parse_cli_args():
 
     parser.add_argument('project_path', default='.', help='folder with the top-level Makefile')
     parser.add_argument('--verbose', dest='verbose', action='store_true')
+    parser.add_argument('--compact', dest='compact', action='store_true',
+                        help='keep conflicts as views into one buffer per file to save memory')
+    parser.add_argument('--lazy', dest='lazy', action='store_true',
+                        help='parse a file only when it is visited for the first time')
+    parser.add_argument('-j', '--jobs', dest='jobs', type=int, default=1,
+                        help='number of processes to parse and analyse the project with')
+    parser.add_argument('--make-jobs', dest='make_jobs', type=int, default=None,
+                        help='number of jobs to run `make` with, all the available CPUs by default')
+    parser.add_argument('--git', dest='git', action='store_true',
+                        help='take the conflicted files from the git index instead of scanning the project')
+    parser.add_argument('--rebuild', dest='rebuild', action='store_true',
+                        help='with --git, merge the base/ours/theirs versions instead of reading conflict markers')
+
+    parser.add_argument('--includes', dest='includes', action='store_true',
+                        help='parse files with their real includes, precompiling the include prefixes')
+
+    parser.add_argument('--compile-commands', dest='compile_commands', default=None,
+                        help='compile_commands.json to take the parse arguments of the files from')
+
+    parser.add_argument('--speculate', dest='speculate', type=int, default=0, metavar='WORKERS',
+                        help='check the choices of the conflict on screen in the background with WORKERS threads')
+
+    parser.add_argument('--no-trivial', dest='trivial', action='store_false',
+                        help='do not settle the trivial conflicts (equal sides, one side unchanged) automatically')
+    parser.add_argument('--solve-builds', dest='solve_builds', type=int, default=64,
+                        help='the most builds or syntax checks the solver (`A`, `AM`) may take')
+    parser.add_argument('--solve-seconds', dest='solve_seconds', type=float, default=300.0,
+                        help='the most seconds the solver (`A`, `AM`) may take')
 
     default_behaviour_group = parser.add_mutually_exclusive_group()
     default_behaviour_group.add_argument('-ours', action='store_true')
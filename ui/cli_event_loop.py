@@ -1,9 +1,12 @@
 from merge.choice import Choice
 from merge.project_merge import ProjectMerge
+from merge.solver import ChoiceSolver
+from merge.speculation import Speculation
 from ui.index import Index
 
 
-def resolve_conflicts_event_loop(project_merge: ProjectMerge):
+def resolve_conflicts_event_loop(project_merge: ProjectMerge, speculation: Speculation = None):
+    """ :param speculation: checks the choices of the conflict on screen while waiting for the input """
     files = Index([f for f in project_merge.files if not f.is_resolved()])
     conflicts = None
 
@@ -15,6 +18,10 @@ def resolve_conflicts_event_loop(project_merge: ProjectMerge):
         if not conflicts:
             conflicts = Index([c for c in files.value().conflicts if not c.is_resolved()])
 
+            next_file = files.peek_next()
+            if next_file:
+                next_file.prefetch()
+
         if conflicts.is_empty():
             print("File %s has no conflicts to resolve" % files.value().path)
             print("%d files left to merge" % (files.size_left() - 1))
@@ -24,7 +31,8 @@ def resolve_conflicts_event_loop(project_merge: ProjectMerge):
             response = input(
                 "Choose what to leave ( 'R' = resolve file, "
                 "'NF' = next file, 'PF' = previous file, "
-                "'V' = view the file, 'C' = compile, "
+                "'V' = view the file, 'S' = check the syntax, 'C' = compile, "
+                "'A' = solve by checking the syntax, 'AM' = solve by building, "
                 "'W' = write to tmp, `WF` = override the project files, "
                 "'Q' = quit): \n")
 
@@ -42,8 +50,13 @@ def resolve_conflicts_event_loop(project_merge: ProjectMerge):
             elif switch == 'v ':
                 print("=== [%d conflicts] === %s ==== " % (conflicts.size_left(), files.value().path))
                 print(files.value().result())
+            elif switch == 's ':
+                project_merge.check_syntax_print()
             elif switch == 'c ':
                 project_merge.compile_print()
+            elif switch in ('a ', 'am'):
+                if solve_conflicts(project_merge, build=switch == 'am'):
+                    conflicts = None
             elif switch == 'w ':
                 project_merge.write_result_tmp()
             elif switch == 'wf':
@@ -56,12 +69,16 @@ def resolve_conflicts_event_loop(project_merge: ProjectMerge):
 
         else:
             print(conflicts.value().description())
+            if speculation:
+                speculation.start(files.value(), conflicts.value())
+                print(speculation.status(conflicts.value()))
 
             response = input(
                 "Choose what to leave ('L' = left, 'R' = right, 'B' = both, "
                 "'N' = next conflict, 'P' = previous conflict, "
                 "'NF' = next file, 'PF' = previous file, "
-                "'V' = view the file, 'C' = compile, "
+                "'V' = view the file, 'S' = check the syntax, 'C' = compile, "
+                "'A' = solve by checking the syntax, 'AM' = solve by building, "
                 "'W' = write to tmp, `WF` = override the project files, "
                 "'Q' = quit): \n")
 
@@ -89,8 +106,13 @@ def resolve_conflicts_event_loop(project_merge: ProjectMerge):
             elif switch == 'v ':
                 print("=== [%d conflicts] === %s ==== " % (conflicts.size_left(), files.value().path))
                 print(files.value().result())
+            elif switch == 's ':
+                project_merge.check_syntax_print()
             elif switch == 'c ':
                 project_merge.compile_print()
+            elif switch in ('a ', 'am'):
+                if solve_conflicts(project_merge, build=switch == 'am'):
+                    conflicts = None
             elif switch == 'w ':
                 project_merge.write_result_tmp()
             elif switch == 'wf':
@@ -100,3 +122,24 @@ def resolve_conflicts_event_loop(project_merge: ProjectMerge):
                 return
             else:
                 print("Unsupported command %s" % response)
+
+
+def solve_conflicts(project_merge: ProjectMerge, build: bool) -> bool:
+    """ Proposes choices of the undecided conflicts found by `ProjectMerge.solve`, returns whether they were taken """
+    solution = project_merge.solve(build)
+    print(project_merge.last_solver)
+
+    if not solution:
+        print("No conflicts to solve")
+        return False
+
+    for file, choices in solution.items():
+        print("%s: %s (%d errors)" % (file.path, " ".join(choice.name for choice in choices),
+                                      project_merge.last_solver.problems(file)))
+
+    response = input("Take these choices? ('Y' = yes, 'N' = no): \n")
+    if response.lower().startswith('y'):
+        ChoiceSolver.apply(solution)
+        return True
+
+    return False
@@ -21,6 +21,13 @@ class Index:
 
         return self.values[self._left_indices[self._index]]
 
+    def peek_next(self):
+        """ The value `next()` would move to or `None` if there is no other value """
+        if self.size_left() < 2:
+            return None
+
+        return self.values[self._left_indices[(self._index + 1) % self.size_left()]]
+
     def delete(self):
         if self.is_empty():
             raise ValueError("The index is empty")